@@ -4,18 +4,80 @@ import secrets
 from flask import Flask, request, session, render_template, redirect, url_for
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
 
 # Initialize extensions globally
 db = SQLAlchemy()
 login_manager = LoginManager()
-migrate = Migrate()
+# Flask-Migrate (and with it Alembic) is only loaded by processes that can run migrations
+migrate = None
+
+# Route modules registered by create_app: app.routes.<name> exporting a Blueprint called <name>.
+# ENABLED_BLUEPRINTS=name,name... registers a subset (e.g. a jobs-only API process);
+# page templates link across blueprints, so web processes should keep the full set.
+BLUEPRINTS = (
+    'auth_routes',
+    'bas_routes',
+    'bill_routes',
+    'cash_flow_routes',
+    'company_routes',
+    'export_routes',
+    'financial_routes',
+    'invoice_routes',
+    'job_routes',
+    'ledger_routes',
+    'payroll_routes',
+    'purchase_order_routes',
+    'quote_routes',
+    'report_routes',
+    'subscribe_routes',
+    'transaction_routes',
+)
+
+# DB_SCHEMA_MODE=create_all (default) creates missing tables at startup, which suits local
+# development. DB_SCHEMA_MODE=alembic skips it: the schema is owned by `flask db upgrade`
+# run at deploy time, and web processes start without reflecting or creating anything.
+SCHEMA_MODES = ('create_all', 'alembic')
+
+
+def schema_mode():
+    mode = os.environ.get("DB_SCHEMA_MODE", "create_all").lower()
+    if mode not in SCHEMA_MODES:
+        raise ValueError(f"DB_SCHEMA_MODE must be one of {', '.join(SCHEMA_MODES)}, not {mode!r}")
+    return mode
+
+
+def _init_migrations(app):
+    global migrate
+    from flask_migrate import Migrate
+    if migrate is None:
+        migrate = Migrate()
+    migrate.init_app(app, db)
+
+
+def _register_blueprints(app):
+    import importlib
+
+    enabled = os.environ.get("ENABLED_BLUEPRINTS")
+    names = [n.strip() for n in enabled.split(",") if n.strip()] if enabled else BLUEPRINTS
+    for name in names:
+        if name not in BLUEPRINTS:
+            raise ValueError(f"Unknown blueprint in ENABLED_BLUEPRINTS: {name!r}")
+        module = importlib.import_module(f"app.routes.{name}")
+        app.register_blueprint(getattr(module, name))
 
 
 def create_app():
     """Application Factory core production configuration layer."""
     app = Flask(__name__)
 
+    # Console + rotating file log (LOG_LEVEL / LOG_DIR / LOG_FILE)
+    from app.logging_config import configure_logging
+    configure_logging(app)
+
+    # Money amounts (integer cents) serialise as plain JSON numbers
+    from app.money import MoneyJSONProvider
+    app.json = MoneyJSONProvider(app)
+
     # 🔒 SECURITY CONTROL: Pull secret key from production environment or auto-generate
     app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY") or secrets.token_hex(32)
     
@@ -23,13 +85,61 @@ def create_app():
     app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL") or "sqlite:///accounting.db"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # Pooling / SQLite pragma profile for the selected backend (see app/engine_profiles.py)
+    from app import engine_profiles
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_profiles.engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+
     # Initialize extensions with current application context
     db.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    # The flask CLI (`flask db upgrade` ...) always gets migrations; in alembic mode a
+    # web process never runs them and skips the Alembic import entirely.
+    if os.environ.get("FLASK_RUN_FROM_CLI") or schema_mode() == "create_all":
+        _init_migrations(app)
+    engine_profiles.init_app(app, db)
+
+    # Request timing, per-request query counts, slow-query log and /metrics
+    from app import instrumentation
+    instrumentation.init_app(app, db)
 
     login_manager.login_view = "auth_routes.login"
 
+    # In-process worker pool for queued imports and report builds (no external broker)
+    from app import jobs
+    jobs.init_app(app)
+
+    # Integer category keys for ledger lines (flush listener + `flask categories` commands)
+    from app import ledger_categories
+    ledger_categories.init_app(app)
+
+    # Monthly ledger snapshots (session listeners + `flask ledger` maintenance commands)
+    from app import balances
+    balances.init_app(app)
+
+    # Practice-wide reports across every client (`flask portfolio report`)
+    from app import portfolio
+    portfolio.init_app(app)
+
+    # Per-quarter BAS label totals (session listeners + `flask bas` commands)
+    from app import bas
+    bas.init_app(app)
+
+    # Password hashing policy and its bounded worker pool
+    from app import security
+    security.init_app(app)
+
+    # Cached company register for the template context (invalidated on Company writes)
+    from app import company_directory
+    company_directory.init_app(app)
+
+    # Report results cached per ledger version (`flask report-cache` commands)
+    from app import report_cache
+    report_cache.init_app(app)
+
+    # Limit tenant-owned tables (invoices, bills, payroll...) to the active company
+    from app import tenancy
+    tenancy.init_app(app)
+
     # Force Python to load ALL models into memory immediately
     from app.models import (
         User,
@@ -46,6 +156,13 @@ def create_app():
         Sale,
         Employee,
         PayrollRun,
+        LedgerImport,
+        LedgerPeriodBalance,
+        LedgerCategory,
+        BasQuarterBalance,
+        LedgerVersion,
+        BackgroundJob,
+        DocumentLineItem,
     )
 
     @login_manager.user_loader
@@ -53,49 +170,21 @@ def create_app():
         return db.session.get(User, int(user_id))
 
     # Register Blueprint controllers
-    from app.routes.auth_routes import auth_routes
-    from app.routes.bas_routes import bas_routes
-    from app.routes.bill_routes import bill_routes
-    from app.routes.cash_flow_routes import cash_flow_routes
-    from app.routes.company_routes import company_routes
-    from app.routes.financial_routes import financial_routes
-    from app.routes.invoice_routes import invoice_routes
-    from app.routes.ledger_routes import ledger_routes
-    from app.routes.payroll_routes import payroll_routes
-    from app.routes.purchase_order_routes import purchase_order_routes
-    from app.routes.quote_routes import quote_routes
-    from app.routes.report_routes import report_routes
-    from app.routes.subscribe_routes import subscribe_routes
-    from app.routes.transaction_routes import transaction_routes
-
-    app.register_blueprint(auth_routes)
-    app.register_blueprint(bas_routes)
-    app.register_blueprint(bill_routes)
-    app.register_blueprint(cash_flow_routes)
-    app.register_blueprint(company_routes)
-    app.register_blueprint(financial_routes)
-    app.register_blueprint(invoice_routes)
-    app.register_blueprint(ledger_routes)
-    app.register_blueprint(payroll_routes)
-    app.register_blueprint(purchase_order_routes)
-    app.register_blueprint(quote_routes)
-    app.register_blueprint(report_routes)
-    app.register_blueprint(subscribe_routes)
-    app.register_blueprint(transaction_routes)
-
-    # Makes company and companies available in every template
+    _register_blueprints(app)
+
+    # Makes company and companies available in every template.
+    # Both come from the cached company directory; `companies` is only loaded
+    # if the template actually iterates it.
     @app.context_processor
     def inject_active_company():
-        company_id = session.get("company_id") or request.args.get("company_id", type=int)
+        from app.company_directory import company_directory, LazyCompanyList
 
-        try:
-            companies = db.session.query(Company).all()
-        except Exception:
-            companies = []
+        company_id = session.get("company_id") or request.args.get("company_id", type=int)
+        companies = LazyCompanyList(company_directory)
 
         if company_id:
             try:
-                company = db.session.get(Company, int(company_id))
+                company = company_directory.get(company_id)
                 if company:
                     return dict(company=company, companies=companies)
             except Exception:
@@ -112,8 +201,9 @@ def create_app():
             return redirect(url_for('company_routes.select_company'))
         return render_template("welcome.html")
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Create database tables (development mode only, see DB_SCHEMA_MODE)
+    if schema_mode() == "create_all":
+        with app.app_context():
+            db.create_all()
 
     return app
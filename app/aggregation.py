@@ -0,0 +1,125 @@
+from collections import namedtuple
+from sqlalchemy import case, false, func
+from app import db
+from app.models import FinancialRecord
+from app.ledger_categories import COGS, EXPENSE, category_map, is_cogs
+from helpers import get_grouped_data
+
+# Every reporting route reads its numbers through this module. Totals are folded
+# in the database with SUM(CASE ...) so a report costs one GROUP BY pass and the
+# number of rows returned depends on the number of groups, not ledger lines.
+# Categories are grouped and compared on their integer ids (app.ledger_categories)
+# and turned back into names only for the handful of result rows.
+
+LedgerTotals = namedtuple(
+    'LedgerTotals',
+    'debits credits gst_paid gst_received income cogs expenses line_count',
+)
+
+CategoryTotals = namedtuple('CategoryTotals', 'type_of_income type_of_expense debits credits')
+
+INCOME_TAX_RATE = 0.1
+
+
+def _sum(expr):
+    return func.coalesce(func.sum(expr), 0.0)
+
+
+def _ledger_filters(company_id, date_from=None, date_to=None):
+    filters = [FinancialRecord.company_id == company_id]
+    if date_from:
+        filters.append(FinancialRecord.date >= date_from)
+    if date_to:
+        filters.append(FinancialRecord.date <= date_to)
+    return filters
+
+
+def _is_cogs():
+    cogs_id = category_map.lookup(EXPENSE, COGS)
+    return FinancialRecord.expense_category_id == cogs_id if cogs_id is not None else false()
+
+
+def ledger_total_columns():
+    """SUM/CASE select list shared by the single-company and portfolio aggregations."""
+    is_cogs = _is_cogs()
+    return [
+        _sum(FinancialRecord.debit).label('debits'),
+        _sum(FinancialRecord.credit).label('credits'),
+        _sum(FinancialRecord.gst_paid).label('gst_paid'),
+        _sum(FinancialRecord.gst_received).label('gst_received'),
+        _sum(case((FinancialRecord.income_category_id.isnot(None), FinancialRecord.credit), else_=0.0)).label('income'),
+        _sum(case((is_cogs, FinancialRecord.debit), else_=0.0)).label('cogs'),
+        _sum(case(
+            (FinancialRecord.expense_category_id.isnot(None) & ~is_cogs, FinancialRecord.debit),
+            else_=0.0,
+        )).label('expenses'),
+        func.count(FinancialRecord.id).label('line_count'),
+    ]
+
+
+def ledger_totals(company_id, date_from=None, date_to=None):
+    """
+    Folds every ledger line for the company (optionally within a date range) into one
+    LedgerTotals tuple with a single aggregate query.
+    """
+    row = db.session.query(*ledger_total_columns()).filter(
+        *_ledger_filters(company_id, date_from, date_to)
+    ).one()
+    return LedgerTotals(*row)
+
+
+def ledger_category_totals(company_id, date_from=None, date_to=None):
+    """
+    Groups the ledger by (income category, expense category) in one pass.
+    Returns a list of CategoryTotals tuples, one per category pair, named.
+    """
+    rows = db.session.query(
+        FinancialRecord.income_category_id,
+        FinancialRecord.expense_category_id,
+        _sum(FinancialRecord.debit),
+        _sum(FinancialRecord.credit),
+    ).filter(
+        *_ledger_filters(company_id, date_from, date_to)
+    ).group_by(
+        FinancialRecord.income_category_id,
+        FinancialRecord.expense_category_id,
+    ).all()
+    return [
+        CategoryTotals(category_map.name(income_id), category_map.name(expense_id), debits, credits)
+        for income_id, expense_id, debits, credits in rows
+    ]
+
+
+def profit_loss_sections(category_totals):
+    """
+    Splits grouped category totals into (income, cogs, expenses) line lists of
+    (description, amount) tuples, mirroring the P&L classification rules.
+    """
+    income, cogs, expenses = {}, {}, {}
+    for group in category_totals:
+        if group.type_of_income is not None:
+            income[group.type_of_income] = income.get(group.type_of_income, 0.0) + group.credits
+        if is_cogs(group.type_of_expense):
+            cogs[COGS] = cogs.get(COGS, 0.0) + group.debits
+        elif group.type_of_expense is not None:
+            expenses[group.type_of_expense] = expenses.get(group.type_of_expense, 0.0) + group.debits
+    return (
+        sorted(income.items()),
+        sorted(cogs.items()),
+        sorted(expenses.items()),
+    )
+
+
+def income_tax(operating_profit):
+    """Tax provision on the P&L: INCOME_TAX_RATE of a profit, nothing on a loss."""
+    return max(0.0, operating_profit * INCOME_TAX_RATE)
+
+
+def asset_liability_totals(company_id):
+    """
+    Grouped balance sheet positions built on helpers.get_grouped_data.
+    Returns ((asset subcategory, total) ...), ((liability subcategory, total) ...).
+    """
+    assets = tuple((g['subcategory'], g['total']) for g in get_grouped_data("Asset", company_id))
+    liabilities = tuple((g['subcategory'], g['total']) for g in get_grouped_data("Liability", company_id))
+    return assets, liabilities
@@ -0,0 +1,317 @@
+import logging
+from datetime import date, timedelta
+import click
+from sqlalchemy import case, event, extract, false, func, inspect, insert, update, delete
+from sqlalchemy.orm import Session
+from app import db
+from app.models import FinancialRecord, LedgerPeriodBalance
+from app.money import ZERO
+from app.aggregation import LedgerTotals, CategoryTotals, ledger_totals, ledger_category_totals
+from app.ledger_categories import COGS, EXPENSE, category_map
+
+# Monthly snapshots in ledger_period_balances are kept in step with financial_records
+# by the after_flush listener below (ORM writes) and by record_inserted_rows()
+# (Core bulk inserts). Reports read closed months from the snapshot table and
+# only scan the ledger for the open month and any partial months at the range edges.
+# Rows are keyed on the lines' integer category ids (0 for no category) and named
+# through app.ledger_categories only when a report reads them.
+#
+# Bulk Query.update()/delete() bypass both paths; run `flask ledger rebuild-balances`
+# after any such maintenance.
+
+AMOUNT_FIELDS = ('debit', 'credit', 'gst_paid', 'gst_received')
+TRACKED_FIELDS = ('company_id', 'date', 'income_category_id', 'expense_category_id') + AMOUNT_FIELDS
+
+
+def period_start(value):
+    return value.replace(day=1)
+
+
+def next_period(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _accumulate(deltas, values, sign):
+    key = (
+        values['company_id'],
+        period_start(values['date']),
+        values['income_category_id'] or 0,
+        values['expense_category_id'] or 0,
+    )
+    totals = deltas.setdefault(key, [ZERO, ZERO, ZERO, ZERO, 0])
+    for i, field in enumerate(AMOUNT_FIELDS):
+        totals[i] += sign * (values[field] or 0)
+    totals[4] += sign
+
+
+def apply_deltas(connection, deltas):
+    """Adds per-(company, period, category) deltas to the snapshot table, creating missing rows."""
+    table = LedgerPeriodBalance.__table__
+    for (company_id, period, income, expense), (debit, credit, gst_paid, gst_received, count) in deltas.items():
+        key_filter = (
+            (table.c.company_id == company_id)
+            & (table.c.period == period)
+            & (table.c.income_category_id == income)
+            & (table.c.expense_category_id == expense)
+        )
+        result = connection.execute(update(table).where(key_filter).values(
+            debit=table.c.debit + debit,
+            credit=table.c.credit + credit,
+            gst_paid=table.c.gst_paid + gst_paid,
+            gst_received=table.c.gst_received + gst_received,
+            line_count=table.c.line_count + count,
+        ))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(
+                company_id=company_id,
+                period=period,
+                income_category_id=income,
+                expense_category_id=expense,
+                debit=debit,
+                credit=credit,
+                gst_paid=gst_paid,
+                gst_received=gst_received,
+                line_count=count,
+            ))
+
+
+def record_inserted_rows(rows):
+    """Folds rows written with a Core INSERT (bulk import) into the snapshot in the same transaction."""
+    deltas = {}
+    for row in rows:
+        _accumulate(deltas, {field: row.get(field) for field in TRACKED_FIELDS}, 1)
+    if deltas:
+        apply_deltas(db.session.connection(), deltas)
+
+
+def _current_values(record):
+    return {field: getattr(record, field) for field in TRACKED_FIELDS}
+
+
+def _previous_values(record):
+    state = inspect(record)
+    values = {}
+    for field in TRACKED_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            values[field] = history.deleted[0]
+        elif history.unchanged:
+            values[field] = history.unchanged[0]
+        else:
+            values[field] = None
+    return values
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_ledger_changes(session, flush_context):
+    deltas = {}
+    for record in session.new:
+        if isinstance(record, FinancialRecord):
+            _accumulate(deltas, _current_values(record), 1)
+    for record in session.deleted:
+        if isinstance(record, FinancialRecord):
+            _accumulate(deltas, _previous_values(record), -1)
+    for record in session.dirty:
+        if isinstance(record, FinancialRecord) and session.is_modified(record, include_collections=False):
+            state = inspect(record)
+            if any(state.attrs[field].history.has_changes() for field in TRACKED_FIELDS):
+                _accumulate(deltas, _previous_values(record), -1)
+                _accumulate(deltas, _current_values(record), 1)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def _grouped_ledger(company_id=None):
+    """Recomputes the snapshot rows straight from financial_records, one GROUP BY pass."""
+    year = extract('year', FinancialRecord.date)
+    month = extract('month', FinancialRecord.date)
+    query = db.session.query(
+        FinancialRecord.company_id,
+        year,
+        month,
+        func.coalesce(FinancialRecord.income_category_id, 0),
+        func.coalesce(FinancialRecord.expense_category_id, 0),
+        func.coalesce(func.sum(FinancialRecord.debit), 0.0),
+        func.coalesce(func.sum(FinancialRecord.credit), 0.0),
+        func.coalesce(func.sum(FinancialRecord.gst_paid), 0.0),
+        func.coalesce(func.sum(FinancialRecord.gst_received), 0.0),
+        func.count(FinancialRecord.id),
+    )
+    if company_id:
+        query = query.filter(FinancialRecord.company_id == company_id)
+    query = query.group_by(
+        FinancialRecord.company_id,
+        year,
+        month,
+        func.coalesce(FinancialRecord.income_category_id, 0),
+        func.coalesce(FinancialRecord.expense_category_id, 0),
+    )
+    for cid, y, m, income, expense, debit, credit, gst_paid, gst_received, count in query:
+        yield {
+            'company_id': cid,
+            'period': date(int(y), int(m), 1),
+            'income_category_id': income,
+            'expense_category_id': expense,
+            'debit': debit,
+            'credit': credit,
+            'gst_paid': gst_paid,
+            'gst_received': gst_received,
+            'line_count': count,
+        }
+
+
+def rebuild_period_balances(company_id=None):
+    """Backfills the snapshot table from the ledger (all companies, or one). Returns rows written."""
+    table = LedgerPeriodBalance.__table__
+    stmt = delete(table)
+    if company_id:
+        stmt = stmt.where(table.c.company_id == company_id)
+    db.session.execute(stmt)
+
+    rows = list(_grouped_ledger(company_id))
+    if rows:
+        db.session.execute(insert(table), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def check_period_balances(company_id=None, tolerance=0.005):
+    """
+    Compares every snapshot row against a fresh GROUP BY over the ledger.
+    Returns a list of (key, expected, actual) tuples for the rows that disagree.
+    """
+    expected = {
+        (r['company_id'], r['period'], r['income_category_id'], r['expense_category_id']):
+            (r['debit'], r['credit'], r['gst_paid'], r['gst_received'], r['line_count'])
+        for r in _grouped_ledger(company_id)
+    }
+    query = db.session.query(LedgerPeriodBalance)
+    if company_id:
+        query = query.filter(LedgerPeriodBalance.company_id == company_id)
+    actual = {
+        (b.company_id, b.period, b.income_category_id, b.expense_category_id):
+            (b.debit, b.credit, b.gst_paid, b.gst_received, b.line_count)
+        for b in query
+    }
+
+    empty = (0.0, 0.0, 0.0, 0.0, 0)
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        want, have = expected.get(key, empty), actual.get(key, empty)
+        if any(abs((w or 0) - (h or 0)) > tolerance for w, h in zip(want, have)):
+            mismatches.append((key, want, have))
+    return mismatches
+
+
+def _split_range(date_from, date_to):
+    """
+    Splits [date_from, date_to] into closed whole months served from the snapshot
+    and the live edge ranges that still need a ledger scan.
+    Returns (snapshot_from, snapshot_until_exclusive or None, live_ranges).
+    """
+    open_period = period_start(date.today())
+    snap_from = None if date_from is None else (
+        date_from if date_from.day == 1 else next_period(date_from)
+    )
+    snap_until = open_period if date_to is None else min(open_period, period_start(date_to + timedelta(days=1)))
+
+    if snap_from is not None and snap_from >= snap_until:
+        return None, None, [(date_from, date_to)]
+
+    live = []
+    if date_from is not None and date_from < snap_from:
+        live.append((date_from, snap_from - timedelta(days=1)))
+    if date_to is None or date_to >= snap_until:
+        live.append((snap_until, date_to))
+    return snap_from, snap_until, live
+
+
+def _snapshot_query(company_id, snap_from, snap_until, *columns):
+    query = db.session.query(*columns).filter(
+        LedgerPeriodBalance.company_id == company_id,
+        LedgerPeriodBalance.period < snap_until,
+    )
+    if snap_from is not None:
+        query = query.filter(LedgerPeriodBalance.period >= snap_from)
+    return query
+
+
+def snapshot_ledger_totals(company_id, date_from=None, date_to=None):
+    """ledger_totals() answered from closed-month snapshots plus a live scan of the open edges."""
+    snap_from, snap_until, live = _split_range(date_from, date_to)
+    parts = [ledger_totals(company_id, start, end) for start, end in live]
+
+    if snap_until is not None:
+        b = LedgerPeriodBalance
+        cogs_id = category_map.lookup(EXPENSE, COGS)
+        is_cogs = b.expense_category_id == cogs_id if cogs_id is not None else false()
+        row = _snapshot_query(
+            company_id, snap_from, snap_until,
+            func.coalesce(func.sum(b.debit), 0.0),
+            func.coalesce(func.sum(b.credit), 0.0),
+            func.coalesce(func.sum(b.gst_paid), 0.0),
+            func.coalesce(func.sum(b.gst_received), 0.0),
+            func.coalesce(func.sum(case((b.income_category_id != 0, b.credit), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((is_cogs, b.debit), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case(((b.expense_category_id != 0) & ~is_cogs, b.debit), else_=0.0)), 0.0),
+            func.coalesce(func.sum(b.line_count), 0),
+        ).one()
+        parts.append(LedgerTotals(*row))
+
+    return LedgerTotals(*(sum(values) for values in zip(*parts)))
+
+
+def snapshot_category_totals(company_id, date_from=None, date_to=None):
+    """ledger_category_totals() answered from closed-month snapshots plus a live scan of the open edges."""
+    snap_from, snap_until, live = _split_range(date_from, date_to)
+    merged = {}
+
+    def add(income, expense, debits, credits):
+        totals = merged.setdefault((income, expense), [0.0, 0.0])
+        totals[0] += debits or 0.0
+        totals[1] += credits or 0.0
+
+    for start, end in live:
+        for group in ledger_category_totals(company_id, start, end):
+            add(group.type_of_income, group.type_of_expense, group.debits, group.credits)
+
+    if snap_until is not None:
+        b = LedgerPeriodBalance
+        rows = _snapshot_query(
+            company_id, snap_from, snap_until,
+            b.income_category_id, b.expense_category_id, func.sum(b.debit), func.sum(b.credit),
+        ).group_by(b.income_category_id, b.expense_category_id)
+        for income_id, expense_id, debits, credits in rows:
+            add(category_map.name(income_id or None), category_map.name(expense_id or None), debits, credits)
+
+    return [CategoryTotals(income, expense, debits, credits) for (income, expense), (debits, credits) in merged.items()]
+
+
+@click.group('ledger')
+def ledger_cli():
+    """Ledger snapshot maintenance commands."""
+
+
+@ledger_cli.command('rebuild-balances')
+@click.option('--company-id', type=int, default=None, help='Only rebuild this company.')
+def rebuild_balances_command(company_id):
+    """Recompute ledger_period_balances from financial_records."""
+    written = rebuild_period_balances(company_id)
+    click.echo(f"Rebuilt {written} period balance rows.")
+
+
+@ledger_cli.command('check-balances')
+@click.option('--company-id', type=int, default=None, help='Only check this company.')
+def check_balances_command(company_id):
+    """Report snapshot rows that disagree with the ledger (exit code 1 if any)."""
+    mismatches = check_period_balances(company_id)
+    for key, want, have in mismatches:
+        logging.warning(f"Period balance drift {key}: ledger={want} snapshot={have}")
+        click.echo(f"{key}: ledger={want} snapshot={have}")
+    if mismatches:
+        raise SystemExit(1)
+    click.echo("Period balances are consistent with the ledger.")
+
+
+def init_app(app):
+    app.cli.add_command(ledger_cli)
@@ -0,0 +1,350 @@
+import csv
+import logging
+from collections import namedtuple
+from datetime import date, datetime
+import click
+from sqlalchemy import case, event, extract, func, inspect, insert, update, delete
+from sqlalchemy.orm import Session
+from app import db
+from app.models import BasQuarterBalance, Company, FinancialRecord, PayrollRun
+from app.money import ZERO
+
+# Per-quarter BAS label totals in bas_quarter_balances, kept in step with
+# financial_records and payroll_run the same way app.balances keeps the monthly
+# ledger snapshot: an after_flush listener for ORM writes, and
+# record_ledger_rows() / record_payroll_rows() for Core bulk inserts (CSV
+# ledger import, batch pay runs). The BAS page and quarter-end batch read one
+# row per company for the quarter instead of scanning the ledger.
+#
+#   G1  total sales            credit on income lines (income_category_id set)
+#   1A  GST on sales           gst_received
+#   G11 non-capital purchases  debit on expense lines (expense_category_id set)
+#   1B  GST on purchases       gst_paid
+#   W1  total wages            PayrollRun.gross_wages   (quarter of pay_period_end)
+#   W2  amount withheld        PayrollRun.payg_withholding
+#
+# Bulk Query.update()/delete() bypass both paths; run `flask bas rebuild` after
+# any such maintenance.
+
+LABEL_FIELDS = (
+    'g1_total_sales', 'gst_on_sales_1a', 'g11_non_capital_purchases',
+    'gst_on_purchases_1b', 'w1_total_wages', 'w2_amount_withheld',
+)
+COUNT_FIELDS = ('ledger_lines', 'payroll_runs')
+LEDGER_FIELDS = ('company_id', 'date', 'income_category_id', 'expense_category_id',
+                 'debit', 'credit', 'gst_paid', 'gst_received')
+PAYROLL_FIELDS = ('company_id', 'pay_period_end', 'gross_wages', 'payg_withholding')
+QUARTERS = ('Q1', 'Q2', 'Q3', 'Q4')
+
+BasStatement = namedtuple('BasStatement', (
+    'company_id', 'company_name', 'abn', 'quarter',
+) + LABEL_FIELDS + COUNT_FIELDS + ('net_gst', 'amount_payable'))
+
+
+# Quarters -------------------------------------------------------------------
+
+def quarter_start(value):
+    return date(value.year, (value.month - 1) // 3 * 3 + 1, 1)
+
+
+def quarter_for(financial_year, quarter):
+    """First day of a financial-year quarter: FY2026 Q1 is July 2025, Q3 is January 2026."""
+    index = QUARTERS.index(quarter)
+    month = (index * 3 + 6) % 12 + 1
+    return date(financial_year - 1 if month >= 7 else financial_year, month, 1)
+
+
+def financial_quarter(start):
+    """(financial_year, 'Qn') for a quarter's first day; the inverse of quarter_for()."""
+    financial_year = start.year + 1 if start.month >= 7 else start.year
+    return financial_year, QUARTERS[((start.month - 7) % 12) // 3]
+
+
+def quarter_label(start):
+    financial_year, quarter = financial_quarter(start)
+    end = date(start.year, start.month + 2, 1)
+    return f"{quarter} FY{financial_year - 1}-{str(financial_year)[2:]} ({start:%b} - {end:%b %Y})"
+
+
+def _pay_period_quarter(value):
+    if isinstance(value, date):
+        return quarter_start(value)
+    try:
+        return quarter_start(datetime.strptime(value, "%Y-%m-%d").date())
+    except (TypeError, ValueError):
+        return None
+
+
+# Accumulation ---------------------------------------------------------------
+
+def _deltas_for(deltas, company_id, quarter):
+    return deltas.setdefault((company_id, quarter), [ZERO] * len(LABEL_FIELDS) + [0, 0])
+
+
+def _accumulate_ledger(deltas, values, sign):
+    if values['company_id'] is None or values['date'] is None:
+        return
+    totals = _deltas_for(deltas, values['company_id'], quarter_start(values['date']))
+    if values['income_category_id'] is not None:
+        totals[0] += sign * (values['credit'] or 0)
+    totals[1] += sign * (values['gst_received'] or 0)
+    if values['expense_category_id'] is not None:
+        totals[2] += sign * (values['debit'] or 0)
+    totals[3] += sign * (values['gst_paid'] or 0)
+    totals[6] += sign
+
+
+def _accumulate_payroll(deltas, values, sign):
+    quarter = _pay_period_quarter(values['pay_period_end'])
+    if values['company_id'] is None or quarter is None:
+        return
+    totals = _deltas_for(deltas, values['company_id'], quarter)
+    totals[4] += sign * (values['gross_wages'] or 0)
+    totals[5] += sign * (values['payg_withholding'] or 0)
+    totals[7] += sign
+
+
+def apply_deltas(connection, deltas):
+    """Adds per-(company, quarter) deltas to bas_quarter_balances, creating missing rows."""
+    table = BasQuarterBalance.__table__
+    for (company_id, quarter), amounts in deltas.items():
+        values = dict(zip(LABEL_FIELDS + COUNT_FIELDS, amounts))
+        result = connection.execute(
+            update(table)
+            .where((table.c.company_id == company_id) & (table.c.quarter == quarter))
+            .values({field: table.c[field] + amount for field, amount in values.items()})
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(company_id=company_id, quarter=quarter, **values))
+
+
+def record_ledger_rows(rows):
+    """Folds financial_records rows written with a Core INSERT into the BAS totals, same transaction."""
+    deltas = {}
+    for row in rows:
+        _accumulate_ledger(deltas, {field: row.get(field) for field in LEDGER_FIELDS}, 1)
+    if deltas:
+        apply_deltas(db.session.connection(), deltas)
+
+
+def record_payroll_rows(rows):
+    """Folds payroll_run rows written with a Core INSERT into the BAS totals, same transaction."""
+    deltas = {}
+    for row in rows:
+        _accumulate_payroll(deltas, {field: row.get(field) for field in PAYROLL_FIELDS}, 1)
+    if deltas:
+        apply_deltas(db.session.connection(), deltas)
+
+
+def _previous_values(record, fields):
+    state = inspect(record)
+    values = {}
+    for field in fields:
+        history = state.attrs[field].history
+        if history.deleted:
+            values[field] = history.deleted[0]
+        elif history.unchanged:
+            values[field] = history.unchanged[0]
+        else:
+            values[field] = None
+    return values
+
+
+# model -> (tracked fields, accumulator)
+_TRACKED = {
+    FinancialRecord: (LEDGER_FIELDS, _accumulate_ledger),
+    PayrollRun: (PAYROLL_FIELDS, _accumulate_payroll),
+}
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_bas_changes(session, flush_context):
+    deltas = {}
+    for record in session.new:
+        if type(record) in _TRACKED:
+            fields, accumulate = _TRACKED[type(record)]
+            accumulate(deltas, {field: getattr(record, field) for field in fields}, 1)
+    for record in session.deleted:
+        if type(record) in _TRACKED:
+            fields, accumulate = _TRACKED[type(record)]
+            accumulate(deltas, _previous_values(record, fields), -1)
+    for record in session.dirty:
+        if type(record) in _TRACKED and session.is_modified(record, include_collections=False):
+            fields, accumulate = _TRACKED[type(record)]
+            state = inspect(record)
+            if any(state.attrs[field].history.has_changes() for field in fields):
+                accumulate(deltas, _previous_values(record, fields), -1)
+                accumulate(deltas, {field: getattr(record, field) for field in fields}, 1)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+# Rebuild / check ------------------------------------------------------------
+
+def _grouped_totals(company_id=None):
+    """Recomputes every (company, quarter) from the ledger and payroll runs. Returns {key: [amounts...]}."""
+    deltas = {}
+
+    year = extract('year', FinancialRecord.date)
+    month = extract('month', FinancialRecord.date)
+    ledger = db.session.query(
+        FinancialRecord.company_id, year, month,
+        func.coalesce(func.sum(case((FinancialRecord.income_category_id.isnot(None), FinancialRecord.credit), else_=0)), 0),
+        func.coalesce(func.sum(FinancialRecord.gst_received), 0),
+        func.coalesce(func.sum(case((FinancialRecord.expense_category_id.isnot(None), FinancialRecord.debit), else_=0)), 0),
+        func.coalesce(func.sum(FinancialRecord.gst_paid), 0),
+        func.count(FinancialRecord.id),
+    )
+    if company_id:
+        ledger = ledger.filter(FinancialRecord.company_id == company_id)
+    for cid, y, m, g1, gst_sales, g11, gst_purchases, count in ledger.group_by(FinancialRecord.company_id, year, month):
+        totals = _deltas_for(deltas, cid, quarter_start(date(int(y), int(m), 1)))
+        for i, amount in enumerate((g1, gst_sales, g11, gst_purchases)):
+            totals[i] += amount
+        totals[6] += count
+
+    payroll = db.session.query(
+        PayrollRun.company_id, PayrollRun.pay_period_end,
+        func.coalesce(func.sum(PayrollRun.gross_wages), 0),
+        func.coalesce(func.sum(PayrollRun.payg_withholding), 0),
+        func.count(PayrollRun.id),
+    ).execution_options(all_tenants=True).filter(PayrollRun.company_id.isnot(None))
+    if company_id:
+        payroll = payroll.filter(PayrollRun.company_id == company_id)
+    for cid, period_end, gross, withheld, count in payroll.group_by(PayrollRun.company_id, PayrollRun.pay_period_end):
+        quarter = _pay_period_quarter(period_end)
+        if quarter is None:
+            continue
+        totals = _deltas_for(deltas, cid, quarter)
+        totals[4] += gross
+        totals[5] += withheld
+        totals[7] += count
+
+    return deltas
+
+
+def rebuild_bas_balances(company_id=None):
+    """Backfills bas_quarter_balances from the ledger and payroll runs (all companies, or one). Returns rows written."""
+    table = BasQuarterBalance.__table__
+    stmt = delete(table)
+    if company_id:
+        stmt = stmt.where(table.c.company_id == company_id)
+    db.session.execute(stmt)
+
+    rows = [
+        dict(zip(LABEL_FIELDS + COUNT_FIELDS, amounts), company_id=cid, quarter=quarter)
+        for (cid, quarter), amounts in _grouped_totals(company_id).items()
+    ]
+    if rows:
+        db.session.execute(insert(table), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def check_bas_balances(company_id=None):
+    """Returns (key, expected, actual) for every quarter whose stored totals disagree with a fresh recompute."""
+    expected = {key: tuple(amounts) for key, amounts in _grouped_totals(company_id).items()}
+    query = db.session.query(BasQuarterBalance)
+    if company_id:
+        query = query.filter(BasQuarterBalance.company_id == company_id)
+    actual = {
+        (b.company_id, b.quarter): tuple(getattr(b, field) for field in LABEL_FIELDS + COUNT_FIELDS)
+        for b in query
+    }
+
+    empty = (ZERO,) * len(LABEL_FIELDS) + (0, 0)
+    return [
+        (key, expected.get(key, empty), actual.get(key, empty))
+        for key in sorted(set(expected) | set(actual))
+        if expected.get(key, empty) != actual.get(key, empty)
+    ]
+
+
+# Reading ----------------------------------------------------------------------
+
+def _statement(company_id, name, abn, quarter, amounts):
+    g1, gst_sales, g11, gst_purchases, w1, w2, lines, runs = amounts
+    net_gst = gst_sales - gst_purchases
+    return BasStatement(company_id, name, abn, quarter, g1, gst_sales, g11, gst_purchases, w1, w2,
+                        lines, runs, net_gst, net_gst + w2)
+
+
+_BALANCE_COLUMNS = [getattr(BasQuarterBalance, field) for field in LABEL_FIELDS + COUNT_FIELDS]
+
+
+def bas_statement(company, quarter):
+    """The BAS figures for one company and quarter, read from a single snapshot row."""
+    row = db.session.query(*_BALANCE_COLUMNS).filter(
+        BasQuarterBalance.company_id == company.id,
+        BasQuarterBalance.quarter == quarter,
+    ).first()
+    amounts = tuple(row) if row else (ZERO,) * len(LABEL_FIELDS) + (0, 0)
+    return _statement(company.id, company.name, company.abn_number, quarter, amounts)
+
+
+def generate_bas_statements(quarter):
+    """Quarter-end batch: one BasStatement per client company, in one query."""
+    rows = db.session.query(Company.id, Company.name, Company.abn_number, *_BALANCE_COLUMNS).outerjoin(
+        BasQuarterBalance,
+        (BasQuarterBalance.company_id == Company.id) & (BasQuarterBalance.quarter == quarter),
+    ).order_by(Company.name)
+    return [
+        _statement(cid, name, abn, quarter, tuple(
+            value if value is not None else (ZERO if i < len(LABEL_FIELDS) else 0)
+            for i, value in enumerate(amounts)
+        ))
+        for cid, name, abn, *amounts in rows
+    ]
+
+
+def statement_dict(statement):
+    values = statement._asdict()
+    values['quarter'] = statement.quarter.isoformat()
+    values['quarter_label'] = quarter_label(statement.quarter)
+    return values
+
+
+# CLI --------------------------------------------------------------------------
+
+@click.group('bas')
+def bas_cli():
+    """BAS quarter totals: maintenance and quarter-end generation."""
+
+
+@bas_cli.command('rebuild')
+@click.option('--company-id', type=int, default=None, help='Only rebuild this company.')
+def rebuild_command(company_id):
+    """Recompute bas_quarter_balances from financial_records and payroll_run."""
+    written = rebuild_bas_balances(company_id)
+    click.echo(f"Rebuilt {written} BAS quarter rows.")
+
+
+@bas_cli.command('check')
+@click.option('--company-id', type=int, default=None, help='Only check this company.')
+def check_command(company_id):
+    """Report quarters whose stored totals disagree with the ledger (exit code 1 if any)."""
+    mismatches = check_bas_balances(company_id)
+    for key, want, have in mismatches:
+        logging.warning(f"BAS quarter drift {key}: ledger={want} stored={have}")
+        click.echo(f"{key}: ledger={want} stored={have}")
+    if mismatches:
+        raise SystemExit(1)
+    click.echo("BAS quarter totals are consistent with the ledger.")
+
+
+@bas_cli.command('generate')
+@click.option('--financial-year', type=int, required=True, help='e.g. 2026 for FY2025-26.')
+@click.option('--quarter', type=click.Choice(QUARTERS), required=True)
+@click.option('--output', type=click.File('w'), default='-', help='CSV file to write (default stdout).')
+def generate_command(financial_year, quarter, output):
+    """Write every client's BAS figures for a quarter as CSV."""
+    start = quarter_for(financial_year, quarter)
+    writer = csv.writer(output)
+    writer.writerow(BasStatement._fields)
+    for statement in generate_bas_statements(start):
+        writer.writerow(statement)
+    click.echo(f"Wrote BAS figures for {quarter_label(start)}.", err=True)
+
+
+def init_app(app):
+    app.cli.add_command(bas_cli)
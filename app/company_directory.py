@@ -0,0 +1,193 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.models import Company
+
+# Process-wide cache of the company register used by the template context.
+# Entries are plain tuples, never ORM instances, so they can be shared across
+# requests and threads without being tied to a session. Every Company insert,
+# update or delete invalidates the cache once the transaction commits; the TTL
+# bounds staleness for writes made by other processes.
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 1024
+
+CompanyEntry = namedtuple(
+    'CompanyEntry',
+    'id name abn_number tfn_number contact_person address email phone created_at',
+)
+
+_ENTRY_COLUMNS = tuple(getattr(Company, field) for field in CompanyEntry._fields)
+
+
+class CompanyDirectory:
+    """TTL-bounded listing of every company plus an LRU of single-company lookups."""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._listing = None
+        self._listing_loaded_at = 0.0
+        self._entries = OrderedDict()
+        # Bumped on every invalidation so a load that raced a write is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def configure(self, ttl=None, max_entries=None):
+        with self._lock:
+            if ttl is not None:
+                self.ttl = ttl
+            if max_entries is not None:
+                self.max_entries = max_entries
+            self._clear()
+
+    def _fresh(self, loaded_at):
+        return time.monotonic() - loaded_at < self.ttl
+
+    def all(self):
+        """Every company as CompanyEntry tuples, ordered by name."""
+        with self._lock:
+            if self._listing is not None and self._fresh(self._listing_loaded_at):
+                self.hits += 1
+                return self._listing
+            self.misses += 1
+            generation = self._generation
+
+        listing = [CompanyEntry(*row) for row in db.session.query(*_ENTRY_COLUMNS).order_by(Company.name, Company.id)]
+
+        with self._lock:
+            if generation == self._generation:
+                self._listing = listing
+                self._listing_loaded_at = time.monotonic()
+        return listing
+
+    def get(self, company_id):
+        """A single CompanyEntry, or None if the company does not exist."""
+        company_id = int(company_id)
+        with self._lock:
+            cached = self._entries.get(company_id)
+            if cached is not None and self._fresh(cached[1]):
+                self._entries.move_to_end(company_id)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            generation = self._generation
+
+        row = db.session.query(*_ENTRY_COLUMNS).filter(Company.id == company_id).first()
+        entry = CompanyEntry(*row) if row else None
+        if entry is None:
+            return None
+
+        with self._lock:
+            if generation != self._generation:
+                return entry
+            self._entries[company_id] = (entry, time.monotonic())
+            self._entries.move_to_end(company_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _clear(self):
+        self._generation += 1
+        self._listing = None
+        self._entries.clear()
+
+    def invalidate(self, company_ids=None):
+        """Drops the listing and the given companies (or every cached company)."""
+        with self._lock:
+            self.invalidations += 1
+            self._generation += 1
+            self._listing = None
+            if company_ids is None:
+                self._entries.clear()
+            else:
+                for company_id in company_ids:
+                    self._entries.pop(company_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'cached_companies': len(self._entries),
+                'listing_cached': self._listing is not None,
+            }
+
+
+class LazyCompanyList:
+    """
+    Stand-in for the `companies` template variable: nothing is loaded until a
+    template iterates it, tests it or takes its length.
+    """
+
+    def __init__(self, directory):
+        self._directory = directory
+        self._companies = None
+
+    def _load(self):
+        if self._companies is None:
+            try:
+                self._companies = self._directory.all()
+            except Exception as e:
+                # Never let the company picker take down an unrelated page (error pages included)
+                logging.error(f"Company directory load failed: {e}", exc_info=True)
+                self._companies = []
+        return self._companies
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __bool__(self):
+        return bool(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+
+company_directory = CompanyDirectory()
+
+
+def _mark_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_company_ids', set()).add(target.id)
+    else:
+        company_directory.invalidate([target.id])
+
+
+event.listen(Company, 'after_insert', _mark_changed)
+event.listen(Company, 'after_update', _mark_changed)
+event.listen(Company, 'after_delete', _mark_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    changed = session.info.pop('changed_company_ids', None)
+    if changed:
+        company_directory.invalidate(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('changed_company_ids', None)
+
+
+def init_app(app):
+    ttl = app.config.get('COMPANY_DIRECTORY_TTL') or os.environ.get('COMPANY_DIRECTORY_TTL') or DEFAULT_TTL
+    max_entries = (app.config.get('COMPANY_DIRECTORY_MAX_ENTRIES')
+                   or os.environ.get('COMPANY_DIRECTORY_MAX_ENTRIES') or DEFAULT_MAX_ENTRIES)
+    company_directory.configure(ttl=float(ttl), max_entries=int(max_entries))
@@ -0,0 +1,131 @@
+import logging
+import os
+from flask import has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+# Engine profiles fed into SQLALCHEMY_ENGINE_OPTIONS. Every setting can be
+# overridden from the environment; DB_ENGINE_PROFILE=default skips the whole
+# layer and leaves SQLAlchemy's stock behaviour (rollback journal, no pool tuning).
+#
+# SQLite:   WAL journal (readers no longer wait for writers), synchronous=NORMAL,
+#           busy_timeout, page cache and mmap sizes applied on every new connection.
+# Postgres: sized QueuePool with pre-ping and recycle, statement_timeout on web requests.
+# MySQL:    the same pool settings, max_execution_time on web requests.
+#
+# The statement timeout only covers transactions begun while a web request is
+# active: migrations, CLI commands and background jobs (exports, imports) share
+# the pool but run without it.
+
+SQLITE_DEFAULTS = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_CACHE_SIZE_KB': 65536,
+    'SQLITE_MMAP_SIZE': 268435456,
+}
+
+SERVER_DEFAULTS = {
+    'DB_POOL_SIZE': 10,
+    'DB_MAX_OVERFLOW': 20,
+    'DB_POOL_TIMEOUT': 30,
+    'DB_POOL_RECYCLE': 1800,
+    'DB_POOL_PRE_PING': 1,
+    'DB_STATEMENT_TIMEOUT_MS': 30000,
+}
+
+
+def _setting(name, defaults, cast=int):
+    value = os.environ.get(name)
+    return cast(value) if value not in (None, '') else defaults[name]
+
+
+def profile_enabled():
+    return os.environ.get('DB_ENGINE_PROFILE', 'tuned').lower() != 'default'
+
+
+def sqlite_pragmas():
+    """PRAGMA statements run on every new SQLite connection, in order."""
+    return [
+        f"PRAGMA journal_mode={_setting('SQLITE_JOURNAL_MODE', SQLITE_DEFAULTS, str)}",
+        f"PRAGMA synchronous={_setting('SQLITE_SYNCHRONOUS', SQLITE_DEFAULTS, str)}",
+        f"PRAGMA busy_timeout={_setting('SQLITE_BUSY_TIMEOUT_MS', SQLITE_DEFAULTS)}",
+        # Negative cache_size is measured in KiB rather than pages
+        f"PRAGMA cache_size=-{_setting('SQLITE_CACHE_SIZE_KB', SQLITE_DEFAULTS)}",
+        f"PRAGMA mmap_size={_setting('SQLITE_MMAP_SIZE', SQLITE_DEFAULTS)}",
+    ]
+
+
+def engine_options(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database backend."""
+    if not profile_enabled():
+        return {}
+
+    backend = make_url(database_uri).get_backend_name()
+    if backend == 'sqlite':
+        # Pool sizing does not apply (Flask-SQLAlchemy picks the SQLite pool);
+        # the busy timeout is also passed to the driver for its own lock waits.
+        return {'connect_args': {'timeout': _setting('SQLITE_BUSY_TIMEOUT_MS', SQLITE_DEFAULTS) / 1000}}
+
+    return {
+        'pool_size': _setting('DB_POOL_SIZE', SERVER_DEFAULTS),
+        'max_overflow': _setting('DB_MAX_OVERFLOW', SERVER_DEFAULTS),
+        'pool_timeout': _setting('DB_POOL_TIMEOUT', SERVER_DEFAULTS),
+        'pool_recycle': _setting('DB_POOL_RECYCLE', SERVER_DEFAULTS),
+        'pool_pre_ping': bool(_setting('DB_POOL_PRE_PING', SERVER_DEFAULTS)),
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _install_request_statement_timeout(engine, milliseconds):
+    backend = engine.dialect.name
+
+    def limit_request_transaction(session, transaction, connection):
+        if connection.engine is not engine or not has_request_context():
+            return
+        if backend == 'postgresql':
+            # SET LOCAL ends with the transaction
+            connection.exec_driver_sql(f'SET LOCAL statement_timeout = {milliseconds}')
+        elif not connection.info.get('request_statement_timeout'):
+            connection.exec_driver_sql(f'SET SESSION max_execution_time = {milliseconds}')
+            connection.info['request_statement_timeout'] = True
+
+    def reset_on_checkin(dbapi_connection, connection_record):
+        # MySQL session variables outlive the transaction; clear before the pool hands it to a job
+        if connection_record.info.pop('request_statement_timeout', False):
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute('SET SESSION max_execution_time = 0')
+            finally:
+                cursor.close()
+
+    event.listen(Session, 'after_begin', limit_request_transaction)
+    if backend == 'mysql':
+        event.listen(engine, 'checkin', reset_on_checkin)
+
+
+def init_app(app, db):
+    """
+    Installs the per-connection SQLite pragmas, or the web request statement
+    timeout on Postgres/MySQL, on the app's engine (call after db.init_app).
+    """
+    if not profile_enabled():
+        return
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _apply_sqlite_pragmas)
+            logging.info(f"SQLite engine profile: {', '.join(sqlite_pragmas())}")
+        elif engine.dialect.name in ('postgresql', 'mysql'):
+            statement_timeout = _setting('DB_STATEMENT_TIMEOUT_MS', SERVER_DEFAULTS)
+            if statement_timeout:
+                _install_request_statement_timeout(engine, statement_timeout)
@@ -0,0 +1,206 @@
+import os
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from sqlalchemy import func, select
+from app import db
+from app.models import Bill, Company, DocumentLineItem, Invoice
+from app.ledger import iter_ledger_lines
+from app.money import Money
+from app.streaming import stream_rows
+from app.tenancy import tenant_scope
+from app.worker_pool import process_pool, worker_app
+
+# XLSX exports that run in constant memory whatever the row count: rows are
+# read from the database with app.streaming.stream_rows (a server-side cursor,
+# yield_per batches) and appended to an openpyxl write-only workbook, which spools
+# each sheet to a temporary file instead of building cell objects. Nothing
+# holds more than one fetch batch of rows at a time.
+#
+# Per-invoice workbooks for batch invoicing are written by
+# generate_invoice_files(), optionally spread over a process pool.
+
+EXPORT_BATCH_SIZE = 2000
+INVOICE_FILE_CHUNK = 200
+
+ExportSpec = namedtuple('ExportSpec', 'title headers rows')
+
+_BOLD = Font(bold=True)
+
+
+def _cell_value(value):
+    if isinstance(value, Money):
+        return float(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def write_xlsx(title, headers, rows, target):
+    """
+    Writes a header row plus rows to an .xlsx path or binary file object using
+    openpyxl's write-only mode, so memory stays flat however many rows stream in.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title[:31])
+    sheet.freeze_panes = 'A2'
+    header = []
+    for name in headers:
+        cell = WriteOnlyCell(sheet, value=name)
+        cell.font = _BOLD
+        header.append(cell)
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_cell_value(value) for value in row])
+    workbook.save(target)
+
+
+# Export definitions -----------------------------------------------------------
+
+def _general_ledger_rows(company_id, date_from=None, date_to=None):
+    for line in iter_ledger_lines(company_id, date_from, date_to, batch_size=EXPORT_BATCH_SIZE):
+        yield (line.date, line.description, line.type_of_income or line.type_of_expense,
+               line.debit, line.credit, line.balance)
+
+
+def _document_rows(model, document_type, party_column, company_id, date_from=None, date_to=None):
+    """One row per document with its GST taken from the parsed line items, streamed in (id) order."""
+    gst = select(
+        DocumentLineItem.document_id,
+        func.sum(DocumentLineItem.gst_cents).label('gst_cents'),
+    ).where(
+        DocumentLineItem.company_id == company_id,
+        DocumentLineItem.document_type == document_type,
+    ).group_by(DocumentLineItem.document_id).subquery()
+
+    stmt = select(
+        model.id, party_column, model.due_date, model.payment_status, model.total_amount, gst.c.gst_cents,
+    ).outerjoin(gst, gst.c.document_id == model.id).where(model.company_id == company_id)
+    if date_from:
+        stmt = stmt.where(model.due_date >= date_from)
+    if date_to:
+        stmt = stmt.where(model.due_date <= date_to)
+    stmt = stmt.order_by(model.id)
+
+    for document_id, party, due_date, status, total, gst_cents in stream_rows(stmt, EXPORT_BATCH_SIZE):
+        yield (document_id, party, due_date, status, total, Money.from_cents(gst_cents or 0))
+
+
+EXPORTS = {
+    'general_ledger': ExportSpec(
+        'General Ledger',
+        ('Date', 'Description', 'Category', 'Debit', 'Credit', 'Balance'),
+        _general_ledger_rows,
+    ),
+    'invoices': ExportSpec(
+        'Invoices',
+        ('Invoice', 'Client', 'Due Date', 'Status', 'Total (inc. GST)', 'GST'),
+        lambda company_id, date_from=None, date_to=None: _document_rows(
+            Invoice, 'invoice', Invoice.client_name, company_id, date_from, date_to),
+    ),
+    'bills': ExportSpec(
+        'Bills',
+        ('Bill', 'Vendor', 'Due Date', 'Status', 'Total (inc. GST)', 'GST'),
+        lambda company_id, date_from=None, date_to=None: _document_rows(
+            Bill, 'bill', Bill.vendor_name, company_id, date_from, date_to),
+    ),
+}
+
+
+def export_xlsx(name, company_id, target, date_from=None, date_to=None):
+    """Writes the named export (see EXPORTS) for one company to target."""
+    spec = EXPORTS[name]
+    write_xlsx(spec.title, spec.headers, spec.rows(company_id, date_from, date_to), target)
+
+
+# Per-invoice workbooks ----------------------------------------------------------
+
+def invoice_file_name(invoice_id):
+    return f"Invoice_{invoice_id:06d}.xlsx"
+
+
+def write_invoice_file(invoice, company, lines, path):
+    """One invoice as its own workbook: header block, line items, GST and grand totals."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Invoice')
+    sheet.append([company.name if company else None])
+    sheet.append(['ABN:', company.abn_number if company else None])
+    sheet.append([])
+    sheet.append(['Invoice Number:', invoice.id])
+    sheet.append(['Date:', date.today()])
+    sheet.append(['Due Date:', invoice.due_date])
+    sheet.append(['Client Name:', invoice.client_name])
+    sheet.append(['Status:', invoice.payment_status])
+    sheet.append([])
+    header = []
+    for name in ('Description', 'Quantity', 'Unit Price', 'GST Code', 'GST', 'Amount (inc. GST)'):
+        cell = WriteOnlyCell(sheet, value=name)
+        cell.font = _BOLD
+        header.append(cell)
+    sheet.append(header)
+
+    gst_cents = amount_cents = 0
+    for line in lines:
+        sheet.append([line.description, float(line.quantity), line.unit_price_cents / 100,
+                      line.gst_code, line.gst_cents / 100, line.amount_cents / 100])
+        gst_cents += line.gst_cents
+        amount_cents += line.amount_cents
+
+    sheet.append([])
+    sheet.append([None, None, None, None, 'Total GST:', gst_cents / 100])
+    sheet.append([None, None, None, None, 'Grand Total:', amount_cents / 100])
+    workbook.save(path)
+
+
+def _write_invoice_batch(company_id, invoice_ids, output_dir):
+    """Writes one chunk of invoices with two queries (documents, then all their line items)."""
+    company = db.session.get(Company, company_id)
+    invoices = db.session.execute(
+        select(Invoice).where(Invoice.company_id == company_id, Invoice.id.in_(invoice_ids)).order_by(Invoice.id)
+    ).scalars().all()
+    lines_by_invoice = {}
+    for line in db.session.execute(
+        select(DocumentLineItem).where(
+            DocumentLineItem.document_type == 'invoice',
+            DocumentLineItem.document_id.in_(invoice_ids),
+        ).order_by(DocumentLineItem.document_id, DocumentLineItem.position)
+    ).scalars():
+        lines_by_invoice.setdefault(line.document_id, []).append(line)
+
+    paths = []
+    for invoice in invoices:
+        path = os.path.join(output_dir, invoice_file_name(invoice.id))
+        write_invoice_file(invoice, company, lines_by_invoice.get(invoice.id, []), path)
+        paths.append(path)
+    return paths
+
+
+def _invoice_batch_worker(company_id, invoice_ids, output_dir):
+    with worker_app().app_context(), tenant_scope(company_id):
+        return _write_invoice_batch(company_id, invoice_ids, output_dir)
+
+
+def generate_invoice_files(company_id, output_dir, invoice_ids=None, workers=1, chunk_size=INVOICE_FILE_CHUNK):
+    """
+    Writes Invoice_<id>.xlsx for every invoice of the company (or just invoice_ids)
+    into output_dir, chunk_size invoices per unit of work. With workers > 1 the
+    chunks are written in parallel processes. Returns the file paths in id order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if invoice_ids is None:
+        invoice_ids = db.session.execute(
+            select(Invoice.id).where(Invoice.company_id == company_id).order_by(Invoice.id)
+        ).scalars().all()
+    chunks = [invoice_ids[i:i + chunk_size] for i in range(0, len(invoice_ids), chunk_size)]
+
+    if workers > 1 and len(chunks) > 1:
+        with process_pool(workers) as pool:
+            results = list(pool.map(_invoice_batch_worker, [company_id] * len(chunks), chunks,
+                                    [output_dir] * len(chunks)))
+    else:
+        with tenant_scope(company_id):
+            results = [_write_invoice_batch(company_id, chunk, output_dir) for chunk in chunks]
+    return [path for paths in results for path in paths]
@@ -0,0 +1,198 @@
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import insert
+from app import db
+from app.models import FinancialRecord, LedgerImport
+from app.balances import record_inserted_rows
+from app.bas import record_ledger_rows
+from app.ledger_categories import assign_category_ids
+from app.report_cache import bump_ledger_versions
+
+# Rows are posted with one executemany INSERT per chunk and committed together
+# with the import checkpoint, so a crash never leaves a half-written chunk behind.
+CHUNK_SIZE = 5000
+
+# Cap on the per-row error report kept on the checkpoint row.
+MAX_REPORTED_ERRORS = 1000
+
+DATE_FORMATS = ('%d-%m-%Y', '%Y-%m-%d')
+
+
+class RowError(ValueError):
+    """Raised when a single CSV line cannot be posted to the ledger."""
+
+
+def open_csv_stream(file_storage=None, csv_text=None):
+    """
+    Wraps an uploaded file (or pasted CSV text) as a text stream for the csv module.
+    The upload is read incrementally from Werkzeug's spooled temp file, never as one string.
+    """
+    if file_storage is not None and file_storage.filename:
+        return io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+    if csv_text:
+        return io.StringIO(csv_text.strip(), newline='')
+    return None
+
+
+def iter_csv_rows(stream):
+    """
+    Yields (line_number, fields) for every non-blank data row.
+    A leading header row (first cell 'Date') is skipped.
+    """
+    reader = csv.reader(stream)
+    first = True
+    for fields in reader:
+        if not fields or not any(f.strip() for f in fields):
+            continue
+        if first:
+            first = False
+            if fields[0].strip().lower() == 'date':
+                continue
+        yield reader.line_num, fields
+
+
+def _parse_date(raw):
+    value = (raw or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise RowError(f"Invalid date '{value}' (expected DD-MM-YYYY).")
+
+
+def _parse_amount(raw, field):
+    value = (raw or '').strip().replace('$', '').replace(',', '')
+    if not value:
+        return 0.0
+    try:
+        amount = float(value)
+    except ValueError:
+        raise RowError(f"Invalid {field} amount '{raw.strip()}'.")
+    if amount < 0:
+        raise RowError(f"Negative {field} amount '{raw.strip()}'.")
+    return amount
+
+
+def parse_row(fields, company_id):
+    """
+    Converts one CSV row (Date,Description,Debit,Credit,Type of Expense,Type of Income)
+    into a plain column dict ready for an executemany INSERT.
+    """
+    if len(fields) < 4:
+        raise RowError(f"Expected at least 4 columns, found {len(fields)}.")
+
+    description = fields[1].strip()
+    if not description:
+        raise RowError("Description is empty.")
+
+    debit = _parse_amount(fields[2], 'debit')
+    credit = _parse_amount(fields[3], 'credit')
+    expense_type = fields[4].strip() if len(fields) > 4 else ''
+    income_type = fields[5].strip() if len(fields) > 5 else ''
+
+    return {
+        'date': _parse_date(fields[0]),
+        'description': description[:255],
+        'debit': debit,
+        'credit': credit,
+        'type_of_expense': (expense_type or None) if debit > 0 else None,
+        'type_of_income': (income_type or None) if credit > 0 else None,
+        'company_id': company_id,
+    }
+
+
+def _commit_chunk(ledger_import, rows, rows_read, errors):
+    """Inserts one chunk outside the ORM identity map and advances the checkpoint atomically."""
+    if rows:
+        assign_category_ids(rows)
+        db.session.execute(insert(FinancialRecord.__table__), rows)
+        record_inserted_rows(rows)
+        record_ledger_rows(rows)
+        bump_ledger_versions({row['company_id'] for row in rows})
+    ledger_import.rows_read = rows_read
+    ledger_import.rows_inserted += len(rows)
+    ledger_import.errors = json.dumps(errors)
+    db.session.commit()
+
+
+def ingest_ledger_csv(stream, company_id, filename=None, resume_import=None,
+                      chunk_size=CHUNK_SIZE, on_progress=None):
+    """
+    Streams a ledger CSV into financial_records in fixed-size chunks.
+
+    Each chunk is committed together with its LedgerImport checkpoint. Passing
+    `resume_import` skips the rows an earlier, interrupted run already consumed.
+    Rows that fail validation are recorded in the import's error report instead of
+    being guessed at. Returns the LedgerImport row.
+    """
+    ledger_import = resume_import
+    if ledger_import is None:
+        ledger_import = LedgerImport(
+            company_id=company_id,
+            filename=filename,
+            status='Running',
+            rows_read=0,
+            rows_inserted=0,
+            rows_rejected=0,
+        )
+        db.session.add(ledger_import)
+        db.session.commit()
+    else:
+        ledger_import.status = 'Running'
+
+    skip = ledger_import.rows_read or 0
+    errors = json.loads(ledger_import.errors) if ledger_import.errors else []
+    pending = []
+    rows_read = 0
+
+    try:
+        for line_number, fields in iter_csv_rows(stream):
+            rows_read += 1
+            if rows_read <= skip:
+                continue
+
+            try:
+                pending.append(parse_row(fields, company_id))
+            except RowError as e:
+                ledger_import.rows_rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line_number, 'error': str(e)})
+
+            if len(pending) >= chunk_size:
+                _commit_chunk(ledger_import, pending, rows_read, errors)
+                pending = []
+                if on_progress:
+                    on_progress(ledger_import)
+
+        ledger_import.status = 'Completed'
+        _commit_chunk(ledger_import, pending, rows_read, errors)
+        if on_progress:
+            on_progress(ledger_import)
+    except Exception:
+        db.session.rollback()
+        ledger_import.status = 'Failed'
+        db.session.commit()
+        logging.error(
+            f"Ledger import {ledger_import.id} stopped after {ledger_import.rows_read} rows.",
+            exc_info=True,
+        )
+        raise
+
+    return ledger_import
+
+
+def import_report(ledger_import):
+    """Plain dict summary of an import, suitable for templates and JSON responses."""
+    return {
+        'id': ledger_import.id,
+        'filename': ledger_import.filename,
+        'status': ledger_import.status,
+        'rows_read': ledger_import.rows_read,
+        'rows_inserted': ledger_import.rows_inserted,
+        'rows_rejected': ledger_import.rows_rejected,
+        'errors': json.loads(ledger_import.errors) if ledger_import.errors else [],
+    }
@@ -4,7 +4,7 @@ from app.models import AssetLiability  # Import models
 
 def initialize_database(company_id=1, additional_accounts=None):
     """
-    Initializes the database with default accounts and BAS fields for a given company.
+    Initializes the database with default accounts for a given company.
     Allows additional accounts to be passed dynamically.
     """
     # Preloading account categories (assets, liabilities, equity)
@@ -18,17 +18,8 @@ def initialize_database(company_id=1, additional_accounts=None):
         {"category": "equity", "subcategory": "contributed_capital", "description": "Contributed Capital", "amount": 0.0, "company_id": company_id},
     ]
 
-    # Preloading BAS fields
-    bas_fields = [
-        {"category": "gst", "subcategory": "G1_total_sales", "description": "Total sales (G1)", "amount": 0.0, "company_id": company_id},
-        {"category": "gst", "subcategory": "G2_export_sales", "description": "Export sales (G2)", "amount": 0.0, "company_id": company_id},
-        {"category": "gst", "subcategory": "G3_gst_free_sales", "description": "Other GST-free sales (G3)", "amount": 0.0, "company_id": company_id},
-        {"category": "gst", "subcategory": "G10_capital_purchases", "description": "Capital purchases (G10)", "amount": 0.0, "company_id": company_id},
-        {"category": "gst", "subcategory": "G11_non_capital_purchases", "description": "Non-capital purchases (G11)", "amount": 0.0, "company_id": company_id},
-        {"category": "payg", "subcategory": "W1_total_wages", "description": "Total salary, wages (W1)", "amount": 0.0, "company_id": company_id},
-        {"category": "payg", "subcategory": "W2_payg_withholding", "description": "PAYG withholding (W2)", "amount": 0.0, "company_id": company_id},
-        {"category": "payg", "subcategory": "T1_payg_income", "description": "PAYG instalment income (T1)", "amount": 0.0, "company_id": company_id},
-    ]
+    # BAS labels (G1, 1A, 1B, G11, W1, W2) are not seeded here: app.bas keeps them
+    # per quarter in bas_quarter_balances as ledger lines and pay runs are posted.
 
     # Add additional accounts if provided
     if additional_accounts:
@@ -36,7 +27,7 @@ def initialize_database(company_id=1, additional_accounts=None):
 
     # Add entries to the database
     try:
-        for account in default_accounts + bas_fields:
+        for account in default_accounts:
             # Avoid duplicate entries
             if not AssetLiability.query.filter_by(
                 category=account["category"],
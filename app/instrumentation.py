@@ -0,0 +1,306 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from bisect import bisect_left
+from flask import Response, g, has_app_context, request
+from sqlalchemy import event
+
+# Request and query instrumentation:
+#
+#   * before/after_request time every request and add a Server-Timing header
+#     (app, db and query count) that browser dev tools show per response.
+#   * before/after_cursor_execute on the app's engine count and time every
+#     statement, both per request (on flask.g) and process-wide.
+#   * A statement that runs N_PLUS_ONE_THRESHOLD times or more in one request
+#     (same SQL, IN-lists collapsed) is logged as a likely N+1 loop.
+#   * Statements slower than SLOW_QUERY_MS go to the 'app.slow_query' logger with
+#     their bound parameters redacted (only the count and types are logged).
+#   * GET /metrics renders everything in the Prometheus text format, together
+#     with the report cache, company directory and category map counters.
+#
+# Metrics live in process memory; with several web processes each one is
+# scraped separately. INSTRUMENTATION=0 switches the whole layer off.
+
+DEFAULT_SLOW_QUERY_MS = 200
+DEFAULT_SLOW_REQUEST_MS = 2000
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+
+# Upper bounds (seconds) shared by the request and query histograms
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_query_log = logging.getLogger('app.slow_query')
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_fingerprint(statement):
+    """The statement with whitespace normalised and IN (?, ?, ...) lists collapsed to (?)."""
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def redact_parameters(parameters, executemany=False):
+    """A log-safe description of bound parameters: how many, and their types, never the values."""
+    if executemany:
+        return f"<{len(parameters)} parameter sets redacted>"
+    if isinstance(parameters, dict):
+        values = parameters.values()
+    else:
+        values = parameters or ()
+    types = ', '.join(type(value).__name__ for value in values)
+    return f"<{len(values)} redacted: {types}>" if types else "<none>"
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(DURATION_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = bisect_left(DURATION_BUCKETS, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        with self._lock:
+            key = (name, labels)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self, extra=()):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(h.counts), h.total, h.count)) for key, h in self._histograms.items()
+            )
+        lines = []
+        described = set()
+
+        def header(name, kind, text=None):
+            if name not in described:
+                described.add(name)
+                text = text or self._help.get(name, (kind, name))[1]
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), (counts, total, count) in histograms:
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, bucket in zip(DURATION_BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for name, kind, text, samples in extra:
+            header(name, kind, text)
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+metrics = MetricsRegistry()
+metrics.describe('app_http_requests_total', 'counter', 'HTTP requests by endpoint, method and status.')
+metrics.describe('app_http_request_duration_seconds', 'histogram', 'Wall time per HTTP request.')
+metrics.describe('app_http_request_queries_total', 'counter', 'SQL statements executed while serving requests.')
+metrics.describe('app_db_queries_total', 'counter', 'SQL statements executed (requests, jobs and CLI).')
+metrics.describe('app_db_query_duration_seconds', 'histogram', 'Time per SQL statement.')
+metrics.describe('app_db_slow_queries_total', 'counter', 'Statements slower than SLOW_QUERY_MS.')
+metrics.describe('app_n_plus_one_total', 'counter', 'Requests that repeated one statement N_PLUS_ONE_THRESHOLD times or more.')
+
+
+class RequestStats:
+    """Per-request tallies kept on flask.g."""
+
+    __slots__ = ('started', 'queries', 'query_time', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements = Counter()
+
+
+def _request_stats():
+    return g.get('request_stats') if has_app_context() else None
+
+
+# SQLAlchemy hooks --------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _query_failed(exception_context):
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def _after_cursor_execute(settings, conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    metrics.inc('app_db_queries_total')
+    metrics.observe('app_db_query_duration_seconds', elapsed)
+
+    stats = _request_stats()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += elapsed
+        stats.statements[statement_fingerprint(statement)] += 1
+
+    if elapsed * 1000 >= settings['slow_query_ms']:
+        metrics.inc('app_db_slow_queries_total')
+        where = f" [{request.method} {request.path}]" if stats is not None else ''
+        slow_query_log.warning(
+            f"Slow query {elapsed * 1000:.1f} ms{where}: {_WHITESPACE.sub(' ', statement).strip()} "
+            f"params={redact_parameters(parameters, executemany)}"
+        )
+
+
+# Request hooks -----------------------------------------------------------------
+
+def _start_request():
+    g.request_stats = RequestStats()
+
+
+def _finish_request(settings, response):
+    stats = g.pop('request_stats', None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats.started
+    endpoint = request.endpoint or 'unmatched'
+    labels = (('endpoint', endpoint), ('method', request.method))
+
+    metrics.inc('app_http_requests_total', labels + (('status', str(response.status_code)),))
+    metrics.observe('app_http_request_duration_seconds', elapsed, labels)
+    metrics.inc('app_http_request_queries_total', labels, stats.queries)
+
+    if stats.statements:
+        statement, repeats = stats.statements.most_common(1)[0]
+        if repeats >= settings['n_plus_one_threshold']:
+            metrics.inc('app_n_plus_one_total', (('endpoint', endpoint),))
+            slow_query_log.warning(
+                f"Possible N+1 on {request.method} {request.path}: statement ran {repeats} times "
+                f"({stats.queries} queries total): {statement[:300]}"
+            )
+    if elapsed * 1000 >= settings['slow_request_ms']:
+        logging.warning(f"Slow request {request.method} {request.path}: {elapsed * 1000:.1f} ms, "
+                        f"{stats.queries} queries in {stats.query_time * 1000:.1f} ms")
+
+    # Streamed bodies are still being produced; their timing covers only the view
+    response.headers.add(
+        'Server-Timing',
+        f'app;dur={(elapsed - stats.query_time) * 1000:.1f};desc="View", '
+        f'db;dur={stats.query_time * 1000:.1f};desc="{stats.queries} {"query" if stats.queries == 1 else "queries"}"',
+    )
+    return response
+
+
+# /metrics ----------------------------------------------------------------------
+
+def _cache_samples():
+    from app.company_directory import company_directory
+    from app.ledger_categories import category_map
+    from app.report_cache import report_cache
+
+    samples = []
+    for cache, name in ((report_cache, 'report_cache'), (company_directory, 'company_directory'),
+                        (category_map, 'category_map')):
+        stats = cache.stats()
+        for field in ('hits', 'disk_hits', 'misses', 'stores', 'evictions', 'invalidations'):
+            if field in stats:
+                samples.append((f"app_{name}_{field}_total", 'counter', f"{name.replace('_', ' ').capitalize()} {field.replace('_', ' ')}.",
+                                [((), stats[field])]))
+        for field in ('entries', 'cached_companies'):
+            if field in stats:
+                samples.append((f"app_{name}_{field}", 'gauge', f"{name.replace('_', ' ').capitalize()} {field.replace('_', ' ')}.",
+                                [((), stats[field])]))
+    return samples
+
+
+def metrics_view():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(_cache_samples()), mimetype='text/plain; version=0.0.4')
+
+
+def _setting(app, name, default, cast):
+    value = app.config.get(name)
+    if value is None:
+        value = os.environ.get(name)
+    return cast(value) if value not in (None, '') else default
+
+
+def instrumentation_enabled(app):
+    return str(_setting(app, 'INSTRUMENTATION', '1', str)).lower() not in ('0', 'false', 'no', 'off')
+
+
+def init_app(app, db):
+    """Installs the request hooks, engine listeners and /metrics (call after db.init_app)."""
+    if not instrumentation_enabled(app):
+        return
+    settings = {
+        'slow_query_ms': _setting(app, 'SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS, float),
+        'slow_request_ms': _setting(app, 'SLOW_REQUEST_MS', DEFAULT_SLOW_REQUEST_MS, float),
+        'n_plus_one_threshold': _setting(app, 'N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD, int),
+    }
+
+    with app.app_context():
+        engine = db.engine
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _after_cursor_execute(settings, conn, cursor, statement, parameters, context, executemany)
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(engine, 'handle_error', _query_failed)
+
+    app.before_request(_start_request)
+    app.after_request(lambda response: _finish_request(settings, response))
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import select, update
+from app import db
+from app.models import BackgroundJob
+from app.money import Money
+from app.tenancy import tenant_scope
+
+# Registry of job kinds -> handler(job, **params). Route modules register their
+# long-running work here with @job_handler so it can be queued by name.
+#
+# The pool lives in the web process, so a restart drops whatever it held. When
+# the server starts (wsgi.py) recover_jobs() hands 'Queued' rows back to the new pool and marks
+# 'Running' rows older than JOB_STALE_AFTER seconds 'Failed'. A worker claims its
+# row (Queued -> Running) in one UPDATE, so a job dispatched twice runs once.
+JOB_HANDLERS = {}
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_STALE_AFTER = 3600
+
+
+def job_handler(kind):
+    """Registers a function as the handler for a background job kind."""
+    def decorator(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+class JobContext:
+    """Handle passed to a running job so it can publish progress without touching its own session."""
+
+    def __init__(self, app, job_id):
+        self.app = app
+        self.id = job_id
+
+    def report_progress(self, done, total=None):
+        values = {'progress': int(done)}
+        if total is not None:
+            values['progress_total'] = int(total)
+        # Separate short transaction so progress is visible while the job's own work is uncommitted.
+        with db.engine.begin() as conn:
+            conn.execute(update(BackgroundJob.__table__).where(BackgroundJob.__table__.c.id == self.id).values(**values))
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, Money)):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def init_app(app):
+    """Creates the per-process worker pool that executes queued jobs."""
+    workers = int(app.config.get('JOB_WORKERS') or os.environ.get('JOB_WORKERS') or DEFAULT_JOB_WORKERS)
+    app.extensions['job_executor'] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ledger-job')
+
+
+def submit_job(kind, company_id=None, **params):
+    """Persists a job row and hands it to the worker pool. Returns the BackgroundJob immediately."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+
+    job = BackgroundJob(
+        kind=kind,
+        company_id=company_id,
+        status='Queued',
+        progress=0,
+        params=json.dumps(params, default=_json_default),
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    app.extensions['job_executor'].submit(_run_job, app, job.id)
+    return job
+
+
+def recover_jobs(app):
+    """Re-dispatches jobs left 'Queued' by a previous process and fails its stale 'Running' ones."""
+    stale_after = int(app.config.get('JOB_STALE_AFTER') or os.environ.get('JOB_STALE_AFTER')
+                      or DEFAULT_JOB_STALE_AFTER)
+    jobs = BackgroundJob.__table__
+    with app.app_context():
+        try:
+            now = datetime.utcnow()
+            stale = db.session.execute(
+                select(jobs.c.id, jobs.c.params)
+                .where(jobs.c.status == 'Running', jobs.c.started_at < now - timedelta(seconds=stale_after))
+            ).all()
+            if stale:
+                db.session.execute(
+                    update(jobs).where(jobs.c.id.in_([job.id for job in stale]), jobs.c.status == 'Running')
+                    .values(status='Failed', error='Interrupted: the worker stopped before the job finished.',
+                            finished_at=now)
+                )
+            queued = db.session.execute(
+                select(jobs.c.id).where(jobs.c.status == 'Queued', jobs.c.kind.in_(JOB_HANDLERS)).order_by(jobs.c.id)
+            ).scalars().all()
+            db.session.commit()
+        except Exception as e:
+            # e.g. a fresh database that has not been migrated yet
+            db.session.rollback()
+            logging.warning(f"Background job recovery skipped: {e}")
+            return
+
+    # A failed job is never resumed from its spooled upload (resuming an import takes a new upload)
+    for job in stale:
+        discard_spool(app, (json.loads(job.params) if job.params else {}).get('path'))
+    for job_id in queued:
+        app.extensions['job_executor'].submit(_run_job, app, job_id)
+    if stale or queued:
+        logging.info(f"Background jobs recovered: {len(queued)} re-queued, {len(stale)} stale marked failed")
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        jobs = BackgroundJob.__table__
+        claimed = db.session.execute(
+            update(jobs).where(jobs.c.id == job_id, jobs.c.status == 'Queued')
+            .values(status='Running', started_at=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return
+        job = db.session.get(BackgroundJob, job_id)
+
+        kind = job.kind
+        params = json.loads(job.params) if job.params else {}
+        try:
+            with tenant_scope(job.company_id):
+                result = JOB_HANDLERS[kind](JobContext(app, job_id), company_id=job.company_id, **params)
+            job = db.session.get(BackgroundJob, job_id)
+            job.result = json.dumps(result, default=_json_default)
+            job.status = 'Completed'
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Background job {job_id} ({kind}) failed: {e}", exc_info=True)
+            job = db.session.get(BackgroundJob, job_id)
+            job.status = 'Failed'
+            job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+def job_status(job):
+    """Plain dict view of a job row for the status endpoints."""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'company_id': job.company_id,
+        'status': job.status,
+        'progress': job.progress,
+        'progress_total': job.progress_total,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'status_url': url_for('job_routes.get_job', job_id=job.id),
+        'result_url': url_for('job_routes.get_job_result', job_id=job.id),
+    }
+
+
+def wants_background_job():
+    """True when the caller asked for the work to be queued (?async=1 or an 'async' form field)."""
+    flag = request.args.get('async') or request.form.get('async')
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+def job_accepted_response(job):
+    return jsonify(job_status(job)), 202
+
+
+def _spool_dir(app):
+    return os.path.join(app.instance_path, 'job_spool')
+
+
+def spool_upload(file_storage=None, csv_text=None):
+    """Copies an upload (or pasted CSV) to the instance spool folder so a job can read it later."""
+    spool_dir = _spool_dir(current_app)
+    os.makedirs(spool_dir, exist_ok=True)
+    path = os.path.join(spool_dir, f"{uuid.uuid4().hex}.csv")
+
+    if file_storage is not None and file_storage.filename:
+        file_storage.save(path)
+    elif csv_text:
+        with open(path, 'w', encoding='utf-8', newline='') as fh:
+            fh.write(csv_text.strip())
+    else:
+        return None
+    return path
+
+
+def discard_spool(app, path):
+    """Deletes a spooled upload once its job has finished or failed for good (only files in the spool folder)."""
+    if path and os.path.dirname(os.path.abspath(path)) == os.path.abspath(_spool_dir(app)) and os.path.exists(path):
+        os.remove(path)
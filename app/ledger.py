@@ -0,0 +1,123 @@
+from collections import namedtuple
+from datetime import timedelta
+from sqlalchemy import and_, func, or_, select
+from app import db
+from app.models import FinancialRecord
+from app.balances import period_start, snapshot_ledger_totals
+from app.streaming import stream_rows
+
+# Ledger lines carry a running balance (credits minus debits since inception).
+# The balance is computed in the database with
+#     SUM(credit - debit) OVER (PARTITION BY company_id ORDER BY date, id)
+# over just the rows being shown, plus an opening balance for everything before
+# them taken from the monthly snapshots. A page therefore never re-reads the
+# ledger from the first line.
+
+LedgerLine = namedtuple(
+    'LedgerLine',
+    'id date description type_of_expense type_of_income debit credit balance',
+)
+
+_LINE_COLUMNS = (
+    FinancialRecord.id,
+    FinancialRecord.date,
+    FinancialRecord.description,
+    FinancialRecord.type_of_expense,
+    FinancialRecord.type_of_income,
+    FinancialRecord.debit,
+    FinancialRecord.credit,
+    FinancialRecord.company_id,
+)
+
+
+def _range_filters(company_id, date_from=None, date_to=None, after=None):
+    filters = [FinancialRecord.company_id == company_id]
+    if date_from:
+        filters.append(FinancialRecord.date >= date_from)
+    if date_to:
+        filters.append(FinancialRecord.date <= date_to)
+    if after:
+        after_date, after_id = after
+        filters.append(or_(
+            FinancialRecord.date > after_date,
+            and_(FinancialRecord.date == after_date, FinancialRecord.id > after_id),
+        ))
+    return filters
+
+
+def supports_window_functions():
+    """SQLite only gained window functions in 3.25; every other supported backend has them."""
+    if db.engine.dialect.name == 'sqlite':
+        return db.engine.dialect.dbapi.sqlite_version_info >= (3, 25, 0)
+    return True
+
+
+def balance_before(company_id, before_date, before_id=None):
+    """
+    Running balance of every line that sorts before (before_date, before_id).
+    Whole months come from the period snapshots; only the current month is scanned.
+    """
+    month_start = period_start(before_date)
+    opening = snapshot_ledger_totals(company_id, None, month_start - timedelta(days=1))
+
+    position = FinancialRecord.date < before_date
+    if before_id is not None:
+        position = or_(position, and_(FinancialRecord.date == before_date, FinancialRecord.id < before_id))
+    partial = db.session.query(
+        func.coalesce(func.sum(func.coalesce(FinancialRecord.credit, 0.0) - func.coalesce(FinancialRecord.debit, 0.0)), 0.0)
+    ).filter(
+        FinancialRecord.company_id == company_id,
+        FinancialRecord.date >= month_start,
+        position,
+    ).scalar()
+
+    return (opening.credits - opening.debits) + partial
+
+
+def _lines_statement(company_id, date_from=None, date_to=None, after=None, limit=None):
+    stmt = select(*_LINE_COLUMNS).where(
+        *_range_filters(company_id, date_from, date_to, after)
+    ).order_by(FinancialRecord.date.asc(), FinancialRecord.id.asc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    if not supports_window_functions():
+        return stmt, False
+
+    lines = stmt.subquery()
+    running = func.sum(
+        func.coalesce(lines.c.credit, 0.0) - func.coalesce(lines.c.debit, 0.0)
+    ).over(partition_by=lines.c.company_id, order_by=(lines.c.date, lines.c.id))
+    return select(
+        lines.c.id, lines.c.date, lines.c.description, lines.c.type_of_expense,
+        lines.c.type_of_income, lines.c.debit, lines.c.credit, running.label('running'),
+    ).order_by(lines.c.date, lines.c.id), True
+
+
+def _with_opening(rows, company_id, windowed):
+    """Turns raw rows into LedgerLines, offsetting the in-range running sum by the opening balance."""
+    opening = None
+    running = 0.0
+    for row in rows:
+        if opening is None:
+            opening = balance_before(company_id, row.date, row.id)
+        if windowed:
+            balance = opening + row.running
+        else:
+            # Fallback for SQLite builds without window functions
+            running += (row.credit or 0.0) - (row.debit or 0.0)
+            balance = opening + running
+        yield LedgerLine(row.id, row.date, row.description, row.type_of_expense,
+                         row.type_of_income, row.debit or 0.0, row.credit or 0.0, balance)
+
+
+def ledger_page(company_id, date_from=None, date_to=None, after=None, limit=200):
+    """One keyset page of LedgerLines (up to `limit` rows) with running balances."""
+    stmt, windowed = _lines_statement(company_id, date_from, date_to, after, limit)
+    return list(_with_opening(db.session.execute(stmt), company_id, windowed))
+
+
+def iter_ledger_lines(company_id, date_from=None, date_to=None, batch_size=1000):
+    """Streams every LedgerLine in the range with running balances, batch_size rows at a time."""
+    stmt, windowed = _lines_statement(company_id, date_from, date_to)
+    return _with_opening(stream_rows(stmt, batch_size), company_id, windowed)
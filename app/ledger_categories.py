@@ -0,0 +1,339 @@
+import threading
+from collections import namedtuple
+import click
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models import FinancialRecord, LedgerCategory
+
+# Income and expense types as a chart-of-accounts dimension. Every distinct
+# type_of_income / type_of_expense text is one ledger_categories row, and
+# financial_records carry its integer id next to the text, so reports group and
+# filter on narrow integer columns and indexes.
+#
+# Names are matched case- and whitespace-insensitively ("cogs ", "COGS" are one
+# category) and the stored text is rewritten to the category's name, so
+# spelling variants no longer split a category. Categories hang off one group
+# per section of the P&L (Income, Cost of Sales, Expenses).
+#
+# category_map caches the whole (small, append-mostly) table in process. A
+# lookup that misses reloads it once, so categories created by other processes
+# are picked up, and then remembers the miss: reports ask for COGS on every run,
+# and a company without one must not reload the table each time. Remembered
+# misses are dropped with the map whenever it is invalidated or reloaded, and
+# resolve() never trusts them. New categories are created in the writer's
+# transaction and the map is dropped if that transaction rolls back. ORM writes are resolved by the
+# before_flush listener below; Core bulk inserts call assign_category_ids().
+
+INCOME = 'income'
+EXPENSE = 'expense'
+KINDS = {INCOME: 'type_of_income', EXPENSE: 'type_of_expense'}
+ID_COLUMNS = {INCOME: 'income_category_id', EXPENSE: 'expense_category_id'}
+
+COGS = "COGS"
+
+# (name, account code) of the group each kind's categories are filed under
+GROUPS = {
+    INCOME: ("Income", "4-0000"),
+    EXPENSE: ("Expenses", "6-0000"),
+}
+COST_OF_SALES_GROUP = ("Cost of Sales", "5-0000")
+
+CategoryEntry = namedtuple('CategoryEntry', 'id kind name parent_id account_code')
+
+_categories = LedgerCategory.__table__
+_ENTRY_COLUMNS = tuple(_categories.c[field] for field in CategoryEntry._fields)
+
+
+def normalize_name(name):
+    """Whitespace-collapsed category text ('' for None or blank)."""
+    return ' '.join((name or '').split())
+
+
+def _key(kind, name):
+    return kind, normalize_name(name).casefold()
+
+
+def is_cogs(name):
+    """True for any spelling of the cost of goods sold expense category ("COGS", "cogs ", ...)."""
+    return _key(EXPENSE, name) == _key(EXPENSE, COGS)
+
+
+def _group_for(kind, name):
+    if kind == EXPENSE and is_cogs(name):
+        return COST_OF_SALES_GROUP
+    return GROUPS[kind]
+
+
+class CategoryMap:
+    """In-process copy of ledger_categories: id -> CategoryEntry and (kind, name) -> id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None
+        self._ids = {}
+        # (kind, name) keys known not to exist as of the last load
+        self._missing = set()
+        # Bumped on every invalidation so a load that raced a write is not kept
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _load(self, connection):
+        with self._lock:
+            generation = self._generation
+        entries = {row.id: CategoryEntry(*row) for row in connection.execute(select(*_ENTRY_COLUMNS))}
+        ids = {_key(entry.kind, entry.name): entry.id for entry in entries.values()}
+        with self._lock:
+            if generation == self._generation:
+                self._entries, self._ids = entries, ids
+                self._missing = set()
+        return entries, ids
+
+    def _snapshot(self, connection, refresh=False):
+        with self._lock:
+            if self._entries is not None and not refresh:
+                self.hits += 1
+                return self._entries, self._ids
+            self.misses += 1
+        return self._load(connection)
+
+    def _connection(self, session):
+        return (session or db.session).connection()
+
+    def get(self, category_id, session=None):
+        """CategoryEntry for an id, or None."""
+        if category_id is None:
+            return None
+        entries, _ = self._snapshot(self._connection(session))
+        entry = entries.get(category_id)
+        if entry is None:
+            entries, _ = self._snapshot(self._connection(session), refresh=True)
+            entry = entries.get(category_id)
+        return entry
+
+    def name(self, category_id, session=None):
+        entry = self.get(category_id, session)
+        return entry.name if entry else None
+
+    def lookup(self, kind, name, session=None):
+        """Id of an existing category (None if there is no such category yet)."""
+        return self._lookup(kind, name, session, trust_missing=True)
+
+    def _lookup(self, kind, name, session, trust_missing):
+        if not normalize_name(name):
+            return None
+        key = _key(kind, name)
+        _, ids = self._snapshot(self._connection(session))
+        if key in ids:
+            return ids[key]
+        with self._lock:
+            if trust_missing and key in self._missing:
+                return None
+            generation = self._generation
+        _, ids = self._snapshot(self._connection(session), refresh=True)
+        category_id = ids.get(key)
+        if category_id is None:
+            with self._lock:
+                if generation == self._generation:
+                    self._missing.add(key)
+        return category_id
+
+    def resolve(self, kind, name, session=None):
+        """Id of the category for this text, creating it (and its group) in the session's transaction."""
+        if not normalize_name(name):
+            return None
+        session = session or db.session
+        pending = session.info.setdefault('created_ledger_categories', {})
+        key = _key(kind, name)
+        if key in pending:
+            return pending[key].id
+        category_id = self._lookup(kind, name, session, trust_missing=False)
+        if category_id is not None:
+            return category_id
+
+        group_name, account_code = _group_for(kind, name)
+        group_id = None
+        if _key(kind, group_name) != key:
+            group_id = self._create(session, pending, kind, group_name, None, account_code)
+        return self._create(session, pending, kind, normalize_name(name), group_id, None)
+
+    def _create(self, session, pending, kind, name, parent_id, account_code):
+        key = _key(kind, name)
+        if key in pending:
+            return pending[key].id
+        category_id = self._lookup(kind, name, session, trust_missing=False)
+        if category_id is None:
+            values = {'kind': kind, 'name': name, 'parent_id': parent_id, 'account_code': account_code}
+            category_id = session.connection().execute(insert(_categories).values(**values)).inserted_primary_key[0]
+        pending[key] = CategoryEntry(category_id, kind, name, parent_id, account_code)
+        return category_id
+
+    def descendants(self, category_id, session=None):
+        """The category's id and the ids of every category filed under it."""
+        entries, _ = self._snapshot(self._connection(session))
+        children = {}
+        for entry in entries.values():
+            children.setdefault(entry.parent_id, []).append(entry.id)
+        found, stack = [], [category_id]
+        while stack:
+            current = stack.pop()
+            found.append(current)
+            stack.extend(children.get(current, ()))
+        return found
+
+    def invalidate(self):
+        with self._lock:
+            self.invalidations += 1
+            self._generation += 1
+            self._entries = None
+            self._ids = {}
+            self._missing = set()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries or ()),
+                'known_missing': len(self._missing),
+            }
+
+
+category_map = CategoryMap()
+
+
+def assign_category_ids(rows, session=None):
+    """
+    Fills income_category_id / expense_category_id on plain column dicts bound for
+    a Core INSERT into financial_records, normalising the type text to the
+    category name. Call before the insert and before record_inserted_rows().
+    """
+    session = session or db.session
+    resolved = {}
+    for row in rows:
+        for kind, text_column in KINDS.items():
+            name = row.get(text_column)
+            key = _key(kind, name)
+            if key not in resolved:
+                category_id = category_map.resolve(kind, name, session)
+                resolved[key] = (category_id, _canonical_name(session, kind, name, category_id))
+            row[ID_COLUMNS[kind]], row[text_column] = resolved[key]
+    return rows
+
+
+def _canonical_name(session, kind, name, category_id):
+    if category_id is None:
+        return None
+    pending = session.info.get('created_ledger_categories', {})
+    entry = pending.get(_key(kind, name))
+    return entry.name if entry else category_map.name(category_id, session)
+
+
+@event.listens_for(Session, 'before_flush')
+def _resolve_record_categories(session, flush_context, instances):
+    for record in list(session.new) + list(session.dirty):
+        if not isinstance(record, FinancialRecord):
+            continue
+        for kind, text_column in KINDS.items():
+            name = getattr(record, text_column)
+            category_id = category_map.resolve(kind, name, session)
+            if getattr(record, ID_COLUMNS[kind]) != category_id:
+                setattr(record, ID_COLUMNS[kind], category_id)
+            canonical = _canonical_name(session, kind, name, category_id)
+            if name != canonical:
+                setattr(record, text_column, canonical)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_after_commit(session):
+    if session.info.pop('created_ledger_categories', None):
+        category_map.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    if session.info.pop('created_ledger_categories', None):
+        category_map.invalidate()
+
+
+@click.group('categories')
+def categories_cli():
+    """Ledger category (chart of accounts) commands."""
+
+
+@categories_cli.command('list')
+def list_command():
+    """Print the category tree with account codes and ids."""
+    entries = sorted(category_map._load(db.session.connection())[0].values(), key=lambda e: (e.kind, e.name))
+    children = {}
+    for entry in entries:
+        children.setdefault(entry.parent_id, []).append(entry)
+
+    def show(entry, depth):
+        code = f"{entry.account_code}  " if entry.account_code else ''
+        click.echo(f"{'  ' * depth}{code}{entry.name} [{entry.kind} #{entry.id}]")
+        for child in children.get(entry.id, ()):
+            show(child, depth + 1)
+
+    for root in children.get(None, ()):
+        show(root, 0)
+
+
+@categories_cli.command('backfill')
+@click.option('--batch-size', type=int, default=5000, show_default=True)
+def backfill_command(batch_size):
+    """Assign category ids to ledger lines that have type text but no id (e.g. rows written by raw SQL)."""
+    updated = backfill_category_ids(batch_size)
+    click.echo(f"Assigned categories to {updated} ledger lines; "
+               f"monthly snapshots, BAS quarters and report cache versions refreshed.")
+
+
+def backfill_category_ids(batch_size=5000):
+    """
+    Resolves missing category ids in id-ordered batches, committing each batch.
+    The Core UPDATEs bypass the snapshot, BAS and ledger version listeners, so the
+    affected companies' snapshots and BAS quarters are rebuilt afterwards and
+    their ledger versions bumped last. Returns rows updated.
+    """
+    from app.balances import rebuild_period_balances
+    from app.bas import rebuild_bas_balances
+    from app.report_cache import bump_ledger_versions
+
+    record = FinancialRecord
+    missing = ((record.type_of_income.isnot(None) & record.income_category_id.is_(None))
+               | (record.type_of_expense.isnot(None) & record.expense_category_id.is_(None)))
+    updated, after, company_ids = 0, 0, set()
+    while True:
+        rows = db.session.execute(
+            select(record.id, record.company_id, record.type_of_income, record.type_of_expense)
+            .where(missing, record.id > after).order_by(record.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        by_types = {}
+        for row in rows:
+            by_types.setdefault((row.type_of_income, row.type_of_expense), []).append(row.id)
+            company_ids.add(row.company_id)
+        for (income, expense), ids in by_types.items():
+            values = assign_category_ids([{'type_of_income': income, 'type_of_expense': expense}])[0]
+            db.session.execute(record.__table__.update().where(record.id.in_(ids)).values(**values))
+        db.session.commit()
+        updated += len(rows)
+        after = rows[-1].id
+
+    for company_id in sorted(company_ids):
+        rebuild_period_balances(company_id)
+        rebuild_bas_balances(company_id)
+    # After the rebuilds, so no report read from the old snapshots is cached under the new version
+    bump_ledger_versions(company_ids)
+    db.session.commit()
+    return updated
+
+
+def init_app(app):
+    app.cli.add_command(categories_cli)
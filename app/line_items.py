@@ -0,0 +1,198 @@
+import re
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from sqlalchemy import delete, func, insert, select, update
+from app import db
+from app.models import DocumentLineItem, Invoice, Bill, Quote, PurchaseOrder
+from app.money import Money
+
+# Invoices, bills, quotes and purchase orders keep their free-form `line_items`
+# text for display, but every document is also parsed into document_line_items
+# rows (integer cents, GST inclusive). The document's total_amount is then set
+# in SQL from the sum of its rows, so the two can never disagree.
+#
+# Accepted line shapes, one item per line (or separated by ';'):
+#     2 x Widget @ 15.50
+#     Consulting - $1,200.00 GST
+#     Freight: 45 FRE
+#     Discount -10
+#     Site visit
+# A hyphen followed by a space is a separator; one attached to the amount after
+# whitespace or to the dollar sign ("-10", "-$10", "$-10") is a sign, giving a
+# negative (credit) line.
+# A missing price is filled from the document total where that is unambiguous;
+# any remaining difference becomes an "Unitemised balance" line.
+
+DOCUMENT_MODELS = {
+    'invoice': Invoice,
+    'bill': Bill,
+    'quote': Quote,
+    'purchase_order': PurchaseOrder,
+}
+
+GST_CODES = {
+    'GST': 'GST',
+    'FRE': 'FRE',
+    'GST FREE': 'FRE',
+    'GST-FREE': 'FRE',
+    'EXEMPT': 'FRE',
+    'N-T': 'N-T',
+}
+UNITEMISED_DESCRIPTION = 'Unitemised balance'
+
+ParsedLine = namedtuple(
+    'ParsedLine',
+    'description quantity unit_price_cents gst_code amount_cents gst_cents priced',
+)
+
+_LINE_PATTERN = re.compile(
+    r'^(?:(?P<qty>\d+(?:\.\d+)?)\s*[xX×*]\s*)?'
+    r'(?P<desc>.+?)'
+    r'(?:\s*(?:[@:=,–]|-(?=\s))?\s*(?P<sign>(?<=\s)-)?\$?(?P<dollar_sign>(?<=\$)-)?'
+    r'(?P<price>\d[\d,]*(?:\.\d{1,2})?))?'
+    r'(?:\s*[(\[]?(?P<gst>GST[- ]FREE|GST|FRE|N-T|EXEMPT)[)\]]?)?$',
+    re.IGNORECASE,
+)
+_BULLET = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+
+
+def to_cents(value):
+    """Dollars (str, float or Decimal) to integer cents, rounding half up."""
+    try:
+        return Money(value).cents
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {value!r}")
+
+
+def gst_component(amount_cents, gst_code):
+    """GST contained in a GST-inclusive amount (one eleventh), or nothing for GST-free lines."""
+    if gst_code != 'GST':
+        return 0
+    return int((Decimal(amount_cents) / 11).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def _line(description, quantity, unit_price_cents, gst_code, amount_cents, priced):
+    return ParsedLine(description[:255], quantity, unit_price_cents, gst_code,
+                      amount_cents, gst_component(amount_cents, gst_code), priced)
+
+
+def _parse_one(text):
+    text = _BULLET.sub('', text).strip()
+    match = _LINE_PATTERN.match(text)
+    if not match or not match.group('desc').strip(' -:@'):
+        return _line(text, Decimal(1), 0, 'GST', 0, False)
+
+    quantity = Decimal(match.group('qty')) if match.group('qty') else Decimal(1)
+    gst_code = GST_CODES[match.group('gst').upper()] if match.group('gst') else 'GST'
+    description = match.group('desc').strip(' -:@,')
+    if match.group('price') is None:
+        return _line(description, quantity, 0, gst_code, 0, False)
+
+    unit_price_cents = to_cents(match.group('price'))
+    if match.group('sign') or match.group('dollar_sign'):
+        unit_price_cents = -unit_price_cents
+    amount_cents = int((quantity * unit_price_cents).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    return _line(description, quantity, unit_price_cents, gst_code, amount_cents, True)
+
+
+def parse_line_items(text, total_cents=None):
+    """
+    Parses a line_items blob into ParsedLines. When the document total is known the
+    lines are reconciled against it, so their amounts always add up to total_cents.
+    """
+    raw = [part.strip() for part in (text or '').splitlines() if part.strip()]
+    if len(raw) == 1 and ';' in raw[0]:
+        raw = [part.strip() for part in raw[0].split(';') if part.strip()]
+    lines = [_parse_one(part) for part in raw]
+
+    if total_cents is None:
+        return lines
+
+    remainder = total_cents - sum(line.amount_cents for line in lines)
+    unpriced = [i for i, line in enumerate(lines) if not line.priced]
+    if remainder and len(unpriced) == 1:
+        # A single line without a price carries whatever the priced lines leave over
+        i = unpriced[0]
+        line = lines[i]
+        unit = int((Decimal(remainder) / line.quantity).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+        lines[i] = _line(line.description, line.quantity, unit, line.gst_code, remainder, True)
+    elif remainder:
+        lines.append(_line(UNITEMISED_DESCRIPTION, Decimal(1), remainder, 'GST', remainder, True))
+    return lines
+
+
+def line_item_rows(document_type, document_id, company_id, text, total_cents=None):
+    """Insert-ready dicts for document_line_items."""
+    return [
+        {
+            'company_id': company_id,
+            'document_type': document_type,
+            'document_id': document_id,
+            'position': position,
+            'description': line.description,
+            'quantity': line.quantity,
+            'unit_price_cents': line.unit_price_cents,
+            'gst_code': line.gst_code,
+            'amount_cents': line.amount_cents,
+            'gst_cents': line.gst_cents,
+        }
+        for position, line in enumerate(parse_line_items(text, total_cents))
+    ]
+
+
+def sync_document_totals(document_type, document_ids=None):
+    """Sets total_amount from the SUM of each document's line items, in one UPDATE."""
+    model = DOCUMENT_MODELS[document_type]
+    items = DocumentLineItem.__table__
+    table = model.__table__
+    line_total = select(func.coalesce(func.sum(items.c.amount_cents), 0)).where(
+        items.c.document_type == document_type,
+        items.c.document_id == table.c.id,
+    ).scalar_subquery()
+
+    # Both sides are integer cents: no float division, no rounding
+    stmt = update(table).values(total_amount=line_total)
+    if document_ids is not None:
+        stmt = stmt.where(table.c.id.in_(document_ids))
+    db.session.execute(stmt)
+
+
+def replace_line_items(document_type, document):
+    """
+    (Re)parses a flushed document's line_items text into rows and re-derives its
+    total in SQL. Runs inside the caller's transaction; the caller commits.
+    """
+    items = DocumentLineItem.__table__
+    db.session.execute(delete(items).where(
+        items.c.document_type == document_type,
+        items.c.document_id == document.id,
+    ))
+    total_cents = Money(document.total_amount).cents if document.total_amount is not None else None
+    rows = line_item_rows(document_type, document.id, document.company_id, document.line_items, total_cents)
+    if rows:
+        db.session.execute(insert(items), rows)
+    sync_document_totals(document_type, [document.id])
+    db.session.expire(document, ['total_amount'])
+
+
+def line_item_totals(company_id, document_type, gst_code=None):
+    """
+    Item-level report: quantity, amount and GST per description for one company's
+    documents of a type. Served by ix_document_line_items_company_description.
+    """
+    query = db.session.query(
+        DocumentLineItem.description,
+        DocumentLineItem.gst_code,
+        func.count(DocumentLineItem.id),
+        func.sum(DocumentLineItem.quantity),
+        func.sum(DocumentLineItem.amount_cents),
+        func.sum(DocumentLineItem.gst_cents),
+    ).filter(
+        DocumentLineItem.company_id == company_id,
+        DocumentLineItem.document_type == document_type,
+    )
+    if gst_code:
+        query = query.filter(DocumentLineItem.gst_code == gst_code)
+    return query.group_by(DocumentLineItem.description, DocumentLineItem.gst_code).order_by(
+        func.sum(DocumentLineItem.amount_cents).desc()
+    ).all()
@@ -0,0 +1,46 @@
+import logging
+import os
+from logging.handlers import RotatingFileHandler
+
+# Process-wide logging: console plus a rotating file (5MB per file, 3 backups).
+# Called once from create_app; later calls (every worker-pool process builds
+# its own app) are no-ops.
+#
+# LOG_LEVEL overrides the default (DEBUG when ENV=development, WARNING otherwise).
+# LOG_DIR picks the folder for app.log; LOG_FILE= (empty) keeps logs on the console only.
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+DEFAULT_LOG_DIR = "logs"
+MAX_LOG_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+_configured = False
+
+
+def default_log_level():
+    return logging.DEBUG if os.getenv('ENV') == 'development' else logging.WARNING
+
+
+def configure_logging(app=None):
+    """Installs the console and rotating file handlers on the root logger (once per process)."""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    config = app.config if app is not None else {}
+    level = config.get('LOG_LEVEL') or os.environ.get('LOG_LEVEL') or default_log_level()
+    log_file = config.get('LOG_FILE', os.environ.get('LOG_FILE'))
+    if log_file is None:
+        log_file = os.path.join(config.get('LOG_DIR') or os.environ.get('LOG_DIR') or DEFAULT_LOG_DIR, "app.log")
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        try:
+            os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+            handlers.append(RotatingFileHandler(log_file, maxBytes=MAX_LOG_BYTES, backupCount=LOG_BACKUPS))
+        except OSError as e:
+            print(f"Error creating log file {log_file}: {e}")
+
+    logging.basicConfig(level=level, format=LOG_FORMAT, handlers=handlers)
+    logging.getLogger(__name__).info("Logging system initialized.")
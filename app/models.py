@@ -1,14 +1,23 @@
 from app import db
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, declared_attr
 from sqlalchemy import Numeric, CheckConstraint
 from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.security import hash_password, verify_password, needs_rehash
+from app.money import MoneyType
 
 # =========================================================================
 # 1. INDEPENDENT BASE SUITE MODELS (No external dependencies)
 # =========================================================================
 
+class TenantScoped:
+    """Rows owned by one client company. Queries are limited to the active company by app.tenancy."""
+
+    @declared_attr
+    def company_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True, index=True)
+
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -19,10 +28,17 @@ class User(UserMixin, db.Model):
     role = db.Column(db.String(50), default='Bookkeeper', nullable=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def rehash_password_if_needed(self, password):
+        """Re-hashes a just-verified password under the current policy. Returns True if it changed."""
+        if not needs_rehash(self.password_hash):
+            return False
+        self.set_password(password)
+        return True
 
 class Subscriber(db.Model):
     __tablename__ = 'subscribers'
@@ -36,60 +52,83 @@ class Sale(db.Model):
     price = db.Column(db.Float, nullable=False)
     sale_date = db.Column(db.DateTime, default=datetime.utcnow)
 
-class Quote(db.Model):
+class Quote(TenantScoped, db.Model):
     __tablename__ = 'quotes'
     id = db.Column(db.Integer, primary_key=True)
     customer_name = db.Column(db.String(255), nullable=False)
     line_items = db.Column(db.Text, nullable=False)
-    total_amount = db.Column(db.Float, nullable=False)
+    total_amount = db.Column(MoneyType, nullable=False)
     validity_period = db.Column(db.Date, nullable=False)
 
-class Invoice(db.Model):
+class Invoice(TenantScoped, db.Model):
     __tablename__ = 'invoices'
     id = db.Column(db.Integer, primary_key=True)
     client_name = db.Column(db.String(255), nullable=False)
     line_items = db.Column(db.Text, nullable=False)
-    total_amount = db.Column(db.Float, nullable=False)
+    total_amount = db.Column(MoneyType, nullable=False)
     due_date = db.Column(db.Date, nullable=False)
     payment_status = db.Column(db.String(50), default='Pending')
 
-class PurchaseOrder(db.Model):
+class PurchaseOrder(TenantScoped, db.Model):
     __tablename__ = 'purchase_orders'
     id = db.Column(db.Integer, primary_key=True)
     supplier_name = db.Column(db.String(255), nullable=False)
     line_items = db.Column(db.Text, nullable=False)
-    total_amount = db.Column(db.Float, nullable=False)
+    total_amount = db.Column(MoneyType, nullable=False)
     shipping_address = db.Column(db.Text, nullable=False)
     payment_status = db.Column(db.String(50), default='Pending')
 
-class Bill(db.Model):
+class Bill(TenantScoped, db.Model):
     __tablename__ = 'bills'
     id = db.Column(db.Integer, primary_key=True)
     vendor_name = db.Column(db.String(255), nullable=False)
     line_items = db.Column(db.Text, nullable=False)
-    total_amount = db.Column(db.Float, nullable=False)
+    total_amount = db.Column(MoneyType, nullable=False)
     due_date = db.Column(db.Date, nullable=False)
     payment_status = db.Column(db.String(50), default='Unpaid')
 
-class Employee(db.Model):
+class DocumentLineItem(TenantScoped, db.Model):
+    """One parsed line of an invoice, bill, quote or purchase order (amounts in integer cents, GST inclusive)."""
+    __tablename__ = 'document_line_items'
+    id = db.Column(db.Integer, primary_key=True)
+    document_type = db.Column(db.String(20), nullable=False)
+    document_id = db.Column(db.Integer, nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    description = db.Column(db.String(255), nullable=False)
+    quantity = db.Column(Numeric(12, 3), nullable=False, default=1)
+    unit_price_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    gst_code = db.Column(db.String(10), nullable=False, default='GST')
+    amount_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    gst_cents = db.Column(db.BigInteger, nullable=False, default=0)
+
+    # Document lookups and per-item reporting (revenue by product, GST by code)
+    __table_args__ = (
+        db.Index('ix_document_line_items_document', 'document_type', 'document_id', 'position'),
+        db.Index('ix_document_line_items_company_description', 'company_id', 'document_type', 'description'),
+        db.Index('ix_document_line_items_company_gst_code', 'company_id', 'document_type', 'gst_code'),
+    )
+
+class Employee(TenantScoped, db.Model):
     __tablename__ = "employee"
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
     tfn = db.Column(db.String(20), nullable=True)
     employment_type = db.Column(db.String(50), default="Full-Time")
     tfn_declaration_status = db.Column(db.String(50), default="Submitted")
+    # Gross pay for one pay period, used by batch pay runs when no amount is supplied
+    standard_gross_wages = db.Column(MoneyType, default=0, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-class PayrollRun(db.Model):
+class PayrollRun(TenantScoped, db.Model):
     __tablename__ = "payroll_run"
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey("employee.id"), nullable=False)
     pay_period_start = db.Column(db.String(50), nullable=False)
     pay_period_end = db.Column(db.String(50), nullable=False)
-    gross_wages = db.Column(db.Float, default=0.0, nullable=False)
-    payg_withholding = db.Column(db.Float, default=0.0, nullable=False)
-    super_guarantee = db.Column(db.Float, default=0.0, nullable=False)
-    net_pay = db.Column(db.Float, default=0.0, nullable=False)
+    gross_wages = db.Column(MoneyType, default=0.0, nullable=False)
+    payg_withholding = db.Column(MoneyType, default=0.0, nullable=False)
+    super_guarantee = db.Column(MoneyType, default=0.0, nullable=False)
+    net_pay = db.Column(MoneyType, default=0.0, nullable=False)
     stp_status = db.Column(db.String(50), default="Pending Submission")
     stp_submission_id = db.Column(db.String(100), nullable=True)
     ato_response_timestamp = db.Column(db.DateTime, nullable=True)
@@ -101,35 +140,132 @@ class PayrollRun(db.Model):
 # 2. DEPENDENT ACCOUNTING SUB-CLASSES (Must compile BEFORE Master Company)
 # =========================================================================
 
+class LedgerCategory(db.Model):
+    """Chart-of-accounts category for ledger lines; kind is 'income' or 'expense', parent_id its group."""
+    __tablename__ = 'ledger_categories'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    parent_id = db.Column(db.Integer, db.ForeignKey('ledger_categories.id'), nullable=True)
+    account_code = db.Column(db.String(20), nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'name', name='uq_ledger_categories_kind_name'),
+    )
+
 class FinancialRecord(db.Model):
     __tablename__ = 'financial_records'
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
     description = db.Column(db.String(255), nullable=False)
-    debit = db.Column(db.Float, default=0.0)
-    credit = db.Column(db.Float, default=0.0)
+    debit = db.Column(MoneyType, default=0.0)
+    credit = db.Column(MoneyType, default=0.0)
     type_of_expense = db.Column(db.String(50), nullable=True)
     type_of_income = db.Column(db.String(50), nullable=True)
-    net_expenses = db.Column(db.Float, default=0.0)
-    gst_paid = db.Column(db.Float, default=0.0)
-    net_income = db.Column(db.Float, default=0.0)
-    gst_received = db.Column(db.Float, default=0.0)
-    balance = db.Column(db.Float, default=0.0)
+    # Integer keys for the two type columns above, kept in step by app.ledger_categories
+    expense_category_id = db.Column(db.Integer, db.ForeignKey('ledger_categories.id'), nullable=True)
+    income_category_id = db.Column(db.Integer, db.ForeignKey('ledger_categories.id'), nullable=True)
+    net_expenses = db.Column(MoneyType, default=0.0)
+    gst_paid = db.Column(MoneyType, default=0.0)
+    net_income = db.Column(MoneyType, default=0.0)
+    gst_received = db.Column(MoneyType, default=0.0)
+    balance = db.Column(MoneyType, default=0.0)
     invoice = db.Column(db.Text, nullable=True)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
 
+    # Every report filters on company_id plus a date range, optionally narrowed by category
+    __table_args__ = (
+        db.Index('ix_financial_records_company_date', 'company_id', 'date'),
+        db.Index('ix_financial_records_company_expense_date', 'company_id', 'expense_category_id', 'date'),
+        db.Index('ix_financial_records_company_income_date', 'company_id', 'income_category_id', 'date'),
+    )
+
     company = relationship("Company", back_populates="financial_records")
 
+class LedgerPeriodBalance(db.Model):
+    """Monthly roll-up of ledger lines per company and income/expense category id (0 when unset)."""
+    __tablename__ = 'ledger_period_balances'
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    period = db.Column(db.Date, nullable=False)
+    income_category_id = db.Column(db.Integer, nullable=False, default=0)
+    expense_category_id = db.Column(db.Integer, nullable=False, default=0)
+    debit = db.Column(MoneyType, nullable=False, default=0.0)
+    credit = db.Column(MoneyType, nullable=False, default=0.0)
+    gst_paid = db.Column(MoneyType, nullable=False, default=0.0)
+    gst_received = db.Column(MoneyType, nullable=False, default=0.0)
+    line_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'period', 'income_category_id', 'expense_category_id',
+                            name='uq_ledger_period_balances_key'),
+    )
+
+class BasQuarterBalance(db.Model):
+    """Running BAS label totals per company and quarter (quarter = first day of its first month)."""
+    __tablename__ = 'bas_quarter_balances'
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    quarter = db.Column(db.Date, nullable=False)
+    g1_total_sales = db.Column(MoneyType, nullable=False, default=0)
+    gst_on_sales_1a = db.Column(MoneyType, nullable=False, default=0)
+    g11_non_capital_purchases = db.Column(MoneyType, nullable=False, default=0)
+    gst_on_purchases_1b = db.Column(MoneyType, nullable=False, default=0)
+    w1_total_wages = db.Column(MoneyType, nullable=False, default=0)
+    w2_amount_withheld = db.Column(MoneyType, nullable=False, default=0)
+    ledger_lines = db.Column(db.Integer, nullable=False, default=0)
+    payroll_runs = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'quarter', name='uq_bas_quarter_balances_key'),
+    )
+
+class LedgerVersion(db.Model):
+    """Per-company counter bumped in the same transaction as any write that can change its reports."""
+    __tablename__ = 'ledger_versions'
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), primary_key=True, autoincrement=False)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+class LedgerImport(db.Model):
+    """Checkpoint row for a bulk CSV ledger import (one row per uploaded file)."""
+    __tablename__ = 'ledger_imports'
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=True)
+    status = db.Column(db.String(20), default='Running', nullable=False)
+    rows_read = db.Column(db.Integer, default=0, nullable=False)
+    rows_inserted = db.Column(db.Integer, default=0, nullable=False)
+    rows_rejected = db.Column(db.Integer, default=0, nullable=False)
+    errors = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class BackgroundJob(db.Model):
+    """Queued/running/finished unit of background work plus its stored JSON result."""
+    __tablename__ = 'background_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)
+    status = db.Column(db.String(20), default='Queued', nullable=False)
+    progress = db.Column(db.Integer, default=0, nullable=False)
+    progress_total = db.Column(db.Integer, nullable=True)
+    params = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
 class PayrollRecord(db.Model):
     __tablename__ = 'payroll_records'
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
     employee_name = db.Column(db.String(100), nullable=False)
-    gross_wages = db.Column(db.Float, nullable=False)
-    payg_withholding = db.Column(db.Float, default=0.0)
-    superannuation = db.Column(db.Float, default=0.0)
-    deductions = db.Column(db.Float, default=0.0)
-    net_pay = db.Column(db.Float, nullable=False)
+    gross_wages = db.Column(MoneyType, nullable=False)
+    payg_withholding = db.Column(MoneyType, default=0.0)
+    superannuation = db.Column(MoneyType, default=0.0)
+    deductions = db.Column(MoneyType, default=0.0)
+    net_pay = db.Column(MoneyType, nullable=False)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
 
     company = relationship("Company", back_populates="payroll_records")
@@ -140,7 +276,7 @@ class AssetLiability(db.Model):
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
     category = db.Column(db.String(50), nullable=False)
     subcategory = db.Column(db.String(50), nullable=False)
-    amount = db.Column(Numeric(10, 2), nullable=False, default=0.0)
+    amount = db.Column(MoneyType, nullable=False, default=0.0)
 
     __table_args__ = (
         CheckConstraint("category IN ('Asset', 'Liability')", name="ck_asset_liability_category"),
@@ -153,7 +289,7 @@ class Equity(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
     category = db.Column(db.String(50), nullable=False)
-    amount = db.Column(Numeric(10, 2), nullable=False, default=0.0)
+    amount = db.Column(MoneyType, nullable=False, default=0.0)
 
     company = relationship("Company", back_populates="equities")
 
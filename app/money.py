@@ -0,0 +1,210 @@
+import operator
+from decimal import Decimal, ROUND_HALF_UP
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import BigInteger, Integer, Numeric
+from sqlalchemy.types import TypeDecorator
+
+# Money is held as an exact integer number of cents. In the database every
+# money column is a BIGINT of cents (MoneyType), so SUM/CASE aggregates run as
+# integer arithmetic in SQL and come back exact; in Python the values load as
+# Money, a small immutable value type that mixes freely with the ints, floats
+# and Decimals the rest of the code passes around (floats are taken at their
+# shortest repr, i.e. 0.1 means ten cents) and formats like a number in
+# templates ("%.2f", "{:,.2f}", |round).
+
+_CENT = Decimal('0.01')
+_ONE = Decimal(1)
+
+
+def _to_cents(value):
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        value = Decimal(repr(value))
+    elif not isinstance(value, Decimal):
+        value = Decimal(str(value).replace(',', '').replace('$', '').strip())
+    return int((value * 100).quantize(_ONE, rounding=ROUND_HALF_UP))
+
+
+class Money:
+    """An exact amount of money in cents. Money('12.34'), Money(12.34) and Money.from_cents(1234) are equal."""
+
+    __slots__ = ('cents',)
+
+    def __init__(self, amount=0):
+        object.__setattr__(self, 'cents', amount.cents if isinstance(amount, Money) else _to_cents(amount))
+
+    @classmethod
+    def from_cents(cls, cents):
+        money = object.__new__(cls)
+        if not isinstance(cents, int):
+            cents = int(Decimal(cents).quantize(_ONE, rounding=ROUND_HALF_UP))
+        object.__setattr__(money, 'cents', cents)
+        return money
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Money is immutable')
+
+    @property
+    def amount(self):
+        """The value as a two-place Decimal."""
+        return Decimal(self.cents).scaleb(-2)
+
+    @staticmethod
+    def _cents_of(other):
+        if isinstance(other, Money):
+            return other.cents
+        if isinstance(other, (int, float, Decimal)) and not isinstance(other, bool):
+            return _to_cents(other)
+        return None
+
+    # Arithmetic -------------------------------------------------------------
+
+    def __add__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else Money.from_cents(self.cents + cents)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else Money.from_cents(self.cents - cents)
+
+    def __rsub__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else Money.from_cents(cents - self.cents)
+
+    def __mul__(self, factor):
+        if isinstance(factor, int) and not isinstance(factor, bool):
+            return Money.from_cents(self.cents * factor)
+        if isinstance(factor, (float, Decimal)):
+            factor = Decimal(repr(factor)) if isinstance(factor, float) else factor
+            return Money.from_cents(self.cents * factor)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, divisor):
+        if isinstance(divisor, Money):
+            return self.cents / divisor.cents
+        if isinstance(divisor, (int, float, Decimal)) and not isinstance(divisor, bool):
+            divisor = Decimal(repr(divisor)) if isinstance(divisor, float) else Decimal(divisor)
+            return Money.from_cents(Decimal(self.cents) / divisor)
+        return NotImplemented
+
+    def __neg__(self):
+        return Money.from_cents(-self.cents)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Money.from_cents(abs(self.cents))
+
+    def __round__(self, ndigits=None):
+        if ndigits is None:
+            return int(self.amount.quantize(_ONE, rounding=ROUND_HALF_UP))
+        if ndigits >= 2:
+            return self
+        step = Decimal(1).scaleb(-ndigits)
+        return Money(self.amount.quantize(step, rounding=ROUND_HALF_UP))
+
+    # Comparison -------------------------------------------------------------
+
+    def _compare(self, other, op):
+        if isinstance(other, Money):
+            return op(self.cents, other.cents)
+        if isinstance(other, (int, Decimal)) and not isinstance(other, bool):
+            return op(self.amount, other)
+        if isinstance(other, float):
+            return op(self.amount, Decimal(repr(other)))
+        return NotImplemented
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other):
+        result = self._compare(other, operator.eq)
+        return result if result is NotImplemented else not result
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+    def __hash__(self):
+        # Equal to the hash of the equivalent int/Decimal/float
+        return hash(self.amount)
+
+    # Conversion -------------------------------------------------------------
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __float__(self):
+        return self.cents / 100
+
+    def __int__(self):
+        return int(self.amount)
+
+    def __format__(self, spec):
+        return format(self.amount, spec) if spec else str(self)
+
+    def __str__(self):
+        return f"{self.amount:.2f}"
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __reduce__(self):
+        return (Money.from_cents, (self.cents,))
+
+
+ZERO = Money.from_cents(0)
+
+
+class MoneyType(TypeDecorator):
+    """A money column: BIGINT cents in the database, Money in Python."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    class comparator_factory(TypeDecorator.Comparator):
+        def _adapt_expression(self, op, other_comparator):
+            # credit - debit, SUM(a + b) ... stay money so results load as Money
+            if op in (operator.add, operator.sub):
+                return op, self.type
+            return super()._adapt_expression(op, other_comparator)
+
+    def coerce_compared_value(self, op, value):
+        # Scaling factors are plain numbers, not amounts: `debit * 2` must not bind 200
+        if op in (operator.mul, operator.truediv, operator.floordiv, operator.mod):
+            return Integer() if isinstance(value, int) else Numeric()
+        return self
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return value.cents if isinstance(value, Money) else _to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Money.from_cents(value)
+
+
+class MoneyJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that writes Money as a plain number."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Money):
+            return float(o)
+        return DefaultJSONProvider.default(o)
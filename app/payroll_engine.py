@@ -0,0 +1,135 @@
+from collections import namedtuple
+from decimal import InvalidOperation
+from functools import lru_cache
+from sqlalchemy import func, insert, select
+from app import db
+from app.bas import record_payroll_rows
+from app.models import Employee, PayrollRun
+from app.money import Money, ZERO
+from app.tax_tables import pay_frequency_for, scale_for, tax_table_for, PAY_FREQUENCIES
+
+# Pay runs for a whole company in one pass. Withholding and super come from the
+# tax table in force for the period (app.tax_tables, loaded once per process),
+# every employee's figures are computed in memory from a single column-only
+# SELECT, and the PayrollRun rows go in as one executemany INSERT inside one
+# transaction. The single-employee form on /payroll uses the same rates, so
+# both paths always agree.
+
+STP_PENDING = 'Pending Submission'
+
+PayLine = namedtuple('PayLine', 'employee_id gross_wages payg_withholding super_guarantee net_pay')
+
+
+class PayRunError(ValueError):
+    """A pay run that cannot be processed as requested (e.g. the period was already paid)."""
+
+
+class PayRates:
+    """The rates one pay run is computed with: a tax table for withholding and its super guarantee rate."""
+
+    def __init__(self, tax_table):
+        self.tax_table = tax_table
+        self.super_rate = tax_table.super_guarantee_rate
+
+    def pay_line(self, employee_id, gross_wages, scale, frequency):
+        gross = Money(gross_wages)
+        payg = Money.from_cents(self.tax_table.withholding_cents(scale, frequency, gross.cents))
+        return PayLine(employee_id, gross, payg, gross * self.super_rate, gross - payg)
+
+    def pay_lines(self, wages, frequency):
+        """PayLines for (employee_id, gross, scale) triples paid at one frequency."""
+        return [self.pay_line(employee_id, gross, scale, frequency) for employee_id, gross, scale in wages]
+
+
+@lru_cache(maxsize=None)
+def _rates_for(tax_table):
+    return PayRates(tax_table)
+
+
+def pay_rates(pay_date=None):
+    """The rates in force on pay_date (a period end date), built once per tax table."""
+    return _rates_for(tax_table_for(pay_date))
+
+
+def _already_paid(company_id, pay_period_start, pay_period_end):
+    return db.session.execute(
+        select(func.count(PayrollRun.id)).where(
+            PayrollRun.company_id == company_id,
+            PayrollRun.pay_period_start == pay_period_start,
+            PayrollRun.pay_period_end == pay_period_end,
+        )
+    ).scalar()
+
+
+def run_pay_cycle(company_id, pay_period_start, pay_period_end, wages=None, pay_frequency=None, rates=None):
+    """
+    Pays every employee of a company for one period and commits the PayrollRun rows
+    in a single transaction. `wages` maps employee_id -> gross for this period and
+    overrides each employee's standard_gross_wages; employees with no pay are skipped.
+    The pay frequency defaults to the one implied by the period's length.
+    Returns a summary dict of head counts and totals.
+    """
+    pay_frequency = pay_frequency or pay_frequency_for(pay_period_start, pay_period_end)
+    if pay_frequency not in PAY_FREQUENCIES:
+        raise PayRunError(f"Unknown pay frequency '{pay_frequency}'.")
+    rates = rates or pay_rates(pay_period_end)
+
+    if _already_paid(company_id, pay_period_start, pay_period_end):
+        raise PayRunError(f"Pay period {pay_period_start} to {pay_period_end} has already been run.")
+
+    try:
+        wages = {int(employee_id): gross for employee_id, gross in (wages or {}).items()}
+    except ValueError:
+        raise PayRunError("Employee ids in wages must be integers.")
+    employees = db.session.execute(
+        select(Employee.id, Employee.standard_gross_wages, Employee.tfn_declaration_status)
+        .where(Employee.company_id == company_id)
+        .order_by(Employee.id)
+    ).all()
+
+    unknown = set(wages) - {employee_id for employee_id, _, _ in employees}
+    if unknown:
+        raise PayRunError(f"Unknown employees for this company: {sorted(unknown)}.")
+
+    payable = []
+    for employee_id, standard, tfn_status in employees:
+        try:
+            gross = Money(wages.get(employee_id, standard) or 0)
+        except InvalidOperation:
+            raise PayRunError(f"Invalid gross wages for employee {employee_id}.")
+        if gross > 0:
+            payable.append((employee_id, gross, scale_for(tfn_status)))
+
+    lines = rates.pay_lines(payable, pay_frequency)
+    if lines:
+        rows = [
+            {
+                'company_id': company_id,
+                'employee_id': line.employee_id,
+                'pay_period_start': pay_period_start,
+                'pay_period_end': pay_period_end,
+                'gross_wages': line.gross_wages,
+                'payg_withholding': line.payg_withholding,
+                'super_guarantee': line.super_guarantee,
+                'net_pay': line.net_pay,
+                'stp_status': STP_PENDING,
+            }
+            for line in lines
+        ]
+        db.session.execute(insert(PayrollRun.__table__), rows)
+        record_payroll_rows(rows)
+    db.session.commit()
+
+    return {
+        'company_id': company_id,
+        'pay_period_start': pay_period_start,
+        'pay_period_end': pay_period_end,
+        'pay_frequency': pay_frequency,
+        'tax_table': rates.tax_table.version,
+        'employees_paid': len(lines),
+        'employees_skipped': len(employees) - len(lines),
+        'gross_wages': sum((line.gross_wages for line in lines), ZERO),
+        'payg_withholding': sum((line.payg_withholding for line in lines), ZERO),
+        'super_guarantee': sum((line.super_guarantee for line in lines), ZERO),
+        'net_pay': sum((line.net_pay for line in lines), ZERO),
+    }
@@ -0,0 +1,136 @@
+import csv
+import io
+import sys
+from collections import namedtuple
+from contextlib import nullcontext
+from datetime import datetime
+import click
+from app import db
+from app.models import Company, FinancialRecord
+from app.aggregation import LedgerTotals, income_tax, ledger_total_columns
+from app.money import Money
+from app.exports import write_xlsx
+from app.worker_pool import process_pool, worker_app
+
+# Month-end trial balance and P&L for every client in one grouped pass:
+# companies LEFT JOIN financial_records ... GROUP BY companies.id, using the same
+# SUM/CASE select list as the single-company reports (ledger_total_columns), so
+# a company's portfolio row always matches its own /trial-balance and
+# /profit_loss figures. Rows are written to CSV or XLSX as they are produced.
+#
+# For large practices the work can be split by company shard (id % shards)
+# across a process pool (app.worker_pool).
+
+PortfolioRow = namedtuple('PortfolioRow', (
+    'company_id company_name abn total_debits total_credits is_balanced '
+    'income cogs gross_profit expenses operating_profit tax net_profit_after_tax '
+    'gst_paid gst_received line_count'
+))
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+
+def _portfolio_row(company_id, name, abn, totals):
+    gross_profit = totals.income - totals.cogs
+    operating_profit = gross_profit - totals.expenses
+    tax = Money(income_tax(operating_profit))
+    return PortfolioRow(
+        company_id, name, abn, totals.debits, totals.credits, totals.debits == totals.credits,
+        totals.income, totals.cogs, gross_profit, totals.expenses, operating_profit, tax,
+        operating_profit - tax, totals.gst_paid, totals.gst_received, totals.line_count,
+    )
+
+
+def portfolio_rows(date_from=None, date_to=None, shard=None, shards=None):
+    """
+    Yields one PortfolioRow per company, ordered by name, from a single grouped query.
+    Companies without ledger lines in the range are included with zero totals.
+    """
+    join_on = FinancialRecord.company_id == Company.id
+    if date_from:
+        join_on &= FinancialRecord.date >= date_from
+    if date_to:
+        join_on &= FinancialRecord.date <= date_to
+
+    query = db.session.query(Company.id, Company.name, Company.abn_number, *ledger_total_columns()).outerjoin(
+        FinancialRecord, join_on
+    )
+    if shards:
+        query = query.filter(Company.id % shards == shard)
+    query = query.group_by(Company.id, Company.name, Company.abn_number).order_by(Company.name, Company.id)
+
+    for company_id, name, abn, *totals in query:
+        yield _portfolio_row(company_id, name, abn, LedgerTotals(*totals))
+
+
+# Process pool fan-out ---------------------------------------------------------
+
+def _shard_rows(shard, shards, date_from, date_to):
+    with worker_app().app_context():
+        return list(portfolio_rows(date_from, date_to, shard, shards))
+
+
+def parallel_portfolio_rows(date_from=None, date_to=None, workers=2):
+    """portfolio_rows() split into `workers` company shards, each computed in its own process."""
+    with process_pool(workers) as pool:
+        futures = [pool.submit(_shard_rows, shard, workers, date_from, date_to) for shard in range(workers)]
+        rows = [row for future in futures for row in future.result()]
+    return sorted(rows, key=lambda row: (row.company_name, row.company_id))
+
+
+# Export -----------------------------------------------------------------------
+
+def iter_portfolio_csv(rows):
+    """Yields CSV text a row at a time (header first), for streaming responses."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(PortfolioRow._fields)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+def write_portfolio_xlsx(rows, target, title='Portfolio'):
+    """Writes rows to an .xlsx path or binary file object (openpyxl write-only mode)."""
+    write_xlsx(title, PortfolioRow._fields, rows, target)
+
+
+@click.group('portfolio')
+def portfolio_cli():
+    """Practice-wide reports across every client company."""
+
+
+@portfolio_cli.command('report')
+@click.option('--date-from', type=click.DateTime(['%Y-%m-%d']), default=None)
+@click.option('--date-to', type=click.DateTime(['%Y-%m-%d']), default=None)
+@click.option('--format', 'export_format', type=click.Choice(EXPORT_FORMATS), default='csv')
+@click.option('--output', type=click.Path(dir_okay=False), default=None,
+              help='File to write (CSV defaults to stdout; XLSX requires a path).')
+@click.option('--workers', type=int, default=1, help='Company shards computed in parallel processes.')
+def report_command(date_from, date_to, export_format, output, workers):
+    """Trial balance and P&L for every company in one grouped pass."""
+    date_from = date_from.date() if date_from else None
+    date_to = date_to.date() if date_to else None
+    started = datetime.now()
+    if workers > 1:
+        rows = parallel_portfolio_rows(date_from, date_to, workers)
+    else:
+        rows = portfolio_rows(date_from, date_to)
+
+    if export_format == 'xlsx':
+        if not output:
+            raise click.UsageError('--output is required for XLSX.')
+        write_portfolio_xlsx(rows, output)
+    else:
+        with (open(output, 'w', newline='', encoding='utf-8') if output else nullcontext(sys.stdout)) as stream:
+            for chunk in iter_portfolio_csv(rows):
+                stream.write(chunk)
+    click.echo(f"Portfolio report finished in {(datetime.now() - started).total_seconds():.2f}s.", err=True)
+
+
+def init_app(app):
+    app.cli.add_command(portfolio_cli)
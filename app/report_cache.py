@@ -0,0 +1,310 @@
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import click
+from sqlalchemy import event, inspect, insert, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import AssetLiability, Company, Equity, FinancialRecord, LedgerVersion
+
+# Read-through cache for report results (P&L, balance sheet, cash flow), keyed
+# on (report, company_id, params, ledger_version). ledger_versions holds one
+# counter per company, bumped by the after_flush listener below in the same
+# transaction as any write to the company's ledger lines, assets/liabilities,
+# equity or company details, and by bump_ledger_versions() for Core bulk
+# inserts. A cached result is therefore only ever served for the exact ledger
+# state it was computed from; an old version's entries are never read again and
+# simply age out of the LRU.
+#
+# Results computed while the session holds uncommitted bumped writes are not
+# stored (a rollback would hand the same version number to different data).
+# Bulk Query.update()/delete() bypass the listener; run `flask report-cache
+# clear` after any such maintenance.
+#
+# REPORT_CACHE_PATH adds a shared SQLite file behind the in-process LRU so
+# several worker processes reuse each other's results.
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_DISK_MAX_ENTRIES = 20000
+DISK_PRUNE_EVERY = 100
+
+# model -> attribute holding the company id
+_VERSIONED = {
+    FinancialRecord: 'company_id',
+    AssetLiability: 'company_id',
+    Equity: 'company_id',
+    Company: 'id',
+}
+
+
+class DiskCache:
+    """Pickled results in a SQLite file shared by every process on the host."""
+
+    def __init__(self, path, max_entries=DEFAULT_DISK_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._stores = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS report_cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM report_cache WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key, value):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO report_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time()),
+            )
+            self._stores += 1
+            if self._stores % DISK_PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM report_cache WHERE key NOT IN "
+                    "(SELECT key FROM report_cache ORDER BY stored_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM report_cache")
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM report_cache").fetchone()[0]
+
+
+class ReportCache:
+    """Bounded LRU of report results, optionally backed by a DiskCache."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, disk=None):
+        self.max_entries = max_entries
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.disk_errors = 0
+
+    def configure(self, max_entries=None, disk=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            self.disk = disk
+            self._entries.clear()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 or self.disk is not None
+
+    def _remember(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except (sqlite3.Error, pickle.UnpicklingError) as e:
+                self.disk_errors += 1
+                logging.warning(f"Report cache read failed: {e}")
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        with self._lock:
+            self.stores += 1
+        self._remember(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except (sqlite3.Error, pickle.PicklingError) as e:
+                self.disk_errors += 1
+                logging.warning(f"Report cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk_errors': self.disk_errors,
+            }
+        if self.disk is not None:
+            stats['disk_path'] = self.disk.path
+            try:
+                stats['disk_entries'] = len(self.disk)
+            except sqlite3.Error:
+                stats['disk_entries'] = None
+        return stats
+
+
+report_cache = ReportCache()
+
+
+# Ledger versions ----------------------------------------------------------------
+
+def ledger_version(company_id):
+    """The company's current ledger version (0 until its first tracked write)."""
+    version = db.session.execute(
+        select(LedgerVersion.version).where(LedgerVersion.company_id == company_id)
+    ).scalar()
+    return version or 0
+
+
+def _bump(connection, company_ids):
+    table = LedgerVersion.__table__
+    for company_id in sorted(company_ids):
+        result = connection.execute(
+            update(table).where(table.c.company_id == company_id).values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(company_id=company_id, version=1))
+
+
+def bump_ledger_versions(company_ids):
+    """Bumps the given companies' versions for rows written with a Core INSERT, same transaction."""
+    company_ids = {company_id for company_id in company_ids if company_id is not None}
+    if company_ids:
+        _bump(db.session.connection(), company_ids)
+        db.session.info.setdefault('bumped_ledger_versions', set()).update(company_ids)
+
+
+def _company_ids(record, attribute, changed=False):
+    """The record's company id, plus its previous one when an update moved it to another company."""
+    ids = {getattr(record, attribute)}
+    if changed:
+        ids.update(inspect(record).attrs[attribute].history.deleted)
+    return ids
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_report_changes(session, flush_context):
+    company_ids = set()
+    # A company that is new or being deleted has nothing worth serving from the cache
+    for record in session.new:
+        attribute = _VERSIONED.get(type(record))
+        if attribute and type(record) is not Company:
+            company_ids |= _company_ids(record, attribute)
+    for record in session.deleted:
+        attribute = _VERSIONED.get(type(record))
+        if attribute and type(record) is not Company:
+            company_ids |= _company_ids(record, attribute)
+    for record in session.dirty:
+        attribute = _VERSIONED.get(type(record))
+        if attribute and session.is_modified(record, include_collections=False):
+            company_ids |= _company_ids(record, attribute, changed=True)
+    company_ids.discard(None)
+    if company_ids:
+        _bump(session.connection(), company_ids)
+        session.info.setdefault('bumped_ledger_versions', set()).update(company_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _forget_bumps(session):
+    session.info.pop('bumped_ledger_versions', None)
+
+
+def cached_report(name, company_id, params, compute):
+    """
+    Returns compute() for the report, served from the cache when the same report,
+    company and params were already computed at the company's current ledger version.
+    """
+    if not report_cache.enabled:
+        return compute()
+
+    # Read the version before computing so a result is never filed under a newer version than its data
+    version = ledger_version(company_id)
+    key = repr((name, company_id, tuple(str(param) for param in params), version))
+    value = report_cache.get(key)
+    if value is not None:
+        return value
+
+    value = compute()
+    if company_id not in db.session.info.get('bumped_ledger_versions', ()):
+        report_cache.set(key, value)
+    return value
+
+
+# CLI -----------------------------------------------------------------------------
+
+@click.group('report-cache')
+def report_cache_cli():
+    """Cached report results."""
+
+
+@report_cache_cli.command('stats')
+def stats_command():
+    """Print this process's cache counters (and the shared file's size)."""
+    for name, value in report_cache.stats().items():
+        click.echo(f"{name}: {value}")
+
+
+@report_cache_cli.command('clear')
+def clear_command():
+    """Bump every company's ledger version and drop cached results (after bulk SQL maintenance)."""
+    company_ids = [company_id for (company_id,) in db.session.query(Company.id)]
+    _bump(db.session.connection(), company_ids)
+    db.session.commit()
+    report_cache.clear()
+    click.echo(f"Ledger versions bumped for {len(company_ids)} companies; report cache cleared.")
+
+
+def init_app(app):
+    # REPORT_CACHE_MAX_ENTRIES=0 turns the in-process LRU off
+    max_entries = app.config.get('REPORT_CACHE_MAX_ENTRIES',
+                                 os.environ.get('REPORT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+    path = app.config.get('REPORT_CACHE_PATH') or os.environ.get('REPORT_CACHE_PATH')
+    disk = None
+    if path:
+        disk_max = (app.config.get('REPORT_CACHE_DISK_MAX_ENTRIES')
+                    or os.environ.get('REPORT_CACHE_DISK_MAX_ENTRIES') or DEFAULT_DISK_MAX_ENTRIES)
+        disk = DiskCache(path, int(disk_max))
+    report_cache.configure(max_entries=int(max_entries), disk=disk)
+    app.cli.add_command(report_cache_cli)
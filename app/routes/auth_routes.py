@@ -3,6 +3,7 @@ from flask import Blueprint, request, redirect, url_for, render_template, flash,
 from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from app.models import User
+from app.security import PasswordHashingBusy
 
 auth_routes = Blueprint("auth_routes", __name__)
 
@@ -15,7 +16,17 @@ def login():
         password = request.form.get("password")
 
         user = db.session.query(User).filter_by(username=username).first()
-        if user and user.check_password(password):
+        try:
+            verified = bool(user and user.check_password(password))
+            # Upgrade hashes made under an older PASSWORD_HASH_METHOD while we hold the plaintext
+            if verified and user.rehash_password_if_needed(password):
+                db.session.commit()
+        except PasswordHashingBusy:
+            logging.warning("Login refused: password hashing queue is saturated")
+            flash("Sign-in is busy right now, please try again in a moment.")
+            return render_template("login.html"), 503
+
+        if verified:
             login_user(user)
             # Sends you directly onto your fixed central landing hub page
             return redirect(url_for("index"))
@@ -1,13 +1,26 @@
 import logging
+from datetime import date
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
 from app import db
-from app.models import Company, FinancialRecord
+from app.models import Company
+from app.bas import QUARTERS, bas_statement, financial_quarter, generate_bas_statements, quarter_for, quarter_label, quarter_start, statement_dict
 
 bas_routes = Blueprint('bas_routes', __name__)
 
+
+def _selected_quarter():
+    """Quarter picked with ?financial_year=2026&quarter=Q1, defaulting to the current quarter."""
+    current_year, current_quarter = financial_quarter(quarter_start(date.today()))
+    financial_year = request.args.get('financial_year', type=int) or current_year
+    quarter = request.args.get('quarter') or current_quarter
+    if quarter not in QUARTERS:
+        raise ValueError(f"Unknown quarter '{quarter}'.")
+    return financial_year, quarter, current_year
+
+
 @bas_routes.route('/bas_form', methods=['GET'])
 def bas_form():
-    """Dynamically calculates standard GST obligations across active ledger entries."""
+    """Presents the selected quarter's GST and PAYG obligations from the running BAS totals."""
     try:
         company_id = request.args.get('company_id', type=int) or session.get('company_id')
         if not company_id:
@@ -17,20 +30,48 @@ def bas_form():
         if not company:
             return redirect(url_for('company_routes.select_company'))
 
-        records = db.session.query(FinancialRecord).filter_by(company_id=company_id).all()
+        try:
+            financial_year, quarter, current_year = _selected_quarter()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        start = quarter_for(financial_year, quarter)
 
-        # Dynamic accumulation of GST paid and received values
-        gst_paid = sum(record.gst_paid or 0.0 for record in records)
-        gst_received = sum(record.gst_received or 0.0 for record in records)
-        net_bas_obligation = gst_received - gst_paid
+        # One snapshot row for the company and quarter
+        statement = bas_statement(company, start)
 
         return render_template(
             'bas_form.html',
             company=company,
-            gst_paid=gst_paid,
-            gst_received=gst_received,
-            net_bas_obligation=net_bas_obligation
+            statement=statement,
+            quarter_label=quarter_label(start),
+            financial_year=financial_year,
+            quarter=quarter,
+            financial_years=range(current_year, current_year - 4, -1),
+            gross_sales=statement.g1_total_sales,
+            gst_paid=statement.gst_on_purchases_1b,
+            gst_received=statement.gst_on_sales_1a,
+            net_bas_obligation=statement.amount_payable
         )
     except Exception as e:
         logging.error(f"BAS matrix calculation failure: {e}", exc_info=True)
         return jsonify({'error': 'BAS generation engine error.'}), 500
+
+
+@bas_routes.route('/bas/quarter_end', methods=['GET'])
+def bas_quarter_end():
+    """Generates the selected quarter's BAS figures for every client company in a single pass."""
+    try:
+        try:
+            financial_year, quarter, _ = _selected_quarter()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        start = quarter_for(financial_year, quarter)
+
+        return jsonify({
+            'quarter': start.isoformat(),
+            'quarter_label': quarter_label(start),
+            'statements': [statement_dict(statement) for statement in generate_bas_statements(start)],
+        })
+    except Exception as e:
+        logging.error(f"Quarter-end BAS batch failure: {e}", exc_info=True)
+        return jsonify({'error': 'BAS batch generation error.'}), 500
@@ -2,6 +2,7 @@ import logging
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
 from app import db
 from app.models import Company, Bill
+from app.line_items import replace_line_items
 
 bill_routes = Blueprint('bill_routes', __name__)
 
@@ -28,6 +29,7 @@ def add_bill():
                     due_date = datetime.utcnow().date()
 
                 new_bill = Bill(
+                    company_id=company_id,
                     vendor_name=vendor_name,
                     line_items=line_items,
                     total_amount=total_amount,
@@ -35,6 +37,8 @@ def add_bill():
                     payment_status='Unpaid'
                 )
                 db.session.add(new_bill)
+                db.session.flush()
+                replace_line_items('bill', new_bill)
                 db.session.commit()
                 return redirect(url_for('bill_routes.view_bills', company_id=company_id))
 
@@ -69,6 +73,7 @@ def view_bills():
                     due_date = datetime.utcnow().date()
 
                 new_bill = Bill(
+                    company_id=company_id,
                     vendor_name=vendor_name,
                     line_items=line_items,
                     total_amount=total_amount,
@@ -76,6 +81,8 @@ def view_bills():
                     payment_status='Unpaid'
                 )
                 db.session.add(new_bill)
+                db.session.flush()
+                replace_line_items('bill', new_bill)
                 db.session.commit()
                 return redirect(url_for('bill_routes.view_bills', company_id=company_id))
 
@@ -1,11 +1,37 @@
+import csv
+import io
 import logging
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
-from app.models import db, FinancialRecord, Company
+from flask import Blueprint, Response, render_template, request, jsonify, flash, redirect, url_for, stream_with_context
+from app.models import db, Company
+from app.balances import snapshot_ledger_totals
+from app.ledger import iter_ledger_lines
+from app.money import Money
+from app.report_cache import cached_report
 from datetime import datetime
-from sqlalchemy import func
 
 cash_flow_routes = Blueprint('cash_flow_routes', __name__)
 
+def compute_cash_flow(company, date_from, date_to):
+    """Inflows, outflows and net movement for the period from the monthly ledger snapshots."""
+    totals = snapshot_ledger_totals(company.id, date_from, date_to)
+    total_inflows = totals.credits
+    total_outflows = totals.debits
+    net_cash_flow = total_inflows - total_outflows
+
+    return {
+        "company_name": company.name,
+        "period": {
+            "start": str(date_from) if date_from else "Inception",
+            "end": str(date_to) if date_to else "Present"
+        },
+        "metrics": {
+            "total_inflows": float(total_inflows),
+            "total_outflows": float(total_outflows),
+            "net_cash_flow": float(net_cash_flow)
+        }
+    }
+
+
 @cash_flow_routes.route('/cash_flow_form', methods=['GET'])
 def cash_flow_form():
     """Renders the setups selection dashboard."""
@@ -31,28 +57,8 @@ def cash_flow():
         date_from = datetime.strptime(date_from_raw, '%Y-%m-%d').date() if date_from_raw else None
         date_to = datetime.strptime(date_to_raw, '%Y-%m-%d').date() if date_to_raw else None
 
-        base_query = db.session.query(FinancialRecord).filter(FinancialRecord.company_id == company.id)
-        if date_from:
-            base_query = base_query.filter(FinancialRecord.date >= date_from)
-        if date_to:
-            base_query = base_query.filter(FinancialRecord.date <= date_to)
-
-        total_inflows = base_query.with_entities(func.sum(FinancialRecord.credit)).scalar() or 0.0
-        total_outflows = base_query.with_entities(func.sum(FinancialRecord.debit)).scalar() or 0.0
-        net_cash_flow = total_inflows - total_outflows
-
-        statement = {
-            "company_name": company.name,
-            "period": {
-                "start": str(date_from) if date_from else "Inception",
-                "end": str(date_to) if date_to else "Present"
-            },
-            "metrics": {
-                "total_inflows": float(total_inflows),
-                "total_outflows": float(total_outflows),
-                "net_cash_flow": float(net_cash_flow)
-            }
-        }
+        statement = cached_report('cash_flow', company.id, (date_from, date_to),
+                                  lambda: compute_cash_flow(company, date_from, date_to))
 
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.args.get('json') == 'true':
             return jsonify(statement), 200
@@ -65,3 +71,48 @@ def cash_flow():
     except Exception as e:
         logging.error(f"Critical metrics variance in cash flow engine: {e}", exc_info=True)
         return jsonify({"error": "Internal ledger tracking error."}), 500
+
+
+def iter_cash_flow_csv(lines):
+    """CSV text, a line at a time, of each cash movement and the running cash position."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(('date', 'description', 'category', 'inflow', 'outflow', 'running_balance'))
+    for line in lines:
+        writer.writerow((line.date, line.description, line.type_of_income or line.type_of_expense or '',
+                         Money(line.credit), Money(line.debit), Money(line.balance)))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+@cash_flow_routes.route('/cash_flow/detail', methods=['GET'])
+def cash_flow_detail():
+    """Streams every inflow and outflow behind the cash flow totals as CSV, straight off a server-side cursor."""
+    try:
+        company_id = request.args.get('company_id', type=int)
+        if not company_id:
+            return jsonify({"error": "Company identification parameters missing."}), 400
+
+        company = db.session.get(Company, company_id)
+        if not company:
+            return jsonify({"error": "Company profile not found."}), 404
+
+        try:
+            date_from = datetime.strptime(request.args['date_from'], '%Y-%m-%d').date() if request.args.get('date_from') else None
+            date_to = datetime.strptime(request.args['date_to'], '%Y-%m-%d').date() if request.args.get('date_to') else None
+        except ValueError:
+            return jsonify({"error": "Invalid date format parameters. Use YYYY-MM-DD."}), 400
+
+        lines = iter_ledger_lines(company.id, date_from, date_to)
+        filename = f"cash_flow_{company.id}_{date_from or 'inception'}_{date_to or 'present'}.csv"
+        return Response(
+            stream_with_context(iter_cash_flow_csv(lines)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+        )
+    except Exception as e:
+        logging.error(f"Cash flow detail export failure: {e}", exc_info=True)
+        return jsonify({"error": "Internal ledger tracking error."}), 500
@@ -71,8 +71,7 @@ def select_company():
             session['company_id'] = company.id
             return redirect(url_for('company_routes.dashboard'))
 
-        companies = db.session.query(Company).all()
-        return render_template('select_company.html', companies=companies)
+        return render_template('select_company.html')
     except Exception as e:
         logging.error(f"Error connecting company selector records: {e}", exc_info=True)
         return jsonify({'error': 'Selection registry failed.'}), 500
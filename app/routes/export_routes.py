@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import tempfile
+import uuid
+import zipfile
+from datetime import datetime
+from flask import Blueprint, jsonify, request, session, send_file, send_from_directory, current_app
+from app import db
+from app.models import BackgroundJob, Company
+from app.exports import EXPORTS, export_xlsx, generate_invoice_files
+from app.jobs import job_handler, job_accepted_response, submit_job, wants_background_job
+
+export_routes = Blueprint('export_routes', __name__)
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _export_dir():
+    path = os.path.join(current_app.instance_path, 'exports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _max_export_workers():
+    """Upper bound on the worker processes one invoice_files export may ask for."""
+    return int(current_app.config.get('EXPORT_MAX_WORKERS') or os.environ.get('EXPORT_MAX_WORKERS')
+               or os.cpu_count() or 1)
+
+
+def _zip_invoice_files(company_id, target, invoice_ids=None, workers=1):
+    """Writes the invoice workbooks to a scratch folder and zips them into target (path or file object)."""
+    with tempfile.TemporaryDirectory() as scratch:
+        paths = generate_invoice_files(company_id, scratch, invoice_ids, workers)
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for path in paths:
+                archive.write(path, os.path.basename(path))
+    return len(paths)
+
+
+@job_handler('invoice_files')
+def invoice_files_job(job, company_id, invoice_ids=None, workers=1):
+    archive = f"invoices_{company_id}_{uuid.uuid4().hex}.zip"
+    files = _zip_invoice_files(company_id, os.path.join(_export_dir(), archive), invoice_ids, workers)
+    return {'files': files, 'archive': archive}
+
+
+@export_routes.route('/export/<name>.xlsx', methods=['GET'])
+def export_workbook(name):
+    """Streams the general ledger, invoice or bill register straight from the database into a workbook download."""
+    try:
+        if name not in EXPORTS:
+            return jsonify({'error': f"Export must be one of {', '.join(EXPORTS)}."}), 404
+
+        company_id = request.args.get('company_id', type=int) or session.get('company_id')
+        if not company_id or not db.session.get(Company, company_id):
+            return jsonify({'error': 'Company identification parameters missing.'}), 400
+
+        try:
+            date_from = datetime.strptime(request.args['date_from'], "%Y-%m-%d").date() if request.args.get('date_from') else None
+            date_to = datetime.strptime(request.args['date_to'], "%Y-%m-%d").date() if request.args.get('date_to') else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format parameters. Use YYYY-MM-DD.'}), 400
+
+        # Spooled in memory until it grows large, then on disk
+        spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        export_xlsx(name, company_id, spool, date_from, date_to)
+        spool.seek(0)
+        return send_file(spool, as_attachment=True, download_name=f"{name}_{company_id}.xlsx", mimetype=XLSX_MIMETYPE)
+    except Exception as e:
+        logging.error(f"Workbook export failure: {e}", exc_info=True)
+        return jsonify({'error': 'Export failed to compile.'}), 500
+
+
+@export_routes.route('/export/invoice_files', methods=['POST'])
+def export_invoice_files():
+    """Batch invoicing: one workbook per invoice, written in parallel and returned as a zip archive."""
+    try:
+        payload = request.get_json(silent=True) or request.form
+        company_id = request.args.get('company_id', type=int) or payload.get('company_id') or session.get('company_id')
+        if not company_id or not db.session.get(Company, int(company_id)):
+            return jsonify({'error': 'Company identification parameters missing.'}), 400
+        company_id = int(company_id)
+
+        # Optional subset: {"invoice_ids": [1, 2, 3]} or repeated invoice_id form fields
+        invoice_ids = payload.get('invoice_ids') if request.is_json else request.form.getlist('invoice_id') or None
+        try:
+            invoice_ids = [int(i) for i in invoice_ids] if invoice_ids else None
+            workers = max(int(payload.get('workers') or 1), 1)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'invoice_ids and workers must be integers.'}), 400
+        max_workers = _max_export_workers()
+        if workers > max_workers:
+            return jsonify({'error': f'workers must be at most {max_workers}.'}), 400
+
+        if wants_background_job():
+            return job_accepted_response(submit_job(
+                'invoice_files', company_id=company_id, invoice_ids=invoice_ids, workers=workers
+            ))
+
+        spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        files = _zip_invoice_files(company_id, spool, invoice_ids, workers)
+        spool.seek(0)
+        response = send_file(spool, as_attachment=True, download_name=f"invoices_{company_id}.zip", mimetype='application/zip')
+        response.headers['X-Invoice-Files'] = str(files)
+        return response
+    except Exception as e:
+        logging.error(f"Invoice file generation failure: {e}", exc_info=True)
+        return jsonify({'error': 'Invoice file generation failed.'}), 500
+
+
+@export_routes.route('/export/archives/<int:job_id>', methods=['GET'])
+def download_archive(job_id):
+    """Serves the zip produced by a completed invoice_files job of the active client."""
+    company_id = request.args.get('company_id', type=int) or session.get('company_id')
+    job = db.session.get(BackgroundJob, job_id)
+    if (not job or job.kind != 'invoice_files' or job.status != 'Completed'
+            or not company_id or job.company_id != company_id):
+        return jsonify({'error': 'Archive not found.'}), 404
+    archive = json.loads(job.result)['archive']
+    return send_from_directory(_export_dir(), archive, as_attachment=True, mimetype='application/zip')
@@ -2,10 +2,84 @@ import logging
 from flask import Blueprint, jsonify, request, render_template, redirect, url_for
 from datetime import datetime
 from app import db
-from app.models import FinancialRecord, AssetLiability, Equity, Company
+from app.models import Company
+from app.aggregation import profit_loss_sections, asset_liability_totals, income_tax
+from app.balances import snapshot_category_totals
+from app.report_cache import cached_report
+from app.jobs import job_handler, submit_job, wants_background_job, job_accepted_response
 
 financial_routes = Blueprint('financial_routes', __name__)
 
+
+def compute_profit_loss(company_id, date_from, date_to, frame=None):
+    """
+    Builds the profit and loss statement context from one grouped pass over the period,
+    read from the ledger snapshots or, when given, an already loaded LedgerFrame.
+    """
+    company = db.session.get(Company, company_id)
+
+    if frame is not None:
+        category_totals = frame.where(date_from, date_to).group_by_type()
+    else:
+        category_totals = snapshot_category_totals(company.id, date_from, date_to)
+    income_lines, cogs_lines, expense_lines = profit_loss_sections(category_totals)
+    total_income = sum(amount for _, amount in income_lines)
+    total_cogs = sum(amount for _, amount in cogs_lines)
+    total_expenses = sum(amount for _, amount in expense_lines)
+
+    gross_profit = total_income - total_cogs
+    operating_profit = gross_profit - total_expenses
+    tax = income_tax(operating_profit)
+    net_profit_after_tax = operating_profit - tax
+
+    return dict(
+        company_details={"name": company.name, "abn": company.abn_number, "address": company.address, "period": {"from": str(date_from), "to": str(date_to)}},
+        income_records=[{"description": d, "amount": amount} for d, amount in income_lines],
+        total_income=total_income,
+        cogs_records=[{"description": d, "amount": amount} for d, amount in cogs_lines],
+        total_cogs=total_cogs,
+        expense_records=[{"description": d, "amount": amount} for d, amount in expense_lines],
+        total_expenses=total_expenses,
+        gross_profit=gross_profit,
+        operating_profit=operating_profit,
+        tax=tax,
+        net_profit_after_tax=net_profit_after_tax
+    )
+
+
+def compute_balance_sheet(company_id):
+    """Builds the statement of financial position context from grouped subcategory totals."""
+    company = db.session.get(Company, company_id)
+
+    assets, liabilities = asset_liability_totals(company.id)
+    total_assets = sum((amount or 0.0) for _, amount in assets)
+    total_liabilities = sum((amount or 0.0) for _, amount in liabilities)
+    equity = total_assets - total_liabilities
+
+    return dict(
+        company_details={"name": company.name, "abn": company.abn_number, "address": company.address},
+        assets=[{"subcategory": sub, "amount": amount} for sub, amount in assets],
+        total_assets=float(total_assets),
+        liabilities=[{"subcategory": sub, "amount": amount} for sub, amount in liabilities],
+        total_liabilities=float(total_liabilities),
+        equity=float(equity)
+    )
+
+
+@job_handler('profit_loss')
+def profit_loss_job(job, company_id, date_from, date_to):
+    return compute_profit_loss(
+        company_id,
+        datetime.strptime(date_from, "%Y-%m-%d").date(),
+        datetime.strptime(date_to, "%Y-%m-%d").date(),
+    )
+
+
+@job_handler('balance_sheet')
+def balance_sheet_job(job, company_id):
+    return compute_balance_sheet(company_id)
+
+
 @financial_routes.route('/profit_loss', methods=['GET'])
 def profit_loss():
     """Generates detailed financial performance summaries."""
@@ -27,50 +101,14 @@ def profit_loss():
         except ValueError:
             return jsonify({'error': 'Invalid date format parameters. Use YYYY-MM-DD.'}), 400
 
-        income_records = db.session.query(FinancialRecord).filter(
-            FinancialRecord.company_id == company.id,
-            FinancialRecord.date >= date_from,
-            FinancialRecord.date <= date_to,
-            FinancialRecord.type_of_income.isnot(None)
-        ).all()
-        total_income = sum((r.credit or 0.0) for r in income_records)
-
-        cogs_records = db.session.query(FinancialRecord).filter(
-            FinancialRecord.company_id == company.id,
-            FinancialRecord.date >= date_from,
-            FinancialRecord.date <= date_to,
-            FinancialRecord.type_of_expense == "COGS"
-        ).all()
-        total_cogs = sum((r.debit or 0.0) for r in cogs_records)
-
-        expense_records = db.session.query(FinancialRecord).filter(
-            FinancialRecord.company_id == company.id,
-            FinancialRecord.date >= date_from,
-            FinancialRecord.date <= date_to,
-            FinancialRecord.type_of_expense.isnot(None),
-            FinancialRecord.type_of_expense != "COGS"
-        ).all()
-        total_expenses = sum((r.debit or 0.0) for r in expense_records)
-
-        gross_profit = total_income - total_cogs
-        operating_profit = gross_profit - total_expenses
-        tax = max(0.0, operating_profit * 0.1)
-        net_profit_after_tax = operating_profit - tax
-
-        return render_template(
-            'profit_loss.html',
-            company_details={"name": company.name, "abn": company.abn_number, "address": company.address, "period": {"from": str(date_from), "to": str(date_to)}},
-            income_records=[{"description": r.description, "amount": r.credit} for r in income_records],
-            total_income=total_income,
-            cogs_records=[{"description": r.description, "amount": r.debit} for r in cogs_records],
-            total_cogs=total_cogs,
-            expense_records=[{"description": r.description, "amount": r.debit} for r in expense_records],
-            total_expenses=total_expenses,
-            gross_profit=gross_profit,
-            operating_profit=operating_profit,
-            tax=tax,
-            net_profit_after_tax=net_profit_after_tax
-        )
+        if wants_background_job():
+            return job_accepted_response(submit_job(
+                'profit_loss', company_id=company.id, date_from=str(date_from), date_to=str(date_to)
+            ))
+
+        report = cached_report('profit_loss', company.id, (date_from, date_to),
+                               lambda: compute_profit_loss(company.id, date_from, date_to))
+        return render_template('profit_loss.html', **report)
     except Exception as e:
         logging.error(f"Error rendering financial position records: {e}", exc_info=True)
         return jsonify({'error': 'Failed to resolve ledger margins calculations.'}), 500
@@ -88,22 +126,11 @@ def balance_sheet():
         if not company:
             return jsonify({'error': 'Corporate file context target unallocated.'}), 404
 
-        assets = db.session.query(AssetLiability).filter_by(company_id=company.id, category="Asset").all()
-        total_assets = sum((a.amount or 0.0) for a in assets)
-
-        liabilities = db.session.query(AssetLiability).filter_by(company_id=company.id, category="Liability").all()
-        total_liabilities = sum((l.amount or 0.0) for l in liabilities)
-        equity = total_assets - total_liabilities
-
-        return render_template(
-            'balance_sheet.html',
-            company_details={"name": company.name, "abn": company.abn_number, "address": company.address},
-            assets=[{"subcategory": a.subcategory, "amount": a.amount} for a in assets],
-            total_assets=float(total_assets),
-            liabilities=[{"subcategory": l.subcategory, "amount": l.amount} for l in liabilities],
-            total_liabilities=float(total_liabilities),
-            equity=float(equity)
-        )
+        if wants_background_job():
+            return job_accepted_response(submit_job('balance_sheet', company_id=company.id))
+
+        report = cached_report('balance_sheet', company.id, (), lambda: compute_balance_sheet(company.id))
+        return render_template('balance_sheet.html', **report)
     except Exception as e:
         logging.error(f"Error compiling statement sheet layout: {e}", exc_info=True)
         return jsonify({'error': 'Solvency processing failure.'}), 500
@@ -2,6 +2,7 @@ import logging
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
 from app import db
 from app.models import Company, Invoice
+from app.line_items import replace_line_items
 
 invoice_routes = Blueprint('invoice_routes', __name__)
 
@@ -40,6 +41,7 @@ def view_invoices():
                     due_date = datetime.utcnow().date()
 
                 new_invoice = Invoice(
+                    company_id=company_id,
                     client_name=client_name,
                     line_items=line_items,
                     total_amount=total_amount,
@@ -47,6 +49,8 @@ def view_invoices():
                     payment_status='Pending'
                 )
                 db.session.add(new_invoice)
+                db.session.flush()
+                replace_line_items('invoice', new_invoice)
                 db.session.commit()
                 return redirect(url_for('invoice_routes.view_invoices', company_id=company_id))
 
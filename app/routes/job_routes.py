@@ -0,0 +1,53 @@
+import json
+import logging
+from flask import Blueprint, request, jsonify, session
+from app import db
+from app.models import BackgroundJob
+from app.jobs import job_status
+
+job_routes = Blueprint('job_routes', __name__)
+
+def _active_company_id():
+    return request.args.get('company_id', type=int) or session.get('company_id')
+
+def _company_job(job_id):
+    """The job if it belongs to the active client, else None (so other clients' jobs read as missing)."""
+    company_id = _active_company_id()
+    job = db.session.get(BackgroundJob, job_id)
+    if not job or not company_id or job.company_id != company_id:
+        return None
+    return job
+
+@job_routes.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Lists the most recent background jobs queued for the active client."""
+    try:
+        company_id = _active_company_id()
+        if not company_id:
+            return jsonify({'error': 'Company identification parameters missing.'}), 400
+        jobs = (db.session.query(BackgroundJob).filter(BackgroundJob.company_id == company_id)
+                .order_by(BackgroundJob.id.desc()).limit(50).all())
+        return jsonify([job_status(job) for job in jobs]), 200
+    except Exception as e:
+        logging.error(f"Background job listing failure: {e}", exc_info=True)
+        return jsonify({'error': 'Job registry failed to load.'}), 500
+
+@job_routes.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Reports the status and progress counters of a single background job."""
+    job = _company_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found.'}), 404
+    return jsonify(job_status(job)), 200
+
+@job_routes.route('/jobs/<int:job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Returns the stored result payload once a background job has completed."""
+    job = _company_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found.'}), 404
+    if job.status == 'Failed':
+        return jsonify({'error': job.error or 'Job failed.', 'status': job.status}), 500
+    if job.status != 'Completed':
+        return jsonify(job_status(job)), 409
+    return jsonify(json.loads(job.result) if job.result else None), 200
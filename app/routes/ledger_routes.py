@@ -1,10 +1,41 @@
 import logging
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
+from datetime import datetime
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, stream_template
 from app import db
-from app.models import Company, FinancialRecord
+from app.models import Company
+from app.ledger import ledger_page, iter_ledger_lines
 
 ledger_routes = Blueprint('ledger_routes', __name__)
 
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(record):
+    return f"{record.date.isoformat()}_{record.id}"
+
+
+def decode_cursor(cursor):
+    """Splits a 'YYYY-MM-DD_id' keyset cursor into (date, id)."""
+    date_raw, id_raw = cursor.split('_', 1)
+    return datetime.strptime(date_raw, '%Y-%m-%d').date(), int(id_raw)
+
+
+def record_to_dict(record):
+    """JSON view of a LedgerLine, including its running balance."""
+    return {
+        'id': record.id,
+        'date': record.date.isoformat(),
+        'description': record.description,
+        'type_of_expense': record.type_of_expense,
+        'type_of_income': record.type_of_income,
+        'debit': record.debit,
+        'credit': record.credit,
+        'balance': record.balance,
+    }
+
+
 @ledger_routes.route('/general_ledger_form', methods=['GET'])
 def general_ledger_form():
     """Dynamically compiles chronological transaction arrays strictly for the active client."""
@@ -17,10 +48,44 @@ def general_ledger_form():
         if not company:
             return redirect(url_for('company_routes.select_company'))
 
-        # Fetch every debit and credit line isolated to this specific client account
-        records = db.session.query(FinancialRecord).filter_by(company_id=company_id).order_by(FinancialRecord.date.asc()).all()
+        try:
+            date_from_raw = request.args.get('date_from')
+            date_to_raw = request.args.get('date_to')
+            date_from = datetime.strptime(date_from_raw, '%Y-%m-%d').date() if date_from_raw else None
+            date_to = datetime.strptime(date_to_raw, '%Y-%m-%d').date() if date_to_raw else None
+            cursor = request.args.get('after')
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date or cursor parameters. Use YYYY-MM-DD.'}), 400
+
+        filters = {'company_id': company_id, 'date_from': date_from_raw, 'date_to': date_to_raw}
+
+        # Streamed mode renders the whole range, flushing rows to the browser as the cursor advances
+        if request.args.get('stream') in ('1', 'true'):
+            records = iter_ledger_lines(company_id, date_from, date_to, batch_size=STREAM_BATCH_SIZE)
+            return stream_template('general_ledger.html', company=company, records=records, **filters)
+
+        # Fetch one extra row to learn whether another page exists
+        limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        records = ledger_page(company_id, date_from, date_to, after, limit + 1)
+        next_cursor = encode_cursor(records[limit - 1]) if len(records) > limit else None
+        records = records[:limit]
+
+        if request.args.get('format') == 'json':
+            return jsonify({
+                'company_id': company_id,
+                'records': [record_to_dict(r) for r in records],
+                'next_cursor': next_cursor,
+                'next_url': url_for('ledger_routes.general_ledger_form', after=next_cursor, limit=limit, format='json', **filters) if next_cursor else None,
+            }), 200
 
-        return render_template('general_ledger.html', company=company, records=records)
+        return render_template(
+            'general_ledger.html',
+            company=company,
+            records=records,
+            next_url=url_for('ledger_routes.general_ledger_form', after=next_cursor, limit=limit, **filters) if next_cursor else None,
+            **filters
+        )
     except Exception as e:
         logging.error(f"General Ledger compilation failure: {e}", exc_info=True)
         return jsonify({'error': 'Ledger system failed to initialize.'}), 500
@@ -1,7 +1,11 @@
 import logging
+from datetime import datetime
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
 from app import db
 from app.models import Company, Employee, PayrollRun
+from app.jobs import job_handler, submit_job, wants_background_job, job_accepted_response
+from app.payroll_engine import PayRunError, STP_PENDING, pay_rates, run_pay_cycle
+from app.tax_tables import PAY_FREQUENCIES, pay_frequency_for, scale_for
 
 payroll_routes = Blueprint('payroll_routes', __name__)
 
@@ -22,26 +26,38 @@ def payroll_dashboard():
         if request.method == 'POST':
             # Run payroll row execution calculations
             employee_id = request.form.get('employee_id', type=int)
-            start_date = request.form.get('pay_period_start')
-            end_date = request.form.get('pay_period_end')
+            start_date = request.form.get('pay_period_start') or request.form.get('period_start')
+            end_date = request.form.get('pay_period_end') or request.form.get('period_end')
             gross_wages = request.form.get('gross_wages', type=float, default=0.0)
 
             if not employee_id or not start_date or not end_date:
                 return jsonify({'error': 'Missing mandatory calculation values.'}), 400
 
-            super_guarantee = round(gross_wages * 0.12, 2)
-            payg_withholding = round(gross_wages * 0.15, 2)
-            net_pay = round(gross_wages - payg_withholding, 2)
+            # Scoped to the active company, so another tenant's employee is not found
+            employee = db.session.get(Employee, employee_id)
+            if not employee:
+                return jsonify({'error': 'Unknown employee for this company.'}), 400
+
+            # An unparseable period falls back to today's table and fortnightly pay
+            try:
+                rates = pay_rates(end_date)
+            except ValueError:
+                rates = pay_rates()
+            line = rates.pay_line(
+                employee_id, gross_wages,
+                scale_for(employee.tfn_declaration_status), pay_frequency_for(start_date, end_date)
+            )
 
             new_run = PayrollRun(
+                company_id=company_id,
                 employee_id=employee_id,
                 pay_period_start=start_date,
                 pay_period_end=end_date,
-                gross_wages=gross_wages,
-                payg_withholding=payg_withholding,
-                super_guarantee=super_guarantee,
-                net_pay=net_pay,
-                stp_status="Pending Submission"
+                gross_wages=line.gross_wages,
+                payg_withholding=line.payg_withholding,
+                super_guarantee=line.super_guarantee,
+                net_pay=line.net_pay,
+                stp_status=STP_PENDING
             )
             db.session.add(new_run)
             db.session.commit()
@@ -61,11 +77,64 @@ def payroll_dashboard():
         return jsonify({'error': 'Initialization failed.'}), 500
 
 
+@job_handler('pay_run')
+def pay_run_job(job, company_id, pay_period_start, pay_period_end, wages=None, pay_frequency=None):
+    return run_pay_cycle(company_id, pay_period_start, pay_period_end, wages, pay_frequency)
+
+
+@payroll_routes.route('/payroll/batch-run', methods=['POST'])
+def batch_pay_run():
+    """Runs one pay period for every employee of the company in a single pass and returns the totals."""
+    try:
+        payload = request.get_json(silent=True) or request.form
+        company_id = request.args.get('company_id', type=int) or payload.get('company_id') or session.get('company_id')
+        if not company_id or not db.session.get(Company, int(company_id)):
+            return jsonify({'error': 'Company identification parameters missing.'}), 400
+        company_id = int(company_id)
+
+        start_date = payload.get('pay_period_start')
+        end_date = payload.get('pay_period_end')
+        try:
+            if datetime.strptime(end_date, "%Y-%m-%d") < datetime.strptime(start_date, "%Y-%m-%d"):
+                return jsonify({'error': 'Pay period ends before it starts.'}), 400
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid pay period. Use YYYY-MM-DD.'}), 400
+
+        # Optional per-employee gross for this period: {"wages": {"<employee_id>": 1234.56}}
+        wages = payload.get('wages') if request.is_json else None
+        if wages is not None and not isinstance(wages, dict):
+            return jsonify({'error': 'wages must map employee ids to gross amounts.'}), 400
+
+        # weekly / fortnightly / monthly; inferred from the period's length when omitted
+        pay_frequency = payload.get('pay_frequency') or None
+        if pay_frequency and pay_frequency not in PAY_FREQUENCIES:
+            return jsonify({'error': f"pay_frequency must be one of {', '.join(PAY_FREQUENCIES)}."}), 400
+
+        if wants_background_job():
+            return job_accepted_response(submit_job(
+                'pay_run', company_id=company_id,
+                pay_period_start=start_date, pay_period_end=end_date, wages=wages, pay_frequency=pay_frequency
+            ))
+
+        try:
+            summary = run_pay_cycle(company_id, start_date, end_date, wages, pay_frequency)
+        except PayRunError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        return jsonify(summary), 201
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Batch pay run error: {e}", exc_info=True)
+        return jsonify({'error': 'Pay run failed.'}), 500
+
+
 @payroll_routes.route('/add_employee', methods=['GET', 'POST'])
 def add_employee():
     """⚠️ NEW SEPARATE LINK PATH: Adds fresh staff profiles into the firm database."""
     try:
         company_id = request.args.get('company_id', type=int) or session.get('company_id')
+        if not company_id:
+            return redirect(url_for('company_routes.select_company'))
         company = db.session.get(Company, company_id)
 
         if request.method == 'POST':
@@ -73,13 +142,16 @@ def add_employee():
             tfn = request.form.get('tfn')
             emp_type = request.form.get('employment_type', 'Full-Time')
             tfn_status = request.form.get('tfn_declaration_status', 'Submitted')
+            standard_gross_wages = request.form.get('standard_gross_wages', type=float, default=0.0)
 
             if name:
                 new_staff = Employee(
+                    company_id=company_id,
                     name=name,
                     tfn=tfn,
                     employment_type=emp_type,
-                    tfn_declaration_status=tfn_status
+                    tfn_declaration_status=tfn_status,
+                    standard_gross_wages=standard_gross_wages
                 )
                 db.session.add(new_staff)
                 db.session.commit()
@@ -2,6 +2,7 @@ import logging
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
 from app import db
 from app.models import Company, PurchaseOrder
+from app.line_items import replace_line_items
 
 purchase_order_routes = Blueprint('purchase_order_routes', __name__)
 
@@ -22,6 +23,7 @@ def add_purchase_order():
 
             if supplier_name and total_amount:
                 new_po = PurchaseOrder(
+                    company_id=company_id,
                     supplier_name=supplier_name,
                     line_items=line_items,
                     total_amount=total_amount,
@@ -29,6 +31,8 @@ def add_purchase_order():
                     payment_status='Pending'
                 )
                 db.session.add(new_po)
+                db.session.flush()
+                replace_line_items('purchase_order', new_po)
                 db.session.commit()
                 return redirect(url_for('purchase_order_routes.view_purchase_orders', company_id=company_id))
 
@@ -42,6 +46,8 @@ def view_purchase_orders():
     """Fetches procurement files logged in system memory maps."""
     try:
         company_id = request.args.get('company_id', type=int) or session.get('company_id')
+        if not company_id:
+            return redirect(url_for('company_routes.select_company'))
         company = db.session.get(Company, company_id)
         purchase_orders = db.session.query(PurchaseOrder).all()
         return render_template('view_purchase_orders.html', company=company, purchase_orders=purchase_orders)
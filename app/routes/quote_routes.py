@@ -2,6 +2,7 @@ import logging
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
 from app import db
 from app.models import Company, Quote
+from app.line_items import replace_line_items
 
 quote_routes = Blueprint('quote_routes', __name__)
 
@@ -28,12 +29,15 @@ def add_quote():
                     validity_period = datetime.utcnow().date()
 
                 new_quote = Quote(
+                    company_id=company_id,
                     customer_name=customer_name,
                     line_items=line_items,
                     total_amount=total_amount,
                     validity_period=validity_period
                 )
                 db.session.add(new_quote)
+                db.session.flush()
+                replace_line_items('quote', new_quote)
                 db.session.commit()
                 return redirect(url_for('quote_routes.view_quotes', company_id=company_id))
 
@@ -47,6 +51,8 @@ def view_quotes():
     """Fetches every cost estimate log registered inside database."""
     try:
         company_id = request.args.get('company_id', type=int) or session.get('company_id')
+        if not company_id:
+            return redirect(url_for('company_routes.select_company'))
         company = db.session.get(Company, company_id)
         quotes = db.session.query(Quote).all()
         return render_template('view_quotes.html', company=company, quotes=quotes)
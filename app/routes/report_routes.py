@@ -1,5 +1,10 @@
 import logging
-from flask import Blueprint, render_template, jsonify
+import tempfile
+from datetime import datetime
+from flask import Blueprint, Response, render_template, jsonify, request, redirect, url_for, session, send_file, stream_with_context
+from app.line_items import DOCUMENT_MODELS, line_item_totals
+from app.portfolio import EXPORT_FORMATS, iter_portfolio_csv, portfolio_rows, write_portfolio_xlsx
+from app.report_cache import report_cache
 
 report_routes = Blueprint('report_routes', __name__)
 
@@ -45,3 +50,83 @@ def profit_loss_report():
     except Exception as e:
         logging.error(f"Error parsing sample demonstration layout: {e}", exc_info=True)
         return jsonify({'error': 'Sandbox compilation failure.'}), 500
+
+
+@report_routes.route('/report/line_items', methods=['GET'])
+def line_item_report():
+    """Item-level totals (quantity, amount, GST) across one company's invoices, bills, quotes or POs."""
+    try:
+        company_id = request.args.get('company_id', type=int) or session.get('company_id')
+        if not company_id:
+            return redirect(url_for('company_routes.select_company'))
+
+        document_type = request.args.get('document_type', 'invoice')
+        if document_type not in DOCUMENT_MODELS:
+            return jsonify({'error': f"document_type must be one of {', '.join(DOCUMENT_MODELS)}."}), 400
+
+        rows = line_item_totals(company_id, document_type, request.args.get('gst_code'))
+        return jsonify({
+            'company_id': company_id,
+            'document_type': document_type,
+            'items': [
+                {
+                    'description': description,
+                    'gst_code': gst_code,
+                    'lines': lines,
+                    'quantity': float(quantity or 0),
+                    'amount': (amount_cents or 0) / 100,
+                    'gst': (gst_cents or 0) / 100,
+                }
+                for description, gst_code, lines, quantity, amount_cents, gst_cents in rows
+            ],
+        }), 200
+    except Exception as e:
+        logging.error(f"Line item report failure: {e}", exc_info=True)
+        return jsonify({'error': 'Line item report failed to compile.'}), 500
+
+
+@report_routes.route('/report/portfolio', methods=['GET'])
+def portfolio_report():
+    """Month-end trial balance and P&L for every client company, computed in one grouped pass."""
+    try:
+        try:
+            date_from = datetime.strptime(request.args['date_from'], "%Y-%m-%d").date() if request.args.get('date_from') else None
+            date_to = datetime.strptime(request.args['date_to'], "%Y-%m-%d").date() if request.args.get('date_to') else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format parameters. Use YYYY-MM-DD.'}), 400
+
+        export_format = request.args.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS + ('json',):
+            return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS + ('json',))}."}), 400
+
+        rows = portfolio_rows(date_from, date_to)
+        filename = f"portfolio_{date_from or 'start'}_{date_to or 'today'}"
+
+        if export_format == 'json':
+            return jsonify({'date_from': date_from and str(date_from), 'date_to': date_to and str(date_to),
+                            'companies': [row._asdict() for row in rows]}), 200
+
+        if export_format == 'xlsx':
+            # Spooled in memory until it grows large, then on disk
+            spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+            write_portfolio_xlsx(rows, spool)
+            spool.seek(0)
+            return send_file(
+                spool, as_attachment=True, download_name=f"{filename}.xlsx",
+                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+
+        return Response(
+            stream_with_context(iter_portfolio_csv(rows)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename="{filename}.csv"'},
+        )
+    except Exception as e:
+        logging.error(f"Portfolio report failure: {e}", exc_info=True)
+        return jsonify({'error': 'Portfolio report failed to compile.'}), 500
+
+
+@report_routes.route('/report/cache', methods=['GET'])
+def report_cache_stats():
+    """Hit, miss and eviction counters of this process's report result cache."""
+    return jsonify(report_cache.stats()), 200
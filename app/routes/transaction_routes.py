@@ -1,7 +1,10 @@
 import logging
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
 from app import db
-from app.models import Company, FinancialRecord
+from app.models import Company, FinancialRecord, LedgerImport
+from app.balances import snapshot_ledger_totals
+from app.ingest import open_csv_stream, ingest_ledger_csv, import_report
+from app.jobs import job_handler, submit_job, wants_background_job, job_accepted_response, spool_upload, discard_spool
 
 transaction_routes = Blueprint('transaction_routes', __name__)
 
@@ -53,9 +56,9 @@ def add_transaction():
 
 @transaction_routes.route('/add-transaction-bulk', methods=['GET', 'POST'])
 def add_transaction_bulk():
-    """ISSUE 2: Ingests a raw streaming CSV block of rows straight into ledger tables."""
+    """ISSUE 2: Streams an uploaded CSV ledger file into the ledger in checkpointed chunks."""
     try:
-        company_id = request.args.get('company_id', type=int) or session.get('company_id')
+        company_id = request.args.get('company_id', type=int) or request.form.get('company_id', type=int) or session.get('company_id')
         if not company_id:
             return redirect(url_for('company_routes.select_company'))
 
@@ -64,41 +67,43 @@ def add_transaction_bulk():
             return redirect(url_for('company_routes.select_company'))
 
         if request.method == 'POST':
-            csv_data = request.form.get('csv_data')
-            if csv_data:
-                from datetime import datetime
-                lines = csv_data.strip().split('\n')
-                
-                # Skip header row if present
-                start_index = 1 if "Date" in lines[0] else 0
-                
-                for line in lines[start_index:]:
-                    parts = line.split(',')
-                    if len(parts) >= 4:
-                        try:
-                            date_val = datetime.strptime(parts[0].strip(), '%d-%m-%Y').date()
-                        except Exception:
-                            date_val = datetime.utcnow().date()
-                            
-                        desc = parts[1].strip()
-                        deb = float(parts[2].strip() or 0.0)
-                        cred = float(parts[3].strip() or 0.0)
-                        exp_t = parts[4].strip() if len(parts) > 4 else None
-                        inc_t = parts[5].strip() if len(parts) > 5 else None
-
-                        record = FinancialRecord(
-                            date=date_val,
-                            description=desc,
-                            debit=deb,
-                            credit=cred,
-                            type_of_expense=exp_t if deb > 0 else None,
-                            type_of_income=inc_t if cred > 0 else None,
-                            company_id=company_id
-                        )
-                        db.session.add(record)
-                
-                db.session.commit()
-                return redirect(url_for('index'))
+            csv_file = request.files.get('csv_file')
+            if wants_background_job():
+                path = spool_upload(csv_file, request.form.get('csv_data'))
+                if path is None:
+                    return jsonify({'error': 'Choose a CSV file or paste CSV rows to import.'}), 400
+                job = submit_job(
+                    'ledger_import',
+                    company_id=company_id,
+                    path=path,
+                    filename=csv_file.filename if csv_file and csv_file.filename else None,
+                    resume_import_id=request.form.get('resume_import_id', type=int),
+                )
+                return job_accepted_response(job)
+
+            stream = open_csv_stream(csv_file, request.form.get('csv_data'))
+            if stream is None:
+                return render_template('bulk_transaction_form.html', company=company,
+                                       error='Choose a CSV file or paste CSV rows to import.'), 400
+
+            resume_import = None
+            resume_id = request.form.get('resume_import_id', type=int)
+            if resume_id:
+                resume_import = db.session.get(LedgerImport, resume_id)
+                if not resume_import or resume_import.company_id != company_id:
+                    return jsonify({'error': 'Import checkpoint not found for this company.'}), 404
+
+            ledger_import = ingest_ledger_csv(
+                stream,
+                company_id,
+                filename=csv_file.filename if csv_file and csv_file.filename else None,
+                resume_import=resume_import,
+            )
+            report = import_report(ledger_import)
+
+            if request.accept_mimetypes.best == 'application/json':
+                return jsonify(report), 200
+            return render_template('bulk_transaction_form.html', company=company, import_report=report)
 
         return render_template('bulk_transaction_form.html', company=company)
     except Exception as e:
@@ -106,6 +111,42 @@ def add_transaction_bulk():
         return jsonify({'error': 'Batch migration failed.'}), 500
 
 
+def compute_trial_balance(company_id):
+    """Totals every debit and credit line posted for the company from period snapshots."""
+    totals = snapshot_ledger_totals(company_id)
+
+    return {
+        'total_debits': totals.debits,
+        'total_credits': totals.credits,
+        # Exact: both totals are integer-cent sums computed in SQL
+        'is_balanced': totals.debits == totals.credits,
+    }
+
+
+@job_handler('trial_balance')
+def trial_balance_job(job, company_id):
+    return compute_trial_balance(company_id)
+
+
+@job_handler('ledger_import')
+def ledger_import_job(job, company_id, path, filename=None, resume_import_id=None):
+    """Runs a spooled CSV upload through the ingest engine, reporting rows read as progress."""
+    resume_import = db.session.get(LedgerImport, resume_import_id) if resume_import_id else None
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as stream:
+            ledger_import = ingest_ledger_csv(
+                stream,
+                company_id,
+                filename=filename,
+                resume_import=resume_import,
+                on_progress=lambda li: job.report_progress(li.rows_read),
+            )
+    finally:
+        # A failed import is resumed from a fresh upload, never from this spool file
+        discard_spool(job.app, path)
+    return import_report(ledger_import)
+
+
 @transaction_routes.route('/trial-balance', methods=['GET'])
 def trial_balance():
     """Audits balanced totals rows across active client account pools dynamically."""
@@ -118,18 +159,10 @@ def trial_balance():
         if not company:
             return redirect(url_for('company_routes.select_company'))
 
-        records = db.session.query(FinancialRecord).filter_by(company_id=company_id).all()
-
-        total_debits = sum(record.debit or 0.0 for record in records)
-        total_credits = sum(record.credit or 0.0 for record in records)
+        if wants_background_job():
+            return job_accepted_response(submit_job('trial_balance', company_id=company_id))
 
-        return render_template(
-            'trial_balance.html',
-            company=company,
-            total_debits=total_debits,
-            total_credits=total_credits,
-            is_balanced=(round(total_debits, 2) == round(total_credits, 2))
-        )
+        return render_template('trial_balance.html', company=company, **compute_trial_balance(company_id))
     except Exception as e:
         logging.error(f"Trial Balance engine error: {e}", exc_info=True)
         return jsonify({'error': 'Trial balance calculation failed.'}), 500
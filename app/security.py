@@ -0,0 +1,91 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Password hashing policy. PASSWORD_HASH_METHOD takes any Werkzeug method string
+# ("scrypt", "scrypt:16384:8:1", "pbkdf2:sha256:600000", ...); stored hashes made
+# under an older policy are upgraded the next time their owner signs in.
+#
+# Hashing is deliberately slow, so it runs on a small dedicated pool
+# (PASSWORD_HASH_WORKERS threads, defaulting to half the cores). Each caller
+# blocks its waitress thread until its hash is done, so at most
+# PASSWORD_HASH_MAX_CALLERS requests may be hashing or waiting at once: half of
+# WAITRESS_THREADS by default, and always fewer than all of them, so a login
+# storm cannot take every thread from the rest of the app. Requests that find no
+# slot within PASSWORD_HASH_QUEUE_TIMEOUT seconds are refused with
+# PasswordHashingBusy.
+
+DEFAULT_HASH_METHOD = 'scrypt:32768:8:1'
+DEFAULT_SERVER_THREADS = 4  # waitress's own default for `threads`
+DEFAULT_QUEUE_TIMEOUT = 0.5
+
+
+class PasswordHashingBusy(RuntimeError):
+    """Raised when every admission slot stays taken for longer than the configured timeout."""
+
+
+def hash_method():
+    if has_app_context() and current_app.config.get('PASSWORD_HASH_METHOD'):
+        return current_app.config['PASSWORD_HASH_METHOD']
+    return os.environ.get('PASSWORD_HASH_METHOD') or DEFAULT_HASH_METHOD
+
+
+@lru_cache(maxsize=8)
+def _canonical_prefix(method):
+    """Werkzeug fills in defaults ("scrypt" -> "scrypt:32768:8:1"); read them back from a sample hash."""
+    return generate_password_hash('policy-probe', method=method).split('$', 1)[0]
+
+
+def needs_rehash(password_hash):
+    """True if the stored hash was made with a different algorithm or cost than the current policy."""
+    return password_hash.split('$', 1)[0] != _canonical_prefix(hash_method())
+
+
+class HashingPool:
+    """A fixed pool for hashing work plus a bound on how many callers may be hashing or waiting for it."""
+
+    def __init__(self, workers, max_callers, queue_timeout=DEFAULT_QUEUE_TIMEOUT):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self.slots = threading.BoundedSemaphore(max_callers)
+        self.queue_timeout = queue_timeout
+
+    def run(self, fn, *args):
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHashingBusy('Too many sign-ins in progress.')
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            self.slots.release()
+
+
+def _run(fn, *args):
+    pool = current_app.extensions.get('password_hashing') if has_app_context() else None
+    if pool is None:
+        # Scripts and shells without an initialised app hash inline
+        return fn(*args)
+    return pool.run(fn, *args)
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+
+def init_app(app):
+    workers = int(app.config.get('PASSWORD_HASH_WORKERS') or os.environ.get('PASSWORD_HASH_WORKERS')
+                  or max(1, (os.cpu_count() or 2) // 2))
+    server_threads = int(app.config.get('WAITRESS_THREADS') or os.environ.get('WAITRESS_THREADS')
+                         or DEFAULT_SERVER_THREADS)
+    max_callers = int(app.config.get('PASSWORD_HASH_MAX_CALLERS') or os.environ.get('PASSWORD_HASH_MAX_CALLERS')
+                      or server_threads // 2)
+    # Leave at least one server thread free of hashing
+    max_callers = max(1, min(max_callers, server_threads - 1))
+    queue_timeout = float(app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT') or os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT')
+                          or DEFAULT_QUEUE_TIMEOUT)
+    app.extensions['password_hashing'] = HashingPool(workers, max_callers, queue_timeout)
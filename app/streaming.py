@@ -0,0 +1,30 @@
+from app import db
+
+# Streaming reads for report queries that can return the whole ledger.
+#
+# stream_results=True asks the driver for a server-side cursor (a named cursor
+# on psycopg2, SSCursor on PyMySQL; pysqlite already steps rows lazily), so the
+# driver never buffers the full result client-side, and yield_per=N makes the
+# ORM fetch and convert N rows at a time. Rows come back as SQLAlchemy Row
+# tuples (attribute access by column label, no ORM identity map or instance
+# state), so memory stays at one batch however many rows the query matches.
+#
+# The cursor stays open until the generator is exhausted or closed; consumers
+# that stop early should close() it (or let it be garbage collected) so the
+# connection is released.
+
+DEFAULT_STREAM_BATCH = 1000
+
+
+def stream_rows(stmt, batch_size=DEFAULT_STREAM_BATCH, session=None):
+    """
+    Executes a Core select() on a server-side cursor and yields its rows as
+    lightweight Row tuples, fetching batch_size rows at a time.
+    """
+    session = session or db.session
+    result = session.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+    try:
+        yield from result
+    finally:
+        result.close()
+
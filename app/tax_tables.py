@@ -0,0 +1,143 @@
+import glob
+import json
+import math
+import os
+from bisect import bisect_right
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+from functools import lru_cache
+
+# PAYG withholding and super guarantee rates, one data file per financial year
+# in app/data/tax_tables/<version>.json. Each file holds the ATO Schedule 1
+# coefficients for every scale; a scale is loaded into parallel sorted arrays
+# (bracket upper bounds, a, b) so finding an employee's bracket is one bisect.
+# The table in force for a pay period is picked by the period's end date, and
+# every (scale, frequency, gross) result is memoized on the table, so a pay run
+# over thousands of employees on the same few salaries costs a dict lookup each.
+
+TAX_TABLE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'tax_tables')
+GOLDEN_CASES_DIR = os.path.join(TAX_TABLE_DIR, 'golden')
+DEFAULT_CACHE_SIZE = 65536
+
+# Pay frequency -> weeks per pay period. Schedule 1 is written weekly; other
+# frequencies are converted to a weekly equivalent and back.
+PAY_FREQUENCIES = {
+    'weekly': Fraction(1),
+    'fortnightly': Fraction(2),
+    'monthly': Fraction(13, 3),
+}
+DEFAULT_PAY_FREQUENCY = 'fortnightly'
+
+# Employee.tfn_declaration_status -> scale. Without a TFN declaration the
+# employer must withhold at the top rate.
+TFN_STATUS_SCALES = {
+    'Submitted': 'tax_free_threshold',
+    'Submitted - No Tax-Free Threshold': 'no_tax_free_threshold',
+    'Pending': 'no_tfn',
+}
+DEFAULT_SCALE = 'no_tax_free_threshold'
+
+_CENTS = Decimal('0.99')
+_ONE = Decimal(1)
+
+
+def scale_for(tfn_declaration_status):
+    """The withholding scale for an employee's TFN declaration status."""
+    return TFN_STATUS_SCALES.get(tfn_declaration_status or 'Submitted', DEFAULT_SCALE)
+
+
+def pay_frequency_for(pay_period_start, pay_period_end):
+    """Infers the pay frequency from a period's dates (YYYY-MM-DD strings or dates)."""
+    try:
+        days = (_as_date(pay_period_end) - _as_date(pay_period_start)).days + 1
+    except (TypeError, ValueError):
+        return DEFAULT_PAY_FREQUENCY
+    if days <= 7:
+        return 'weekly'
+    if days <= 14:
+        return 'fortnightly'
+    return 'monthly'
+
+
+def _as_date(value):
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _round_dollars(value):
+    return int(Decimal(value).quantize(_ONE, rounding=ROUND_HALF_UP))
+
+
+class Scale:
+    """One withholding scale: weekly y = a * x - b, with bracket upper bounds in whole dollars."""
+
+    __slots__ = ('name', 'thresholds', 'a', 'b')
+
+    def __init__(self, name, brackets):
+        if not brackets or brackets[-1][0] is not None:
+            raise ValueError(f"Scale {name} must end with an open (null) bracket.")
+        self.name = name
+        self.thresholds = [int(upper) for upper, _, _ in brackets[:-1]]
+        if self.thresholds != sorted(self.thresholds):
+            raise ValueError(f"Scale {name} brackets are not in ascending order.")
+        self.a = [Decimal(a) for _, a, _ in brackets]
+        self.b = [Decimal(b) for _, _, b in brackets]
+
+    def weekly_withholding(self, weekly_dollars):
+        """Whole dollars withheld from weekly earnings of weekly_dollars (cents ignored)."""
+        i = bisect_right(self.thresholds, weekly_dollars)
+        x = weekly_dollars + _CENTS
+        return max(_round_dollars(self.a[i] * x - self.b[i]), 0)
+
+
+class TaxTable:
+    """One financial year's rates, loaded from a data file."""
+
+    def __init__(self, version, effective_from, super_guarantee_rate, scales, cache_size=DEFAULT_CACHE_SIZE):
+        self.version = version
+        self.effective_from = _as_date(effective_from)
+        self.super_guarantee_rate = Decimal(super_guarantee_rate)
+        self.scales = {name: Scale(name, brackets) for name, brackets in scales.items()}
+        self.withholding_cents = lru_cache(maxsize=cache_size)(self._withholding_cents)
+
+    def _withholding_cents(self, scale, frequency, gross_cents):
+        weeks = PAY_FREQUENCIES[frequency]
+        weekly_dollars = int(Fraction(max(gross_cents, 0), 100) / weeks)
+        weekly = self.scales[scale].weekly_withholding(weekly_dollars)
+        # Back to the pay period, to the nearest whole dollar
+        return math.floor(weekly * weeks + Fraction(1, 2)) * 100
+
+    def __repr__(self):
+        return f"<TaxTable {self.version} from {self.effective_from}>"
+
+
+def load_tax_table(path):
+    with open(path, encoding='utf-8') as fh:
+        data = json.load(fh)
+    return TaxTable(data['version'], data['effective_from'], data['super_guarantee_rate'], data['scales'])
+
+
+@lru_cache(maxsize=None)
+def tax_tables(directory=TAX_TABLE_DIR):
+    """Every table in the directory, oldest first. Loaded once per process."""
+    tables = [load_tax_table(path) for path in glob.glob(os.path.join(directory, '*.json'))]
+    if not tables:
+        raise RuntimeError(f"No tax tables found in {directory}.")
+    return sorted(tables, key=lambda table: table.effective_from)
+
+
+def tax_table_for(pay_date=None, directory=TAX_TABLE_DIR):
+    """The table in force on pay_date (today when omitted); the oldest table for earlier dates."""
+    tables = tax_tables(directory)
+    pay_date = _as_date(pay_date) if pay_date else date.today()
+    i = bisect_right([table.effective_from for table in tables], pay_date)
+    return tables[max(i - 1, 0)]
+
+
+def tax_table_version(version, directory=TAX_TABLE_DIR):
+    for table in tax_tables(directory):
+        if table.version == version:
+            return table
+    raise KeyError(f"No tax table version {version}.")
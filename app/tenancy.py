@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, has_request_context, request, session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+from app.models import TenantScoped
+
+# Every ORM SELECT touching a TenantScoped model (quotes, invoices, purchase
+# orders, bills, employees, pay runs) is limited to the active company. In a
+# request the active company is resolved the same way the routes do it
+# (?company_id= first, then the session); background work opts in with
+# tenant_scope(). Pass execution_options(all_tenants=True) for deliberate
+# cross-company reads.
+
+_scoped_company = ContextVar('scoped_company_id', default=None)
+
+
+def active_company_id():
+    company_id = _scoped_company.get()
+    if company_id is None and has_request_context():
+        company_id = g.get('tenant_company_id')
+    return company_id
+
+
+@contextmanager
+def tenant_scope(company_id):
+    """Limits TenantScoped queries to company_id outside a request (jobs, CLI commands)."""
+    token = _scoped_company.set(company_id)
+    try:
+        yield
+    finally:
+        _scoped_company.reset(token)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _limit_to_active_company(execute_state):
+    if (
+        not execute_state.is_select
+        or execute_state.is_column_load
+        or execute_state.is_relationship_load
+        or execute_state.execution_options.get('all_tenants', False)
+    ):
+        return
+
+    company_id = active_company_id()
+    if company_id is None:
+        return
+
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(TenantScoped, lambda cls: cls.company_id == company_id, include_aliases=True)
+    )
+
+
+def init_app(app):
+    @app.before_request
+    def _activate_tenant():
+        g.tenant_company_id = request.args.get('company_id', type=int) or session.get('company_id')
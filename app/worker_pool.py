@@ -0,0 +1,28 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Process pools for batch work that is worth spreading over several cores
+# (portfolio report shards, per-invoice workbooks). Each worker process builds
+# its own app, and so its own engine and connection pool, from the inherited
+# environment (DATABASE_URL etc.); submitted functions run inside
+# `with worker_app().app_context():`. An in-memory SQLite database is not
+# shared with the workers, so pools need a file or server database.
+
+_worker_app = None
+
+
+def _init_worker():
+    global _worker_app
+    # Workers only read or write rows; never let them run create_all against the shared database
+    os.environ['DB_SCHEMA_MODE'] = 'alembic'
+    from app import create_app
+    _worker_app = create_app()
+
+
+def worker_app():
+    """The app of the current pool worker process."""
+    return _worker_app
+
+
+def process_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
@@ -0,0 +1,130 @@
+"""
+Concurrent read/write benchmark for the SQLite engine profile.
+
+Runs the same workload twice against a throwaway SQLite file, once with
+DB_ENGINE_PROFILE=default (rollback journal, stock settings) and once with the
+tuned profile (WAL, synchronous=NORMAL, busy_timeout, cache/mmap sizing):
+
+  * --writers threads insert ledger lines in small committed transactions
+  * --readers threads run the trial-balance style totals query in a loop
+
+and reports throughput, read latency and "database is locked" failures.
+
+    python benchmarks/concurrent_rw.py --seconds 10 --readers 8 --writers 2
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def run_profile(args):
+    from sqlalchemy.exc import OperationalError
+    from app import create_app, db
+    from app.models import Company, FinancialRecord
+    from app.aggregation import ledger_totals
+    from app.ledger_categories import assign_category_ids
+
+    app = create_app()
+    with app.app_context():
+        company = Company(name="Concurrency Pty Ltd", abn_number="0")
+        db.session.add(company)
+        db.session.commit()
+        company_id = company.id
+        start = date(2024, 7, 1)
+        db.session.execute(db.insert(FinancialRecord.__table__), assign_category_ids([
+            {"company_id": company_id, "date": start + timedelta(days=i % 365), "description": f"Seed {i}",
+             "debit": 10.0, "credit": 0.0, "type_of_expense": "Rent"}
+            for i in range(args.seed_rows)
+        ]))
+        db.session.commit()
+        journal_mode = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"reads": 0, "writes": 0, "locked": 0, "read_latency": []}
+
+    def writer(n):
+        rng = random.Random(n)
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    for _ in range(args.batch):
+                        db.session.add(FinancialRecord(
+                            company_id=company_id, date=start + timedelta(days=rng.randrange(365)),
+                            description="Concurrent write", debit=0.0, credit=round(rng.uniform(1, 100), 2),
+                            type_of_income="Sales",
+                        ))
+                    db.session.commit()
+                    with lock:
+                        stats["writes"] += 1
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        stats["locked"] += 1
+
+    def reader(n):
+        with app.app_context():
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    ledger_totals(company_id)
+                    db.session.rollback()
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        stats["reads"] += 1
+                        stats["read_latency"].append(elapsed)
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        stats["locked"] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latency = sorted(stats["read_latency"]) or [0.0]
+    p99 = latency[min(len(latency) - 1, int(len(latency) * 0.99))]
+    print(f"{os.environ['DB_ENGINE_PROFILE']:>8} (journal={journal_mode}): "
+          f"{stats['reads'] / args.seconds:8.1f} reads/s  {stats['writes'] / args.seconds:7.1f} commits/s  "
+          f"read p50 {statistics.median(latency) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  "
+          f"locked errors {stats['locked']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--batch", type=int, default=20, help="ledger lines per write transaction")
+    parser.add_argument("--seed-rows", type=int, default=50000)
+    parser.add_argument("--profile", choices=("default", "tuned"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args)
+        return
+
+    # Each profile runs in a fresh interpreter so engines and pragmas cannot leak between runs
+    for profile in ("default", "tuned"):
+        workdir = tempfile.mkdtemp(prefix="rw-bench-")
+        env = dict(os.environ, DB_ENGINE_PROFILE=profile,
+                   DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        subprocess.run([sys.executable, __file__, "--profile", profile, *sys.argv[1:]], env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
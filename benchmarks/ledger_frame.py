@@ -0,0 +1,144 @@
+"""
+LedgerFrame benchmark: a company's ledger as ORM instances vs typed columns.
+
+Seeds one company with --lines ledger lines (benchmarks/synthetic.py, --seed)
+in a throwaway SQLite file, then for both representations measures:
+
+  * load      - time to read the ledger, and the memory it retains afterwards
+                (tracemalloc, so only Python allocations are counted)
+  * filter    - lines within one quarter
+  * group     - debit/credit totals per (income type, expense type)
+  * cumsum    - running balance (credits minus debits) per line
+  * totals    - the LedgerTotals fold used by the P&L
+
+Aggregates are run --repeats times and the best time is kept. The ORM side
+uses the plain-Python loops a report would write over a list of
+FinancialRecords. Columns are NumPy arrays when NumPy is importable, array.array
+otherwise; the header line says which.
+
+    python benchmarks/ledger_frame.py --lines 200000
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from itertools import accumulate
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from synthetic import generate_dataset
+
+QUARTER = (date(2025, 10, 1), date(2025, 12, 31))
+
+
+def best_of(repeats, fn):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def retained(load):
+    """(result, seconds, bytes still allocated once load() returns)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = load()
+    seconds = time.perf_counter() - started
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, seconds, size
+
+
+def orm_operations(records):
+    from app.aggregation import COGS, LedgerTotals
+    from app.money import ZERO
+
+    def filter_quarter():
+        return [r for r in records if QUARTER[0] <= r.date <= QUARTER[1]]
+
+    def group():
+        totals = {}
+        for r in records:
+            key = (r.type_of_income, r.type_of_expense)
+            pair = totals.setdefault(key, [ZERO, ZERO])
+            pair[0] += r.debit or ZERO
+            pair[1] += r.credit or ZERO
+        return totals
+
+    def cumsum():
+        return list(accumulate((r.credit or ZERO) - (r.debit or ZERO) for r in records))
+
+    def totals():
+        return LedgerTotals(
+            sum((r.debit or ZERO for r in records), ZERO), sum((r.credit or ZERO for r in records), ZERO),
+            sum((r.gst_paid or ZERO for r in records), ZERO), sum((r.gst_received or ZERO for r in records), ZERO),
+            sum((r.credit for r in records if r.type_of_income), ZERO),
+            sum((r.debit for r in records if r.type_of_expense == COGS), ZERO),
+            sum((r.debit for r in records if r.type_of_expense and r.type_of_expense != COGS), ZERO),
+            len(records),
+        )
+
+    return {"filter": filter_quarter, "group": group, "cumsum": cumsum, "totals": totals}
+
+
+def frame_operations(frame):
+    return {
+        "filter": lambda: frame.where(*QUARTER),
+        "group": frame.group_by_type,
+        "cumsum": frame.running_balance,
+        "totals": frame.totals,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=24)
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ledger-frame-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("LOG_FILE", "")
+    os.environ.setdefault("INSTRUMENTATION", "0")
+
+    from app import create_app, db
+    from app.models import FinancialRecord
+    from app.ledger_frame import LedgerFrame, numpy
+
+    app = create_app()
+    with app.app_context():
+        (company_id,) = generate_dataset(args.seed, companies=1, lines=args.lines, invoices=0, bills=0,
+                                         employees=0, pay_runs=0)
+        db.session.expunge_all()
+
+        records, orm_load, orm_bytes = retained(lambda: db.session.query(FinancialRecord).filter_by(
+            company_id=company_id).order_by(FinancialRecord.date, FinancialRecord.id).all())
+        orm_times = {name: best_of(args.repeats, fn) for name, fn in orm_operations(records).items()}
+        del records
+        db.session.expunge_all()
+
+        frame, frame_load, frame_bytes = retained(lambda: LedgerFrame.load(company_id))
+        frame_times = {name: best_of(args.repeats, fn) for name, fn in frame_operations(frame).items()}
+
+    print(f"{args.lines} lines, LedgerFrame columns: {'numpy' if numpy is not None else 'array'}\n")
+    print(f"{'':>8} {'ORM list':>12} {'LedgerFrame':>12} {'ratio':>8}")
+    print(f"{'memory':>8} {orm_bytes / 2**20:10.1f}MB {frame_bytes / 2**20:10.1f}MB {orm_bytes / frame_bytes:7.1f}x")
+    for name, orm_seconds, frame_seconds in [("load", orm_load, frame_load)] + [
+        (name, orm_times[name], frame_times[name]) for name in orm_times
+    ]:
+        print(f"{name:>8} {orm_seconds * 1000:10.1f}ms {frame_seconds * 1000:10.1f}ms "
+              f"{orm_seconds / frame_seconds:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
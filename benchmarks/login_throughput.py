@@ -0,0 +1,90 @@
+"""
+Login throughput benchmark for the password hashing policy.
+
+For each --method, seeds --users accounts in a throwaway SQLite file and drives
+POST /login from --clients concurrent threads for --seconds, then reports
+successful logins per second and per core. Each method runs in a fresh
+interpreter with PASSWORD_HASH_METHOD set, so the pool and policy start clean.
+
+    python benchmarks/login_throughput.py --method scrypt --method pbkdf2:sha256:600000 --clients 16
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+PASSWORD = "correct horse battery staple"
+
+
+def run_method(args):
+    from app import create_app, db
+    from app.models import User
+
+    app = create_app()
+    with app.app_context():
+        for n in range(args.users):
+            user = User(username=f"user{n}", role="Bookkeeper")
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+        stored_prefix = db.session.query(User.password_hash).first()[0].split("$", 1)[0]
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    counts = {"ok": 0, "busy": 0, "failed": 0}
+
+    def client(n):
+        http = app.test_client()
+        i = n
+        while not stop.is_set():
+            response = http.post("/login", data={"username": f"user{i % args.users}", "password": PASSWORD})
+            outcome = "ok" if response.status_code == 302 and "/login" not in response.location else (
+                "busy" if response.status_code == 503 else "failed")
+            with lock:
+                counts[outcome] += 1
+            i += args.clients
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    cores = os.cpu_count() or 1
+    workers = app.extensions["password_hashing"].executor._max_workers
+    rate = counts["ok"] / elapsed
+    print(f"{stored_prefix:>24}: {rate:8.1f} logins/s  {rate / cores:8.1f} /s/core  "
+          f"({cores} cores, {workers} hash workers, busy {counts['busy']}, failed {counts['failed']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--method", action="append", help="PASSWORD_HASH_METHOD to test (repeatable)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_method(args)
+        return
+
+    for method in args.method or ["scrypt", "pbkdf2:sha256:600000"]:
+        workdir = tempfile.mkdtemp(prefix="login-bench-")
+        env = dict(os.environ, PASSWORD_HASH_METHOD=method,
+                   DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        subprocess.run([sys.executable, __file__, "--child", *sys.argv[1:]], env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Money aggregation benchmark: float vs Decimal vs integer cents.
+
+Generates --rows random two-decimal amounts and totals them along each path:
+
+  * float        - Python sum() over floats (what the Float columns used to give us)
+  * decimal      - Python sum() over Decimal
+  * cents        - Python sum() over int cents
+  * sql-real     - SUM() over a REAL column in SQLite
+  * sql-cents    - SUM() over a BIGINT cents column in SQLite (the MoneyType path)
+  * sql-decimal  - fetch every REAL row and total it as Decimal in Python
+
+For each path it prints the best time and the error against the exact total.
+
+    python benchmarks/money_aggregation.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.money import Money
+
+
+def best_of(repeat, fn):
+    result, best = None, float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(14)
+    cents = [rng.randrange(1, 10_000_000) for _ in range(args.rows)]
+    floats = [c / 100 for c in cents]
+    decimals = [Decimal(c).scaleb(-2) for c in cents]
+    exact = Money.from_cents(sum(cents))
+
+    path = os.path.join(tempfile.mkdtemp(prefix="money-bench-"), "bench.db")
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE amounts (real_amount REAL, cents_amount BIGINT)")
+    con.executemany("INSERT INTO amounts VALUES (?, ?)", zip(floats, cents))
+    con.commit()
+
+    paths = {
+        "float": lambda: sum(floats),
+        "decimal": lambda: sum(decimals),
+        "cents": lambda: Money.from_cents(sum(cents)),
+        "sql-real": lambda: con.execute("SELECT SUM(real_amount) FROM amounts").fetchone()[0],
+        "sql-cents": lambda: Money.from_cents(con.execute("SELECT SUM(cents_amount) FROM amounts").fetchone()[0]),
+        "sql-decimal": lambda: sum(Decimal(repr(r[0])) for r in con.execute("SELECT real_amount FROM amounts")),
+    }
+
+    print(f"{args.rows} amounts, exact total {exact:,.2f}\n")
+    print(f"{'path':>12} {'best ms':>10} {'error vs exact':>18}")
+    for name, fn in paths.items():
+        total, elapsed = best_of(args.repeat, fn)
+        error = Decimal(repr(total)) - exact.amount if isinstance(total, float) else Money(total).amount - exact.amount
+        print(f"{name:>12} {elapsed * 1000:10.2f} {error:>18}")
+    con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Pay run benchmark: one PayrollRun per request vs the batch pay run engine.
+
+Seeds --employees staff (with varied standard gross wages) for one company in a
+throwaway SQLite file, then times:
+
+  * per-employee  - what /payroll POST does for each worker: load the employee,
+                    compute, add one PayrollRun, commit. Timed over --sample employees and
+                    extrapolated to the full head count.
+  * batch         - app.payroll_engine.run_pay_cycle for every employee in one
+                    pass and one transaction.
+
+    python benchmarks/payroll_batch.py --employees 10000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=500, help="employees timed on the per-employee path")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="payroll-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from sqlalchemy import insert
+    from app import create_app, db
+    from app.models import Company, Employee, PayrollRun
+    from app.money import Money
+    from app.payroll_engine import STP_PENDING, pay_rates, run_pay_cycle
+    from app.tax_tables import scale_for
+    from app.tenancy import tenant_scope
+
+    rng = random.Random(15)
+    app = create_app()
+    with app.app_context():
+        company = Company(name="Benchmark Pty Ltd")
+        db.session.add(company)
+        db.session.commit()
+        company_id = company.id
+        db.session.execute(insert(Employee.__table__), [
+            {"company_id": company_id, "name": f"Employee {n}", "employment_type": "Full-Time",
+             "tfn_declaration_status": "Submitted",
+             "standard_gross_wages": Money.from_cents(rng.randrange(80_000, 600_000, 500))}
+            for n in range(args.employees)
+        ])
+        db.session.commit()
+
+        with tenant_scope(company_id):
+            employees = db.session.query(Employee.id).limit(args.sample).all()
+            started = time.perf_counter()
+            for (employee_id,) in employees:
+                employee = db.session.get(Employee, employee_id)
+                line = pay_rates("2026-06-14").pay_line(
+                    employee_id, employee.standard_gross_wages,
+                    scale_for(employee.tfn_declaration_status), "fortnightly")
+                db.session.add(PayrollRun(
+                    company_id=company_id, employee_id=employee_id,
+                    pay_period_start="2026-06-01", pay_period_end="2026-06-14",
+                    gross_wages=line.gross_wages, payg_withholding=line.payg_withholding,
+                    super_guarantee=line.super_guarantee, net_pay=line.net_pay, stp_status=STP_PENDING,
+                ))
+                db.session.commit()
+            per_employee = (time.perf_counter() - started) / len(employees)
+
+            started = time.perf_counter()
+            summary = run_pay_cycle(company_id, "2026-06-15", "2026-06-28")
+            batch = time.perf_counter() - started
+
+    extrapolated = per_employee * args.employees
+    print(f"{args.employees} employees\n")
+    print(f"{'per-employee':>14}: {extrapolated:8.2f} s  (extrapolated from {len(employees)}, "
+          f"{per_employee * 1000:.2f} ms each)")
+    print(f"{'batch':>14}: {batch:8.2f} s  ({summary['employees_paid'] / batch:,.0f} employees/s)")
+    print(f"\nspeed-up x{extrapolated / batch:.1f}; gross {summary['gross_wages']:,.2f}, "
+          f"PAYG {summary['payg_withholding']:,.2f}, super {summary['super_guarantee']:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Portfolio report benchmark: per-company report calls vs one grouped pass.
+
+Seeds --companies clients with --lines ledger lines each in a throwaway SQLite
+file, then times a month-end run over every client:
+
+  * per-company  - compute_trial_balance + compute_profit_loss for each company,
+                   i.e. what one /trial-balance and one /profit_loss request do
+  * portfolio    - app.portfolio.portfolio_rows, one GROUP BY company_id query
+  * parallel     - the same split across --workers company shards in a process pool
+
+and checks that the portfolio figures match the per-company ones.
+
+    python benchmarks/portfolio.py --companies 500 --lines 400 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=300, help="ledger lines per company")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="portfolio-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from sqlalchemy import insert
+    from app import create_app, db
+    from app.models import Company, FinancialRecord
+    from app.balances import rebuild_period_balances
+    from app.ledger_categories import assign_category_ids
+    from app.money import Money
+    from app.portfolio import parallel_portfolio_rows, portfolio_rows
+    from app.routes.financial_routes import compute_profit_loss
+    from app.routes.transaction_routes import compute_trial_balance
+
+    rng = random.Random(18)
+    start = date(2025, 7, 1)
+    date_from, date_to = date(2025, 7, 1), date(2026, 6, 30)
+    app = create_app()
+    with app.app_context():
+        db.session.execute(insert(Company.__table__), [{"name": f"Client {n:05d}"} for n in range(args.companies)])
+        company_ids = [cid for (cid,) in db.session.query(Company.id)]
+        rows = []
+        for cid in company_ids:
+            for i in range(args.lines):
+                amount = Money.from_cents(rng.randrange(100, 500_000))
+                is_income = i % 3 == 0
+                rows.append({
+                    "company_id": cid, "date": start + timedelta(days=rng.randrange(365)), "description": f"Line {i}",
+                    "debit": 0 if is_income else amount, "credit": amount if is_income else 0,
+                    "type_of_income": "Sales" if is_income else None,
+                    "type_of_expense": None if is_income else rng.choice(["COGS", "Rent", "Wages"]),
+                })
+        db.session.execute(insert(FinancialRecord.__table__), assign_category_ids(rows))
+        db.session.commit()
+        rebuild_period_balances()
+
+        started = time.perf_counter()
+        expected = {}
+        for cid in company_ids:
+            trial = compute_trial_balance(cid)
+            pl = compute_profit_loss(cid, date_from, date_to)
+            expected[cid] = (trial["total_debits"], pl["net_profit_after_tax"])
+        per_company = time.perf_counter() - started
+
+        started = time.perf_counter()
+        portfolio = list(portfolio_rows(date_from, date_to))
+        grouped = time.perf_counter() - started
+
+    started = time.perf_counter()
+    parallel = parallel_portfolio_rows(date_from, date_to, args.workers)
+    fanned = time.perf_counter() - started
+
+    mismatched = [row.company_id for row in portfolio
+                  if (row.total_debits, row.net_profit_after_tax) != expected[row.company_id]]
+    print(f"{args.companies} companies x {args.lines} lines\n")
+    print(f"{'per-company':>12}: {per_company * 1000:9.1f} ms")
+    print(f"{'portfolio':>12}: {grouped * 1000:9.1f} ms  (x{per_company / grouped:.1f})")
+    print(f"{'parallel':>12}: {fanned * 1000:9.1f} ms  ({args.workers} workers, incl. pool start-up)")
+    print(f"\nfigures match per-company reports: {'yes' if not mismatched else f'NO {mismatched[:5]}'}; "
+          f"parallel rows identical: {'yes' if parallel == portfolio else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
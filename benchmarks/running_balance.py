@@ -0,0 +1,108 @@
+"""
+Running balance benchmark: window function vs. the Python loop over ORM rows.
+
+Seeds one company with --rows ledger lines in a throwaway SQLite file, then times
+
+  * window  - app.ledger.iter_ledger_lines (SUM(credit - debit) OVER (...))
+  * page    - app.ledger.ledger_page for a 200-line page near the end of the ledger
+              (window over the page + snapshot opening balance)
+  * python  - loading every FinancialRecord and accumulating in a Python loop
+
+    python benchmarks/running_balance.py --rows 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def seed(db, FinancialRecord, company_id, rows, seed_value=7):
+    rng = random.Random(seed_value)
+    start = date(2020, 7, 1)
+    batch = []
+    for i in range(rows):
+        is_credit = rng.random() < 0.4
+        batch.append({
+            "company_id": company_id,
+            "date": start + timedelta(days=rng.randrange(365 * 5)),
+            "description": f"Line {i}",
+            "debit": 0.0 if is_credit else round(rng.uniform(1, 500), 2),
+            "credit": round(rng.uniform(1, 900), 2) if is_credit else 0.0,
+        })
+        if len(batch) == 5000:
+            db.session.execute(db.insert(FinancialRecord.__table__), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(FinancialRecord.__table__), batch)
+    db.session.commit()
+
+
+def python_loop(db, FinancialRecord, company_id):
+    records = db.session.query(FinancialRecord).filter_by(company_id=company_id).order_by(
+        FinancialRecord.date, FinancialRecord.id
+    ).all()
+    running = 0.0
+    balances = []
+    for record in records:
+        running += (record.credit or 0.0) - (record.debit or 0.0)
+        balances.append(running)
+    return balances
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ledger-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import create_app, db
+    from app.models import Company, FinancialRecord
+    from app.balances import rebuild_period_balances
+    from app.ledger import iter_ledger_lines, ledger_page, supports_window_functions
+
+    app = create_app()
+    with app.app_context():
+        company = Company(name="Benchmark Pty Ltd", abn_number="0")
+        db.session.add(company)
+        db.session.commit()
+        company_id = company.id
+        seed(db, FinancialRecord, company_id, args.rows)
+        rebuild_period_balances(company_id)
+        print(f"{args.rows} ledger lines, window functions available: {supports_window_functions()}")
+
+        deep = db.session.query(FinancialRecord.date, FinancialRecord.id).filter_by(company_id=company_id).order_by(
+            FinancialRecord.date, FinancialRecord.id
+        ).offset(int(args.rows * 0.9)).first()
+
+        timings = {"window": [], "page": [], "python": []}
+        for _ in range(args.repeat):
+            db.session.expunge_all()
+            started = time.perf_counter()
+            window_balances = [line.balance for line in iter_ledger_lines(company_id)]
+            timings["window"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            ledger_page(company_id, after=(deep.date, deep.id), limit=200)
+            timings["page"].append(time.perf_counter() - started)
+
+            db.session.expunge_all()
+            started = time.perf_counter()
+            loop_balances = python_loop(db, FinancialRecord, company_id)
+            timings["python"].append(time.perf_counter() - started)
+
+        assert abs(window_balances[-1] - loop_balances[-1]) < 0.01, "running balances disagree"
+        for name, samples in timings.items():
+            best = min(samples)
+            print(f"{name:>7}: best {best * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold-start benchmark for create_app().
+
+Starts --runs fresh interpreters per schema mode and times, in each, the import
+of the app package, create_app() and the first request (the company selector).
+The whole process wall time is reported too, since that is what an autoscaled
+instance pays before it can serve. Exits non-zero if the median first-request
+time in alembic mode exceeds --budget-ms.
+
+    python benchmarks/startup.py --runs 7 --budget-ms 1200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+app.test_client().get('/select_company')
+served = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': created - imported, 'first_request': served - started}))
+"""
+
+
+def run_once(env):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(f"startup probe failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = wall
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0,
+                        help="median import + create_app + first request budget for alembic mode")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="startup-bench-")
+    base_env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    base_env.pop("FLASK_RUN_FROM_CLI", None)
+
+    # The first create_all run also lays down the schema alembic mode expects to find
+    results = {}
+    for mode in ("create_all", "alembic"):
+        env = dict(base_env, DB_SCHEMA_MODE=mode)
+        runs = [run_once(env) for _ in range(args.runs)]
+        results[mode] = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+
+    print(f"{'mode':>10} {'import':>9} {'create_app':>11} {'first req':>10} {'process':>9}   (median ms, {args.runs} runs)")
+    for mode, medians in results.items():
+        print(f"{mode:>10} {medians['import'] * 1000:9.1f} {medians['create_app'] * 1000:11.1f} "
+              f"{medians['first_request'] * 1000:10.1f} {medians['process'] * 1000:9.1f}")
+
+    measured = results["alembic"]["first_request"] * 1000
+    if measured > args.budget_ms:
+        print(f"\nOver budget: {measured:.1f} ms > {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print(f"\nWithin budget: {measured:.1f} ms <= {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Streaming read benchmark: materialised results vs server-side cursor streaming.
+
+Seeds one company with --rows ledger lines (1M by default) in a throwaway SQLite
+file, or uses --database-url to point at an existing Postgres/MySQL database
+with that data, then reads every line once per mode, each in a fresh process so
+its peak RSS is its own:
+
+  * orm      - db.session.query(FinancialRecord).all(), full ORM instances
+  * all      - session.execute(select(columns)).all(), rows materialised in one list
+  * stream   - app.streaming.stream_rows(select(columns)), yield_per batches on a
+               server-side cursor
+  * ledger   - app.ledger.iter_ledger_lines, the streamed ledger view/export path
+               (running balance included)
+
+reporting wall time and peak RSS above the process's baseline after start-up.
+
+    python benchmarks/streaming.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+MODES = ("orm", "all", "stream", "ledger")
+
+
+def rss_mb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(rows, batch=20000):
+    from sqlalchemy import insert
+    from app import create_app, db
+    from app.models import Company, FinancialRecord
+    from app.balances import rebuild_period_balances
+    from app.ledger_categories import assign_category_ids
+    from app.money import Money
+
+    rng = random.Random(23)
+    app = create_app()
+    with app.app_context():
+        db.session.add(Company(name="Streaming Co"))
+        db.session.commit()
+        start = date(2020, 7, 1)
+        for offset in range(0, rows, batch):
+            chunk = []
+            for i in range(offset, min(offset + batch, rows)):
+                amount = Money.from_cents(rng.randrange(100, 500_000))
+                is_income = i % 3 == 0
+                chunk.append({
+                    "company_id": 1, "date": start + timedelta(days=i * 1826 // rows), "description": f"Line {i}",
+                    "debit": Money(0) if is_income else amount, "credit": amount if is_income else Money(0),
+                    "type_of_income": "Sales" if is_income else None,
+                    "type_of_expense": None if is_income else "Rent",
+                })
+            db.session.execute(insert(FinancialRecord.__table__), assign_category_ids(chunk))
+            db.session.commit()
+        rebuild_period_balances()
+
+
+def measure(mode, batch_size):
+    """Runs one mode in this process and prints 'seconds peak_mb rows'."""
+    from sqlalchemy import select
+    from app import create_app, db
+    from app.models import FinancialRecord
+    from app.ledger import iter_ledger_lines
+    from app.streaming import stream_rows
+
+    app = create_app()
+    columns = (FinancialRecord.id, FinancialRecord.date, FinancialRecord.description,
+               FinancialRecord.debit, FinancialRecord.credit)
+    with app.app_context():
+        stmt = select(*columns).where(FinancialRecord.company_id == 1).order_by(FinancialRecord.date, FinancialRecord.id)
+        db.session.execute(select(FinancialRecord.id).limit(1)).all()
+        baseline = rss_mb()
+        started = time.perf_counter()
+        total = count = 0
+        if mode == "orm":
+            records = db.session.query(FinancialRecord).filter_by(company_id=1).order_by(
+                FinancialRecord.date, FinancialRecord.id).all()
+            for record in records:
+                total += record.credit.cents
+                count += 1
+        elif mode == "all":
+            for row in db.session.execute(stmt).all():
+                total += row.credit.cents
+                count += 1
+        elif mode == "stream":
+            for row in stream_rows(stmt, batch_size):
+                total += row.credit.cents
+                count += 1
+        else:
+            for line in iter_ledger_lines(1, batch_size=batch_size):
+                total += int(line.credit * 100) if isinstance(line.credit, float) else line.credit.cents
+                count += 1
+        elapsed = time.perf_counter() - started
+    print(f"{elapsed:.3f} {rss_mb() - baseline:.1f} {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--database-url", help="use existing data (company 1) instead of seeding SQLite")
+    parser.add_argument("--modes", type=lambda value: value.split(","), default=list(MODES))
+    parser.add_argument("--measure", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_FILE", "")
+    os.environ.setdefault("INSTRUMENTATION", "0")
+    if args.measure:
+        measure(args.measure, args.batch_size)
+        return
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        workdir = tempfile.mkdtemp(prefix="streaming-bench-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        started = time.perf_counter()
+        seed(args.rows)
+        print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f}s\n")
+
+    print(f"{'mode':>8} {'seconds':>9} {'peak RSS +MB':>13} {'rows':>9}")
+    for mode in args.modes:
+        output = subprocess.run(
+            [sys.executable, __file__, "--measure", mode, "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True, check=True, env=os.environ,
+        ).stdout.split()
+        seconds, peak, rows = output[-3:]
+        print(f"{mode:>8} {float(seconds):9.2f} {float(peak):13.1f} {int(rows):9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Benchmark suite: every hot route driven through the Flask test client.
+
+Seeds a throwaway SQLite file with benchmarks/synthetic.py (same --seed and sizes
+give the same data) and requests each scenario --iterations times after a short
+warm-up, rotating over the companies:
+
+  ledger         GET  /general_ledger_form (first JSON page)
+  trial_balance  GET  /trial-balance
+  profit_loss    GET  /profit_loss (full financial year)
+  balance_sheet  GET  /balance_sheet
+  cash_flow      GET  /cash_flow (JSON)
+  bas            GET  /bas_form (Q1 of the synthetic year)
+  bas_batch      GET  /bas/quarter_end (every company)
+  bulk_import    POST /add-transaction-bulk (--import-rows CSV rows per request)
+
+For each scenario it records p50/p99/mean latency, SQL statements per request
+and the process's peak RSS, and writes them with the dataset parameters to a
+JSON file. --compare runs the same suite and fails (exit 1) when a scenario's
+p50 or p99 is more than --threshold slower than the baseline, issues more
+queries, or the peak RSS grew by more than --rss-threshold. The report cache is
+off unless --report-cache is given, so cached and uncached runs never mix.
+
+    python benchmarks/suite.py --output benchmarks/baseline.json
+    python benchmarks/suite.py --compare benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from importlib.metadata import version as package_version
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from synthetic import DEFAULT_SIZES, generate_dataset
+
+SCENARIOS = (
+    "ledger", "trial_balance", "profit_loss", "balance_sheet", "cash_flow", "bas", "bas_batch", "bulk_import",
+)
+WARMUP = 2
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident set, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def import_csv(rng, rows):
+    lines = ["Date,Description,Debit,Credit,Expense Type,Income Type"]
+    for i in range(rows):
+        day = f"2025-{rng.randint(7, 12):02d}-{rng.randint(1, 28):02d}"
+        amount = f"{rng.randrange(100, 500_000) / 100:.2f}"
+        if i % 2:
+            lines.append(f"{day},Imported sale {i},0,{amount},,Sales")
+        else:
+            lines.append(f"{day},Imported cost {i},{amount},0,Rent,")
+    return "\n".join(lines)
+
+
+def scenario_request(name, company_id, rng, import_rows):
+    """(method, url, kwargs) for one request of the scenario."""
+    if name == "ledger":
+        return "GET", f"/general_ledger_form?company_id={company_id}&format=json&limit=100", {}
+    if name == "trial_balance":
+        return "GET", f"/trial-balance?company_id={company_id}", {}
+    if name == "profit_loss":
+        return "GET", f"/profit_loss?company_id={company_id}&date_from=2025-07-01&date_to=2026-06-30", {}
+    if name == "balance_sheet":
+        return "GET", f"/balance_sheet?company_id={company_id}", {}
+    if name == "cash_flow":
+        return "GET", f"/cash_flow?company_id={company_id}&json=true", {}
+    if name == "bas":
+        return "GET", f"/bas_form?company_id={company_id}&financial_year=2026&quarter=Q1", {}
+    if name == "bas_batch":
+        return "GET", "/bas/quarter_end?financial_year=2026&quarter=Q1", {}
+    if name == "bulk_import":
+        return "POST", f"/add-transaction-bulk?company_id={company_id}", {
+            "data": {"csv_data": import_csv(rng, import_rows)},
+            "headers": {"Accept": "application/json"},
+        }
+    raise ValueError(f"Unknown scenario {name}")
+
+
+def run_suite(args):
+    workdir = tempfile.mkdtemp(prefix="bench-suite-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("LOG_FILE", "")
+    # Keep the slow-query and N+1 warnings out of the results table
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    if not args.report_cache:
+        os.environ["REPORT_CACHE_MAX_ENTRIES"] = "0"
+        os.environ.pop("REPORT_CACHE_PATH", None)
+
+    from sqlalchemy import event
+    from app import create_app, db
+
+    app = create_app()
+    sizes = {name: getattr(args, name) for name in DEFAULT_SIZES}
+    started = time.perf_counter()
+    with app.app_context():
+        company_ids = generate_dataset(args.seed, **sizes)
+        engine = db.engine
+    seed_seconds = time.perf_counter() - started
+
+    queries = [0]
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def count_query(*_):
+        queries[0] += 1
+
+    client = app.test_client()
+    rng = random.Random(args.seed)
+    results = {}
+    for name in args.only or SCENARIOS:
+        latencies, counts = [], []
+        for i in range(WARMUP + args.iterations):
+            company_id = company_ids[i % len(company_ids)]
+            method, url, kwargs = scenario_request(name, company_id, rng, args.import_rows)
+            before = queries[0]
+            t0 = time.perf_counter()
+            response = client.open(url, method=method, **kwargs)
+            response.get_data()
+            elapsed = time.perf_counter() - t0
+            if response.status_code >= 400:
+                raise SystemExit(f"{name}: {method} {url} returned {response.status_code}")
+            if i >= WARMUP:
+                latencies.append(elapsed * 1000)
+                counts.append(queries[0] - before)
+        results[name] = {
+            "iterations": len(latencies),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "queries": int(statistics.median(counts)),
+            "max_queries": max(counts),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        print(f"{name:>14}: p50 {results[name]['p50_ms']:9.2f} ms  p99 {results[name]['p99_ms']:9.2f} ms  "
+              f"{results[name]['queries']:4d} queries  peak RSS {results[name]['peak_rss_mb']} MB")
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "import_rows": args.import_rows,
+            "report_cache": bool(args.report_cache),
+            "sizes": sizes,
+            "seed_seconds": round(seed_seconds, 2),
+            "python": platform.python_version(),
+            "sqlalchemy": package_version("SQLAlchemy"),
+            "flask": package_version("Flask"),
+            "platform": platform.platform(),
+        },
+        "scenarios": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(baseline, current, threshold, rss_threshold, min_ms):
+    """Regression messages (empty when the run is within bounds of the baseline)."""
+    regressions = []
+    for key in ("seed", "sizes", "import_rows", "report_cache"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            regressions.append(f"dataset differs from baseline: {key} {baseline['meta'].get(key)} -> "
+                               f"{current['meta'].get(key)} (re-run with the baseline's parameters)")
+    if regressions:
+        return regressions
+
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if now[metric] > before[metric] * (1 + threshold) and now[metric] - before[metric] > min_ms:
+                regressions.append(f"{name}: {metric} {before[metric]:.2f} -> {now[metric]:.2f} "
+                                   f"(+{(now[metric] / before[metric] - 1) * 100:.0f}%)")
+        if now["queries"] > before["queries"]:
+            regressions.append(f"{name}: queries per request {before['queries']} -> {now['queries']}")
+
+    if baseline.get("peak_rss_mb") and current.get("peak_rss_mb"):
+        if current["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + rss_threshold):
+            regressions.append(f"peak RSS {baseline['peak_rss_mb']} MB -> {current['peak_rss_mb']} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=22)
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--import-rows", type=int, default=500, help="CSV rows per bulk import request")
+    parser.add_argument("--only", type=lambda value: value.split(","), default=None,
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--report-cache", action="store_true", help="leave the report cache on")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail on regressions against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed latency growth (0.25 = 25%%)")
+    parser.add_argument("--rss-threshold", type=float, default=0.20, help="allowed peak RSS growth")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    if args.only:
+        unknown = set(args.only) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+
+    current = run_suite(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+            fh.write("\n")
+        print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(baseline, current, args.threshold, args.rss_threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions against {args.compare}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Seeded synthetic data for the benchmark suite.
+
+generate_dataset() fills the current app's database with --companies clients,
+each with --lines ledger lines, --invoices invoices and --bills bills (with
+parsed line items), --employees staff and --pay-runs fortnightly pay runs. The
+same seed and sizes always produce the same rows, so timings taken on two
+commits are comparable.
+
+Ledger lines, documents and employees are written with Core executemany
+inserts; the monthly and BAS snapshots are then rebuilt in one pass. Pay runs
+go through the batch pay run engine, as they would in production.
+
+Standalone, it seeds a SQLite file you can point the app at:
+
+    python benchmarks/synthetic.py --database /tmp/bench.db --companies 20 --lines 5000
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+DEFAULT_SIZES = {
+    "companies": 10,
+    "lines": 2000,
+    "invoices": 200,
+    "bills": 100,
+    "employees": 20,
+    "pay_runs": 6,
+}
+
+LEDGER_START = date(2025, 7, 1)
+INCOME_TYPES = ("Sales", "Services", "Interest")
+EXPENSE_TYPES = ("COGS", "Rent", "Wages", "Utilities", "Advertising")
+PRODUCTS = ("Consulting hour", "Widget", "Support plan", "Installation", "Licence")
+TFN_STATUSES = ("Submitted", "Submitted", "Submitted", "Submitted - No Tax-Free Threshold", "Pending")
+INSERT_CHUNK = 5000
+
+
+def _chunks(rows, size=INSERT_CHUNK):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _ledger_rows(rng, company_id, lines):
+    from app.money import Money
+
+    rows = []
+    for i in range(lines):
+        is_income = rng.random() < 0.4
+        amount = Money.from_cents(rng.randrange(500, 2_000_000))
+        gst = Money.from_cents(amount.cents // 11) if rng.random() < 0.7 else Money(0)
+        rows.append({
+            "company_id": company_id,
+            "date": LEDGER_START + timedelta(days=rng.randrange(365)),
+            "description": f"Synthetic line {i}",
+            "debit": Money(0) if is_income else amount,
+            "credit": amount if is_income else Money(0),
+            "type_of_income": rng.choice(INCOME_TYPES) if is_income else None,
+            "type_of_expense": None if is_income else rng.choice(EXPENSE_TYPES),
+            "gst_received": gst if is_income else Money(0),
+            "gst_paid": Money(0) if is_income else gst,
+        })
+    return rows
+
+
+def _documents(rng, company_id, count, first_id, party_field, document_type, statuses):
+    """Document rows plus their parsed line items; ids are assigned here so the items can refer to them."""
+    from app.money import Money
+
+    documents, items = [], []
+    for n in range(count):
+        document_id = first_id + n
+        total = 0
+        for position in range(rng.randint(1, 4)):
+            quantity = rng.randint(1, 10)
+            unit_price = rng.randrange(1000, 50_000)
+            amount = quantity * unit_price
+            total += amount
+            items.append({
+                "company_id": company_id, "document_type": document_type, "document_id": document_id,
+                "position": position, "description": rng.choice(PRODUCTS), "quantity": quantity,
+                "unit_price_cents": unit_price, "gst_code": "GST", "amount_cents": amount, "gst_cents": amount // 11,
+            })
+        documents.append({
+            "id": document_id, "company_id": company_id, party_field: f"Party {rng.randrange(1000):03d}",
+            "line_items": "[]", "total_amount": Money.from_cents(total),
+            "due_date": LEDGER_START + timedelta(days=rng.randrange(365)),
+            "payment_status": rng.choice(statuses),
+        })
+    return documents, items
+
+
+def generate_dataset(seed=22, companies=None, lines=None, invoices=None, bills=None, employees=None,
+                     pay_runs=None):
+    """Seeds the current app's (empty) database. Returns the new company ids."""
+    from sqlalchemy import insert
+    from app import db
+    from app.models import Bill, Company, DocumentLineItem, Employee, FinancialRecord, Invoice
+    from app.balances import rebuild_period_balances
+    from app.bas import rebuild_bas_balances
+    from app.ledger_categories import assign_category_ids
+    from app.money import Money
+    from app.payroll_engine import run_pay_cycle
+
+    sizes = dict(DEFAULT_SIZES)
+    sizes.update({name: value for name, value in (
+        ("companies", companies), ("lines", lines), ("invoices", invoices), ("bills", bills),
+        ("employees", employees), ("pay_runs", pay_runs),
+    ) if value is not None})
+    rng = random.Random(seed)
+
+    db.session.execute(insert(Company.__table__), [
+        {"name": f"Synthetic Client {n:04d} Pty Ltd", "abn_number": f"{rng.randrange(10**10, 10**11)}"}
+        for n in range(sizes["companies"])
+    ])
+    company_ids = [company_id for (company_id,) in db.session.query(Company.id).order_by(Company.id)]
+
+    invoice_id = bill_id = 1
+    for company_id in company_ids:
+        for chunk in _chunks(_ledger_rows(rng, company_id, sizes["lines"])):
+            db.session.execute(insert(FinancialRecord.__table__), assign_category_ids(chunk))
+
+        invoice_rows, invoice_items = _documents(rng, company_id, sizes["invoices"], invoice_id, "client_name",
+                                                 "invoice", ("Pending", "Paid", "Overdue"))
+        bill_rows, bill_items = _documents(rng, company_id, sizes["bills"], bill_id, "vendor_name",
+                                           "bill", ("Unpaid", "Paid"))
+        invoice_id += sizes["invoices"]
+        bill_id += sizes["bills"]
+        for table, rows in ((Invoice.__table__, invoice_rows), (Bill.__table__, bill_rows),
+                            (DocumentLineItem.__table__, invoice_items + bill_items)):
+            for chunk in _chunks(rows):
+                db.session.execute(insert(table), chunk)
+
+        if sizes["employees"]:
+            db.session.execute(insert(Employee.__table__), [
+                {"company_id": company_id, "name": f"Employee {company_id}-{n}", "employment_type": "Full-Time",
+                 "tfn_declaration_status": rng.choice(TFN_STATUSES),
+                 "standard_gross_wages": Money.from_cents(rng.randrange(120_000, 600_000))}
+                for n in range(sizes["employees"])
+            ])
+    db.session.commit()
+
+    rebuild_period_balances()
+    rebuild_bas_balances()
+
+    if sizes["employees"]:
+        for company_id in company_ids:
+            for run in range(sizes["pay_runs"]):
+                start = LEDGER_START + timedelta(days=14 * run)
+                run_pay_cycle(company_id, start.isoformat(), (start + timedelta(days=13)).isoformat())
+    return company_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", required=True, help="SQLite file to create (must not exist)")
+    parser.add_argument("--seed", type=int, default=22)
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        parser.error(f"{args.database} already exists")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.database)}"
+
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        company_ids = generate_dataset(args.seed, args.companies, args.lines, args.invoices, args.bills,
+                                       args.employees, args.pay_runs)
+    print(f"Seeded {len(company_ids)} companies into {args.database}")
+
+
+if __name__ == "__main__":
+    main()
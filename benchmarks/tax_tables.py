@@ -0,0 +1,86 @@
+"""
+PAYG withholding lookup benchmark.
+
+Draws --employees (scale, gross) pairs from --salaries distinct pay levels and
+computes fortnightly withholding for all of them along three paths:
+
+  * rules     - walk the brackets in order until one matches, parsing the
+                coefficients on every call (how inline rule evaluation scales)
+  * bisect    - TaxTable lookup with the memo cleared before each round
+  * memoized  - TaxTable lookup with a warm (scale, frequency, gross) memo
+
+All three must agree; the best time per path is printed.
+
+    python benchmarks/tax_tables.py --employees 100000 --salaries 500
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.tax_tables import PAY_FREQUENCIES, TFN_STATUS_SCALES, tax_table_for
+
+
+def rule_withholding(brackets, frequency, gross_cents):
+    weeks = PAY_FREQUENCIES[frequency]
+    weekly_dollars = int(Fraction(gross_cents, 100) / weeks)
+    for upper, a, b in brackets:
+        if upper is None or weekly_dollars < upper:
+            y = Decimal(a) * (weekly_dollars + Decimal("0.99")) - Decimal(b)
+            weekly = max(int(y.quantize(Decimal(1), rounding=ROUND_HALF_UP)), 0)
+            return math.floor(weekly * weeks + Fraction(1, 2)) * 100
+
+
+def best_of(repeat, fn, before=None):
+    result, best = None, float("inf")
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=100000)
+    parser.add_argument("--salaries", type=int, default=500, help="distinct gross amounts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    table = tax_table_for()
+    raw_scales = {
+        name: [(upper, str(a), str(b)) for upper, a, b in zip(scale.thresholds + [None], scale.a, scale.b)]
+        for name, scale in table.scales.items()
+    }
+    rng = random.Random(16)
+    salaries = [rng.randrange(50_000, 1_000_000) for _ in range(args.salaries)]
+    scales = list(set(TFN_STATUS_SCALES.values()))
+    employees = [(rng.choice(scales), rng.choice(salaries)) for _ in range(args.employees)]
+
+    paths = {
+        "rules": (lambda: [rule_withholding(raw_scales[s], "fortnightly", g) for s, g in employees], None),
+        "bisect": (lambda: [table.withholding_cents(s, "fortnightly", g) for s, g in employees],
+                   table.withholding_cents.cache_clear),
+        "memoized": (lambda: [table.withholding_cents(s, "fortnightly", g) for s, g in employees], None),
+    }
+
+    print(f"{args.employees} employees, {args.salaries} distinct salaries, table {table.version}\n")
+    expected = None
+    for name, (fn, before) in paths.items():
+        result, elapsed = best_of(args.repeat, fn, before)
+        expected = expected or result
+        status = "ok" if result == expected else "MISMATCH"
+        print(f"{name:>10}: {elapsed * 1000:9.2f} ms  {elapsed / args.employees * 1e9:8.0f} ns/employee  {status}")
+    print(f"\nmemo: {table.withholding_cents.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+XLSX export benchmark: in-memory workbook vs streamed write-only export.
+
+Seeds one company with --lines ledger lines in a throwaway SQLite file and
+writes the general ledger to .xlsx twice:
+
+  * workbook    - every row loaded with .all() and set cell by cell on a normal
+                  openpyxl Workbook (how scripts/generate_invoice_files.py used to work)
+  * streamed    - app.exports.export_xlsx: yield_per batches into a write-only workbook
+
+reporting wall time and the tracemalloc peak of each, then times batch
+invoicing of --invoices per-invoice workbooks with 1 and --workers processes.
+
+    python benchmarks/xlsx_export.py --lines 100000 --invoices 2000 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--invoices", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="xlsx-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from openpyxl import Workbook
+    from sqlalchemy import insert
+    from app import create_app, db
+    from app.models import Company, DocumentLineItem, FinancialRecord, Invoice
+    from app.exports import export_xlsx, generate_invoice_files
+    from app.ledger_categories import assign_category_ids
+    from app.money import Money
+
+    rng = random.Random(19)
+    start = date(2025, 7, 1)
+    app = create_app()
+    with app.app_context():
+        db.session.add(Company(name="Bench Co"))
+        db.session.commit()
+        rows = []
+        for i in range(args.lines):
+            amount = Money.from_cents(rng.randrange(100, 500_000))
+            is_income = i % 3 == 0
+            rows.append({
+                "company_id": 1, "date": start + timedelta(days=rng.randrange(365)), "description": f"Line {i}",
+                "debit": 0 if is_income else amount, "credit": amount if is_income else 0,
+                "type_of_income": "Sales" if is_income else None,
+                "type_of_expense": None if is_income else "Rent",
+            })
+        db.session.execute(insert(FinancialRecord.__table__), assign_category_ids(rows))
+        db.session.execute(insert(Invoice.__table__), [
+            {"company_id": 1, "client_name": f"Client {n}", "line_items": "[]", "total_amount": Money(110),
+             "due_date": start, "payment_status": "Pending"} for n in range(args.invoices)
+        ])
+        db.session.execute(insert(DocumentLineItem.__table__), [
+            {"company_id": 1, "document_type": "invoice", "document_id": n, "position": p, "description": f"Item {p}",
+             "quantity": 1, "unit_price_cents": 5500, "gst_code": "GST", "amount_cents": 5500, "gst_cents": 500}
+            for n in range(1, args.invoices + 1) for p in range(2)
+        ])
+        db.session.commit()
+        del rows
+
+        def in_memory():
+            records = db.session.query(FinancialRecord).filter_by(company_id=1).order_by(
+                FinancialRecord.date, FinancialRecord.id).all()
+            workbook = Workbook()
+            sheet = workbook.active
+            sheet.append(["Date", "Description", "Category", "Debit", "Credit", "Balance"])
+            balance = Money(0)
+            for r, record in enumerate(records, start=2):
+                balance += record.credit - record.debit
+                for c, value in enumerate((record.date, record.description, record.type_of_income or record.type_of_expense,
+                                           float(record.debit), float(record.credit), float(balance)), start=1):
+                    sheet.cell(row=r, column=c, value=value)
+            workbook.save(os.path.join(workdir, "in_memory.xlsx"))
+            db.session.expunge_all()
+
+        workbook_time, workbook_peak = measure(in_memory)
+        streamed_time, streamed_peak = measure(
+            lambda: export_xlsx("general_ledger", 1, os.path.join(workdir, "streamed.xlsx")))
+
+        started = time.perf_counter()
+        generate_invoice_files(1, os.path.join(workdir, "serial"))
+        serial = time.perf_counter() - started
+        started = time.perf_counter()
+        generate_invoice_files(1, os.path.join(workdir, "parallel"), workers=args.workers)
+        parallel = time.perf_counter() - started
+
+    mb = 1024 * 1024
+    print(f"general ledger, {args.lines} rows\n")
+    print(f"{'workbook':>10}: {workbook_time * 1000:9.1f} ms  peak {workbook_peak / mb:7.1f} MB")
+    print(f"{'streamed':>10}: {streamed_time * 1000:9.1f} ms  peak {streamed_peak / mb:7.1f} MB  "
+          f"(x{workbook_time / streamed_time:.1f} time, x{workbook_peak / streamed_peak:.1f} memory)")
+    print(f"\n{args.invoices} invoice files\n")
+    print(f"{'1 process':>10}: {serial * 1000:9.1f} ms")
+    print(f"{f'{args.workers} procs':>10}: {parallel * 1000:9.1f} ms  (incl. pool start-up, {os.cpu_count()} cores)")
+
+
+if __name__ == "__main__":
+    main()
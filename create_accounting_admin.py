@@ -1,35 +1,28 @@
 import os
-import sqlite3
-import hashlib
+from app import create_app, db
+from app.models import User
 
-# Resolve the absolute path to your database file
-db_path = os.path.join("instance", "app.db")
-print(f"Connecting directly to database binary file at: {db_path}")
+# Creates (or resets) the master admin account through the application's own
+# password policy, so the stored hash honours PASSWORD_HASH_METHOD.
+raw_password = os.environ.get("ADMIN_PASSWORD", "Admin123!")
 
-# Generate a secure fallback hash password matching standard auth workflows
-raw_password = "Admin123!"
-salt = os.urandom(16)
-password_hash_val = "pbkdf2:sha256:600000$" + hashlib.pbkdf2_hmac('sha256', raw_password.encode('utf-8'), salt, 600000).hex()
+app = create_app()
+print(f"Connecting to database at: {app.config['SQLALCHEMY_DATABASE_URI']}")
 
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+with app.app_context():
+    # Check if an admin account already exists to prevent duplicate key entries
+    existing_user = db.session.query(User).filter_by(username="admin").first()
 
-# Check if an admin account already exists to prevent duplicate key entries
-cursor.execute("SELECT id FROM user WHERE username = 'admin';")
-existing_user = cursor.fetchone()
-
-if not existing_user:
-    # 🧠 Injecting using only the exact three active columns: username, password
-    query = "INSERT INTO user (username, password) VALUES ('admin', ?);"
-    cursor.execute(query, (password_hash_val,))
-    conn.commit()
-    print("\n👑 MASTER ACCOUNT CREATION SUCCESSFUL!")
-    print("   👉 Username: admin")
-    print("   👉 Password: Admin123!")
-else:
-    print("\nℹ️ Account 'admin' already exists. Updating master password configuration...")
-    cursor.execute("UPDATE user SET password = ? WHERE username = 'admin';", (password_hash_val,))
-    conn.commit()
-    print("👑 Master password updated successfully!")
-
-conn.close()
+    if not existing_user:
+        admin = User(username="admin", role="Admin")
+        admin.set_password(raw_password)
+        db.session.add(admin)
+        db.session.commit()
+        print("\n👑 MASTER ACCOUNT CREATION SUCCESSFUL!")
+        print("   👉 Username: admin")
+        print(f"   👉 Password: {raw_password}")
+    else:
+        print("\nℹ️ Account 'admin' already exists. Updating master password configuration...")
+        existing_user.set_password(raw_password)
+        db.session.commit()
+        print("👑 Master password updated successfully!")
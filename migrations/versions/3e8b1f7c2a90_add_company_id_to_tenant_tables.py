@@ -0,0 +1,53 @@
+"""add company_id to tenant tables
+
+Revision ID: 3e8b1f7c2a90
+Revises: 9d14be6c2f80
+Create Date: 2026-10-18 14:05:37.512094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e8b1f7c2a90'
+down_revision = '9d14be6c2f80'
+branch_labels = None
+depends_on = None
+
+TENANT_TABLES = ('quotes', 'invoices', 'purchase_orders', 'bills', 'employee', 'payroll_run')
+
+
+def upgrade():
+    for table in TENANT_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('company_id', sa.Integer(), nullable=True))
+            batch_op.create_index(f'ix_{table}_company_id', ['company_id'], unique=False)
+            batch_op.create_foreign_key(f'fk_{table}_company_id_companies', 'companies', ['company_id'], ['id'])
+
+    # Existing rows were never tagged with a company. A single-company install can
+    # be attributed safely; otherwise rows stay NULL (hidden from scoped pages)
+    # until they are assigned by hand.
+    connection = op.get_bind()
+    company_ids = [row[0] for row in connection.execute(sa.text('SELECT id FROM companies'))]
+    if len(company_ids) == 1:
+        for table in TENANT_TABLES:
+            connection.execute(
+                sa.text(f'UPDATE {table} SET company_id = :company_id WHERE company_id IS NULL'),
+                {'company_id': company_ids[0]},
+            )
+    else:
+        # Pay runs inherit whatever company their employee was assigned
+        connection.execute(sa.text(
+            'UPDATE payroll_run SET company_id = '
+            '(SELECT employee.company_id FROM employee WHERE employee.id = payroll_run.employee_id) '
+            'WHERE company_id IS NULL'
+        ))
+
+
+def downgrade():
+    for table in reversed(TENANT_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_company_id_companies', type_='foreignkey')
+            batch_op.drop_index(f'ix_{table}_company_id')
+            batch_op.drop_column('company_id')
@@ -0,0 +1,26 @@
+"""add employee standard gross wages
+
+Revision ID: 5c7e2a91d3f4
+Revises: e41f9a6d0b58
+Create Date: 2026-10-18 17:32:48.511206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c7e2a91d3f4'
+down_revision = 'e41f9a6d0b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employee', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('standard_gross_wages', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('employee', schema=None) as batch_op:
+        batch_op.drop_column('standard_gross_wages')
@@ -0,0 +1,29 @@
+"""add financial records report indexes
+
+Revision ID: 7a3c5e019d42
+Revises: 4f2a9d31b7e6
+Create Date: 2026-10-18 11:26:52.904117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3c5e019d42'
+down_revision = '4f2a9d31b7e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('financial_records', schema=None) as batch_op:
+        batch_op.create_index('ix_financial_records_company_date', ['company_id', 'date'], unique=False)
+        batch_op.create_index('ix_financial_records_company_expense_date', ['company_id', 'type_of_expense', 'date'], unique=False)
+        batch_op.create_index('ix_financial_records_company_income_date', ['company_id', 'type_of_income', 'date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('financial_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_financial_records_company_income_date')
+        batch_op.drop_index('ix_financial_records_company_expense_date')
+        batch_op.drop_index('ix_financial_records_company_date')
@@ -0,0 +1,77 @@
+"""add ledger period balances
+
+Revision ID: 9d14be6c2f80
+Revises: 7a3c5e019d42
+Create Date: 2026-10-18 13:41:05.337190
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d14be6c2f80'
+down_revision = '7a3c5e019d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    balances = op.create_table('ledger_period_balances',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.Date(), nullable=False),
+    sa.Column('type_of_income', sa.String(length=50), nullable=False),
+    sa.Column('type_of_expense', sa.String(length=50), nullable=False),
+    sa.Column('debit', sa.Float(), nullable=False),
+    sa.Column('credit', sa.Float(), nullable=False),
+    sa.Column('gst_paid', sa.Float(), nullable=False),
+    sa.Column('gst_received', sa.Float(), nullable=False),
+    sa.Column('line_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id', 'period', 'type_of_income', 'type_of_expense', name='uq_ledger_period_balances_key')
+    )
+
+    # Backfill the snapshot from the existing ledger so reports stay correct after upgrade
+    records = sa.table('financial_records',
+        sa.column('company_id', sa.Integer()),
+        sa.column('date', sa.Date()),
+        sa.column('type_of_income', sa.String()),
+        sa.column('type_of_expense', sa.String()),
+        sa.column('debit', sa.Float()),
+        sa.column('credit', sa.Float()),
+        sa.column('gst_paid', sa.Float()),
+        sa.column('gst_received', sa.Float()),
+    )
+    year = sa.extract('year', records.c.date)
+    month = sa.extract('month', records.c.date)
+    income = sa.func.coalesce(records.c.type_of_income, '')
+    expense = sa.func.coalesce(records.c.type_of_expense, '')
+    grouped = op.get_bind().execute(
+        sa.select(
+            records.c.company_id, year, month, income, expense,
+            sa.func.coalesce(sa.func.sum(records.c.debit), 0.0),
+            sa.func.coalesce(sa.func.sum(records.c.credit), 0.0),
+            sa.func.coalesce(sa.func.sum(records.c.gst_paid), 0.0),
+            sa.func.coalesce(sa.func.sum(records.c.gst_received), 0.0),
+            sa.func.count(),
+        ).group_by(records.c.company_id, year, month, income, expense)
+    ).fetchall()
+    rows = [
+        {
+            'company_id': cid, 'period': date(int(y), int(m), 1),
+            'type_of_income': inc, 'type_of_expense': exp,
+            'debit': debit, 'credit': credit, 'gst_paid': gst_paid, 'gst_received': gst_received,
+            'line_count': count,
+        }
+        for cid, y, m, inc, exp, debit, credit, gst_paid, gst_received, count in grouped
+    ]
+    if rows:
+        op.bulk_insert(balances, rows)
+
+
+def downgrade():
+    op.drop_table('ledger_period_balances')
@@ -0,0 +1,105 @@
+"""add bas quarter balances
+
+Revision ID: a83f5d20c6e1
+Revises: 5c7e2a91d3f4
+Create Date: 2026-10-18 18:05:37.204419
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83f5d20c6e1'
+down_revision = '5c7e2a91d3f4'
+branch_labels = None
+depends_on = None
+
+
+def _quarter(value):
+    return date(value.year, (value.month - 1) // 3 * 3 + 1, 1)
+
+
+def upgrade():
+    balances = op.create_table('bas_quarter_balances',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('quarter', sa.Date(), nullable=False),
+    sa.Column('g1_total_sales', sa.BigInteger(), nullable=False),
+    sa.Column('gst_on_sales_1a', sa.BigInteger(), nullable=False),
+    sa.Column('g11_non_capital_purchases', sa.BigInteger(), nullable=False),
+    sa.Column('gst_on_purchases_1b', sa.BigInteger(), nullable=False),
+    sa.Column('w1_total_wages', sa.BigInteger(), nullable=False),
+    sa.Column('w2_amount_withheld', sa.BigInteger(), nullable=False),
+    sa.Column('ledger_lines', sa.Integer(), nullable=False),
+    sa.Column('payroll_runs', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id', 'quarter', name='uq_bas_quarter_balances_key')
+    )
+
+    # Backfill from the ledger itself and existing pay runs (all amounts are cents),
+    # grouped the way `flask bas rebuild` does
+    connection = op.get_bind()
+    totals = {}
+
+    def bucket(company_id, quarter):
+        return totals.setdefault((company_id, quarter), [0, 0, 0, 0, 0, 0, 0, 0])
+
+    records = sa.table('financial_records',
+        sa.column('id', sa.Integer()),
+        sa.column('company_id', sa.Integer()),
+        sa.column('date', sa.Date()),
+        sa.column('type_of_income', sa.String()),
+        sa.column('type_of_expense', sa.String()),
+        sa.column('debit', sa.BigInteger()),
+        sa.column('credit', sa.BigInteger()),
+        sa.column('gst_paid', sa.BigInteger()),
+        sa.column('gst_received', sa.BigInteger()),
+    )
+    year = sa.extract('year', records.c.date)
+    month = sa.extract('month', records.c.date)
+    ledger = connection.execute(
+        sa.select(
+            records.c.company_id, year, month,
+            sa.func.coalesce(sa.func.sum(sa.case((records.c.type_of_income != '', records.c.credit), else_=0)), 0),
+            sa.func.coalesce(sa.func.sum(records.c.gst_received), 0),
+            sa.func.coalesce(sa.func.sum(sa.case((records.c.type_of_expense != '', records.c.debit), else_=0)), 0),
+            sa.func.coalesce(sa.func.sum(records.c.gst_paid), 0),
+            sa.func.count(records.c.id),
+        ).group_by(records.c.company_id, year, month)
+    )
+    for company_id, y, m, g1, gst_sales, g11, gst_purchases, lines in ledger:
+        row = bucket(company_id, _quarter(date(int(y), int(m), 1)))
+        for i, amount in enumerate((g1, gst_sales, g11, gst_purchases)):
+            row[i] += int(amount or 0)
+        row[6] += lines
+
+    payroll = connection.execute(sa.text(
+        "SELECT company_id, pay_period_end, SUM(gross_wages), SUM(payg_withholding), COUNT(*) "
+        "FROM payroll_run WHERE company_id IS NOT NULL GROUP BY company_id, pay_period_end"
+    ))
+    for company_id, period_end, gross, withheld, count in payroll:
+        try:
+            quarter = _quarter(datetime.strptime(period_end, "%Y-%m-%d").date())
+        except (TypeError, ValueError):
+            continue
+        row = bucket(company_id, quarter)
+        row[4] += int(gross or 0)
+        row[5] += int(withheld or 0)
+        row[7] += count
+
+    fields = ('g1_total_sales', 'gst_on_sales_1a', 'g11_non_capital_purchases', 'gst_on_purchases_1b',
+              'w1_total_wages', 'w2_amount_withheld', 'ledger_lines', 'payroll_runs')
+    rows = [
+        dict(zip(fields, amounts), company_id=company_id, quarter=quarter)
+        for (company_id, quarter), amounts in totals.items()
+    ]
+    if rows:
+        op.bulk_insert(balances, rows)
+
+
+def downgrade():
+    op.drop_table('bas_quarter_balances')
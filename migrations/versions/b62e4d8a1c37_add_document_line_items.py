@@ -0,0 +1,204 @@
+"""add document line items
+
+Revision ID: b62e4d8a1c37
+Revises: 3e8b1f7c2a90
+Create Date: 2026-10-18 15:21:09.331870
+
+"""
+import re
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b62e4d8a1c37'
+down_revision = '3e8b1f7c2a90'
+branch_labels = None
+depends_on = None
+
+# document_type -> source table
+DOCUMENT_TABLES = {
+    'invoice': 'invoices',
+    'bill': 'bills',
+    'quote': 'quotes',
+    'purchase_order': 'purchase_orders',
+}
+BATCH_SIZE = 500
+
+# Frozen copy of the app.line_items parser as of this revision, so later changes
+# to the application code never change what this migration backfills.
+
+GST_CODES = {
+    'GST': 'GST',
+    'FRE': 'FRE',
+    'GST FREE': 'FRE',
+    'GST-FREE': 'FRE',
+    'EXEMPT': 'FRE',
+    'N-T': 'N-T',
+}
+UNITEMISED_DESCRIPTION = 'Unitemised balance'
+
+ParsedLine = namedtuple(
+    'ParsedLine',
+    'description quantity unit_price_cents gst_code amount_cents gst_cents priced',
+)
+
+_LINE_PATTERN = re.compile(
+    r'^(?:(?P<qty>\d+(?:\.\d+)?)\s*[xX×*]\s*)?'
+    r'(?P<desc>.+?)'
+    r'(?:\s*[@:=,\-–]?\s*\$?(?P<price>-?\d[\d,]*(?:\.\d{1,2})?))?'
+    r'(?:\s*[(\[]?(?P<gst>GST[- ]FREE|GST|FRE|N-T|EXEMPT)[)\]]?)?$',
+    re.IGNORECASE,
+)
+_BULLET = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+
+
+def to_cents(value):
+    """Dollars (str, float or Decimal) to integer cents, rounding half up."""
+    try:
+        amount = Decimal(str(value).replace(',', '').replace('$', '').strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {value!r}")
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def _gst_component(amount_cents, gst_code):
+    if gst_code != 'GST':
+        return 0
+    return int((Decimal(amount_cents) / 11).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def _line(description, quantity, unit_price_cents, gst_code, amount_cents, priced):
+    return ParsedLine(description[:255], quantity, unit_price_cents, gst_code,
+                      amount_cents, _gst_component(amount_cents, gst_code), priced)
+
+
+def _parse_one(text):
+    text = _BULLET.sub('', text).strip()
+    match = _LINE_PATTERN.match(text)
+    if not match or not match.group('desc').strip(' -:@'):
+        return _line(text, Decimal(1), 0, 'GST', 0, False)
+
+    quantity = Decimal(match.group('qty')) if match.group('qty') else Decimal(1)
+    gst_code = GST_CODES[match.group('gst').upper()] if match.group('gst') else 'GST'
+    description = match.group('desc').strip(' -:@,')
+    if match.group('price') is None:
+        return _line(description, quantity, 0, gst_code, 0, False)
+
+    unit_price_cents = to_cents(match.group('price'))
+    amount_cents = int((quantity * unit_price_cents).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    return _line(description, quantity, unit_price_cents, gst_code, amount_cents, True)
+
+
+def parse_line_items(text, total_cents=None):
+    """Parses a line_items blob into ParsedLines, reconciled against total_cents when given."""
+    raw = [part.strip() for part in (text or '').splitlines() if part.strip()]
+    if len(raw) == 1 and ';' in raw[0]:
+        raw = [part.strip() for part in raw[0].split(';') if part.strip()]
+    lines = [_parse_one(part) for part in raw]
+
+    if total_cents is None:
+        return lines
+
+    remainder = total_cents - sum(line.amount_cents for line in lines)
+    unpriced = [i for i, line in enumerate(lines) if not line.priced]
+    if remainder and len(unpriced) == 1:
+        i = unpriced[0]
+        line = lines[i]
+        unit = int((Decimal(remainder) / line.quantity).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+        lines[i] = _line(line.description, line.quantity, unit, line.gst_code, remainder, True)
+    elif remainder:
+        lines.append(_line(UNITEMISED_DESCRIPTION, Decimal(1), remainder, 'GST', remainder, True))
+    return lines
+
+
+def line_item_rows(document_type, document_id, company_id, text, total_cents=None):
+    """Insert-ready dicts for document_line_items."""
+    return [
+        {
+            'company_id': company_id,
+            'document_type': document_type,
+            'document_id': document_id,
+            'position': position,
+            'description': line.description,
+            'quantity': line.quantity,
+            'unit_price_cents': line.unit_price_cents,
+            'gst_code': line.gst_code,
+            'amount_cents': line.amount_cents,
+            'gst_cents': line.gst_cents,
+        }
+        for position, line in enumerate(parse_line_items(text, total_cents))
+    ]
+
+
+def upgrade():
+    op.create_table('document_line_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('document_type', sa.String(length=20), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=12, scale=3), nullable=False),
+    sa.Column('unit_price_cents', sa.BigInteger(), nullable=False),
+    sa.Column('gst_code', sa.String(length=10), nullable=False),
+    sa.Column('amount_cents', sa.BigInteger(), nullable=False),
+    sa.Column('gst_cents', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('document_line_items', schema=None) as batch_op:
+        batch_op.create_index('ix_document_line_items_company_id', ['company_id'], unique=False)
+        batch_op.create_index('ix_document_line_items_document', ['document_type', 'document_id', 'position'], unique=False)
+        batch_op.create_index('ix_document_line_items_company_description', ['company_id', 'document_type', 'description'], unique=False)
+        batch_op.create_index('ix_document_line_items_company_gst_code', ['company_id', 'document_type', 'gst_code'], unique=False)
+
+    _backfill_line_items()
+
+
+def _backfill_line_items():
+    """Parses every existing line_items blob, BATCH_SIZE documents per round trip (keyset on id)."""
+    connection = op.get_bind()
+    items = sa.table(
+        'document_line_items',
+        sa.column('company_id', sa.Integer()),
+        sa.column('document_type', sa.String()),
+        sa.column('document_id', sa.Integer()),
+        sa.column('position', sa.Integer()),
+        sa.column('description', sa.String()),
+        sa.column('quantity', sa.Numeric(precision=12, scale=3)),
+        sa.column('unit_price_cents', sa.BigInteger()),
+        sa.column('gst_code', sa.String()),
+        sa.column('amount_cents', sa.BigInteger()),
+        sa.column('gst_cents', sa.BigInteger()),
+    )
+
+    for document_type, table in DOCUMENT_TABLES.items():
+        last_id = 0
+        while True:
+            documents = connection.execute(sa.text(
+                f'SELECT id, company_id, line_items, total_amount FROM {table} '
+                'WHERE id > :last_id ORDER BY id LIMIT :batch'
+            ), {'last_id': last_id, 'batch': BATCH_SIZE}).fetchall()
+            if not documents:
+                break
+
+            rows = []
+            for document_id, company_id, text, total_amount in documents:
+                total_cents = to_cents(total_amount) if total_amount is not None else None
+                rows.extend(line_item_rows(document_type, document_id, company_id, text, total_cents))
+            if rows:
+                connection.execute(items.insert(), rows)
+            last_id = documents[-1][0]
+
+
+def downgrade():
+    with op.batch_alter_table('document_line_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_document_line_items_company_gst_code')
+        batch_op.drop_index('ix_document_line_items_company_description')
+        batch_op.drop_index('ix_document_line_items_document')
+        batch_op.drop_index('ix_document_line_items_company_id')
+    op.drop_table('document_line_items')
@@ -0,0 +1,29 @@
+"""add ledger versions
+
+Revision ID: d27b6f0e9a14
+Revises: a83f5d20c6e1
+Create Date: 2026-10-18 19:12:48.530917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd27b6f0e9a14'
+down_revision = 'a83f5d20c6e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ledger_versions',
+    sa.Column('company_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+
+
+def downgrade():
+    op.drop_table('ledger_versions')
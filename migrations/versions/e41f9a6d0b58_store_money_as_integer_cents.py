@@ -0,0 +1,192 @@
+"""store money as integer cents
+
+Revision ID: e41f9a6d0b58
+Revises: b62e4d8a1c37
+Create Date: 2026-10-18 16:40:12.087533
+
+"""
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41f9a6d0b58'
+down_revision = 'b62e4d8a1c37'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# table -> [(column, nullable, previous type)]
+MONEY_COLUMNS = {
+    'financial_records': [
+        ('debit', True, sa.Float()),
+        ('credit', True, sa.Float()),
+        ('net_expenses', True, sa.Float()),
+        ('gst_paid', True, sa.Float()),
+        ('net_income', True, sa.Float()),
+        ('gst_received', True, sa.Float()),
+        ('balance', True, sa.Float()),
+    ],
+    'payroll_run': [
+        ('gross_wages', False, sa.Float()),
+        ('payg_withholding', False, sa.Float()),
+        ('super_guarantee', False, sa.Float()),
+        ('net_pay', False, sa.Float()),
+    ],
+    'payroll_records': [
+        ('gross_wages', False, sa.Float()),
+        ('payg_withholding', True, sa.Float()),
+        ('superannuation', True, sa.Float()),
+        ('deductions', True, sa.Float()),
+        ('net_pay', False, sa.Float()),
+    ],
+    'quotes': [('total_amount', False, sa.Float())],
+    'invoices': [('total_amount', False, sa.Float())],
+    'purchase_orders': [('total_amount', False, sa.Float())],
+    'bills': [('total_amount', False, sa.Float())],
+    'assets_liabilities': [('amount', False, sa.Numeric(precision=10, scale=2))],
+    'equities': [('amount', False, sa.Numeric(precision=10, scale=2))],
+}
+
+# The monthly snapshots are sums of ledger lines, so they are regrouped from the
+# converted ledger instead: rounding each float sum would not match the sum of
+# the rounded lines (25 x 2.675 is 66.88 rounded, 67.00 line by line).
+SNAPSHOT_COLUMNS = [
+    ('debit', False, sa.Float()),
+    ('credit', False, sa.Float()),
+    ('gst_paid', False, sa.Float()),
+    ('gst_received', False, sa.Float()),
+]
+
+
+def _to_cents(value):
+    # Frozen copy of app.money's rule: floats at their shortest repr, halves away from zero
+    if value is None:
+        return None
+    if isinstance(value, float):
+        value = Decimal(repr(value))
+    elif not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int((value * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _convert_to_cents(table, columns):
+    """
+    Fills each <column>_new with the column's value in integer cents, in id-ordered
+    batches. Done in Python rather than with SQL ROUND(x * 100), which works on
+    the binary float and turns values such as 1.005 or 2.675 into 100 and 267
+    where Money has 101 and 268.
+    """
+    connection = op.get_bind()
+    names = [column for column, _, _ in columns]
+    source = sa.table(table, sa.column('id', sa.Integer()), *(sa.column(name) for name in names))
+    target = sa.table(table, sa.column('id', sa.Integer()),
+                      *(sa.column(f'{name}_new', sa.BigInteger()) for name in names))
+    update = target.update().where(target.c.id == sa.bindparam('row_id')).values(
+        {f'{name}_new': sa.bindparam(f'{name}_cents') for name in names})
+    after = None
+    while True:
+        query = sa.select(source.c.id, *(source.c[name] for name in names)).order_by(source.c.id).limit(BATCH_SIZE)
+        if after is not None:
+            query = query.where(source.c.id > after)
+        rows = connection.execute(query).fetchall()
+        if not rows:
+            return
+        connection.execute(update, [
+            {'row_id': row[0], **{f'{name}_cents': _to_cents(value) for name, value in zip(names, row[1:])}}
+            for row in rows
+        ])
+        after = rows[-1][0]
+
+
+def _swap_columns(table, columns, new_type, fill):
+    """
+    Adds <column>_new of new_type, fills it with fill(table, columns), then drops
+    the old column and renames the new one into its place.
+    """
+    with op.batch_alter_table(table, schema=None) as batch_op:
+        for column, _, _ in columns:
+            batch_op.add_column(sa.Column(f'{column}_new', new_type, nullable=True))
+
+    fill(table, columns)
+
+    with op.batch_alter_table(table, schema=None) as batch_op:
+        for column, nullable, _ in columns:
+            batch_op.drop_column(column)
+            batch_op.alter_column(f'{column}_new', new_column_name=column,
+                                  existing_type=new_type, nullable=nullable)
+
+
+def _regroup_period_balances():
+    """Refills ledger_period_balances from financial_records cents (the GROUP BY of `flask ledger rebuild-balances`)."""
+    records = sa.table('financial_records',
+        sa.column('company_id', sa.Integer()),
+        sa.column('date', sa.Date()),
+        sa.column('type_of_income', sa.String()),
+        sa.column('type_of_expense', sa.String()),
+        sa.column('debit', sa.BigInteger()),
+        sa.column('credit', sa.BigInteger()),
+        sa.column('gst_paid', sa.BigInteger()),
+        sa.column('gst_received', sa.BigInteger()),
+    )
+    balances = sa.table('ledger_period_balances',
+        sa.column('company_id', sa.Integer()),
+        sa.column('period', sa.Date()),
+        sa.column('type_of_income', sa.String()),
+        sa.column('type_of_expense', sa.String()),
+        sa.column('debit', sa.BigInteger()),
+        sa.column('credit', sa.BigInteger()),
+        sa.column('gst_paid', sa.BigInteger()),
+        sa.column('gst_received', sa.BigInteger()),
+        sa.column('line_count', sa.Integer()),
+    )
+    year = sa.extract('year', records.c.date)
+    month = sa.extract('month', records.c.date)
+    income = sa.func.coalesce(records.c.type_of_income, '')
+    expense = sa.func.coalesce(records.c.type_of_expense, '')
+    grouped = op.get_bind().execute(
+        sa.select(
+            records.c.company_id, year, month, income, expense,
+            sa.func.coalesce(sa.func.sum(records.c.debit), 0),
+            sa.func.coalesce(sa.func.sum(records.c.credit), 0),
+            sa.func.coalesce(sa.func.sum(records.c.gst_paid), 0),
+            sa.func.coalesce(sa.func.sum(records.c.gst_received), 0),
+            sa.func.count(),
+        ).group_by(records.c.company_id, year, month, income, expense)
+    ).fetchall()
+    rows = [
+        {
+            'company_id': cid, 'period': date(int(y), int(m), 1),
+            'type_of_income': inc, 'type_of_expense': exp,
+            'debit': debit, 'credit': credit, 'gst_paid': gst_paid, 'gst_received': gst_received,
+            'line_count': count,
+        }
+        for cid, y, m, inc, exp, debit, credit, gst_paid, gst_received, count in grouped
+    ]
+    if rows:
+        op.bulk_insert(balances, rows)
+
+
+def _convert_from_cents(table, columns):
+    assignments = ', '.join(f'{column}_new = {column} / 100.0' for column, _, _ in columns)
+    op.execute(f'UPDATE {table} SET {assignments}')
+
+
+def upgrade():
+    for table, columns in MONEY_COLUMNS.items():
+        _swap_columns(table, columns, sa.BigInteger(), _convert_to_cents)
+
+    op.execute('DELETE FROM ledger_period_balances')
+    _swap_columns('ledger_period_balances', SNAPSHOT_COLUMNS, sa.BigInteger(), lambda table, columns: None)
+    _regroup_period_balances()
+
+
+def downgrade():
+    for table, columns in MONEY_COLUMNS.items():
+        previous_type = columns[0][2]
+        _swap_columns(table, columns, previous_type, _convert_from_cents)
+    _swap_columns('ledger_period_balances', SNAPSHOT_COLUMNS, sa.Float(), _convert_from_cents)
@@ -0,0 +1,241 @@
+"""add ledger categories
+
+Revision ID: f3a81c6d5b27
+Revises: d27b6f0e9a14
+Create Date: 2026-10-18 20:26:14.905316
+
+"""
+from collections import Counter
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a81c6d5b27'
+down_revision = 'd27b6f0e9a14'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+# kind -> (text column, id column), mirroring app.ledger_categories
+KINDS = {
+    'income': ('type_of_income', 'income_category_id'),
+    'expense': ('type_of_expense', 'expense_category_id'),
+}
+# (kind, name, account code) of the chart-of-accounts groups
+GROUPS = (('income', 'Income', '4-0000'), ('expense', 'Cost of Sales', '5-0000'), ('expense', 'Expenses', '6-0000'))
+COGS = 'COGS'
+
+
+def _normalize(name):
+    return ' '.join((name or '').split())
+
+
+def _group_name(kind, name):
+    if kind == 'expense':
+        return 'Cost of Sales' if name.casefold() == COGS.casefold() else 'Expenses'
+    return 'Income'
+
+
+def _create_categories(connection, categories, records):
+    """
+    One category per distinct type text (case and whitespace folded), named after
+    its most common spelling. Returns [(kind, raw text, category id, name)].
+    """
+    ids = {}
+    for kind, name, account_code in GROUPS:
+        ids[(kind, name.casefold())] = (connection.execute(categories.insert().values(
+            kind=kind, name=name, parent_id=None, account_code=account_code,
+        )).inserted_primary_key[0], name)
+
+    aliases = []
+    for kind, (text_column, _) in KINDS.items():
+        column = records.c[text_column]
+        counts = connection.execute(sa.select(column, sa.func.count()).where(column.isnot(None)).group_by(column)).all()
+        spellings = {}
+        for raw, count in counts:
+            name = _normalize(raw)
+            if name:
+                spellings.setdefault(name.casefold(), Counter())[name] += count
+        for key, names in sorted(spellings.items()):
+            name = sorted(names.items(), key=lambda item: (-item[1], item[0]))[0][0]
+            if (kind, key) not in ids:
+                parent_id = ids[(kind, _group_name(kind, name).casefold())][0]
+                ids[(kind, key)] = (connection.execute(categories.insert().values(
+                    kind=kind, name=name, parent_id=parent_id, account_code=None,
+                )).inserted_primary_key[0], name)
+        for raw, _ in counts:
+            key = _normalize(raw).casefold()
+            if key:
+                category_id, name = ids[(kind, key)]
+                aliases.append({'kind': kind, 'raw': raw, 'category_id': category_id, 'name': name})
+    return aliases
+
+
+def _rebuild_period_balances(connection):
+    """Refills ledger_period_balances from the ledger, keyed on the category ids (0 when unset)."""
+    records = sa.table('financial_records',
+        sa.column('company_id', sa.Integer()),
+        sa.column('date', sa.Date()),
+        sa.column('income_category_id', sa.Integer()),
+        sa.column('expense_category_id', sa.Integer()),
+        sa.column('debit', sa.BigInteger()),
+        sa.column('credit', sa.BigInteger()),
+        sa.column('gst_paid', sa.BigInteger()),
+        sa.column('gst_received', sa.BigInteger()),
+    )
+    balances = sa.table('ledger_period_balances',
+        sa.column('company_id', sa.Integer()),
+        sa.column('period', sa.Date()),
+        sa.column('income_category_id', sa.Integer()),
+        sa.column('expense_category_id', sa.Integer()),
+        sa.column('debit', sa.BigInteger()),
+        sa.column('credit', sa.BigInteger()),
+        sa.column('gst_paid', sa.BigInteger()),
+        sa.column('gst_received', sa.BigInteger()),
+        sa.column('line_count', sa.Integer()),
+    )
+    year = sa.extract('year', records.c.date)
+    month = sa.extract('month', records.c.date)
+    income = sa.func.coalesce(records.c.income_category_id, 0)
+    expense = sa.func.coalesce(records.c.expense_category_id, 0)
+    grouped = connection.execute(
+        sa.select(
+            records.c.company_id, year, month, income, expense,
+            sa.func.coalesce(sa.func.sum(records.c.debit), 0),
+            sa.func.coalesce(sa.func.sum(records.c.credit), 0),
+            sa.func.coalesce(sa.func.sum(records.c.gst_paid), 0),
+            sa.func.coalesce(sa.func.sum(records.c.gst_received), 0),
+            sa.func.count(),
+        ).group_by(records.c.company_id, year, month, income, expense)
+    ).fetchall()
+    rows = [
+        {
+            'company_id': cid, 'period': date(int(y), int(m), 1),
+            'income_category_id': inc, 'expense_category_id': exp,
+            'debit': debit, 'credit': credit, 'gst_paid': gst_paid, 'gst_received': gst_received,
+            'line_count': count,
+        }
+        for cid, y, m, inc, exp, debit, credit, gst_paid, gst_received, count in grouped
+    ]
+    if rows:
+        op.bulk_insert(balances, rows)
+
+
+def upgrade():
+    categories = op.create_table('ledger_categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('account_code', sa.String(length=20), nullable=True),
+    sa.ForeignKeyConstraint(['parent_id'], ['ledger_categories.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'name', name='uq_ledger_categories_kind_name')
+    )
+    with op.batch_alter_table('financial_records', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expense_category_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('income_category_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_financial_records_expense_category_id', 'ledger_categories',
+                                    ['expense_category_id'], ['id'])
+        batch_op.create_foreign_key('fk_financial_records_income_category_id', 'ledger_categories',
+                                    ['income_category_id'], ['id'])
+        # The report indexes move from the type text to the integer keys
+        batch_op.drop_index('ix_financial_records_company_income_date')
+        batch_op.drop_index('ix_financial_records_company_expense_date')
+        batch_op.create_index('ix_financial_records_company_expense_date',
+                              ['company_id', 'expense_category_id', 'date'], unique=False)
+        batch_op.create_index('ix_financial_records_company_income_date',
+                              ['company_id', 'income_category_id', 'date'], unique=False)
+
+    # The monthly snapshots are keyed on the category ids too; emptied here and
+    # regrouped from the ledger once the ids are filled in.
+    op.execute('DELETE FROM ledger_period_balances')
+    with op.batch_alter_table('ledger_period_balances', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_ledger_period_balances_key', type_='unique')
+        batch_op.drop_column('type_of_income')
+        batch_op.drop_column('type_of_expense')
+        batch_op.add_column(sa.Column('income_category_id', sa.Integer(), nullable=False))
+        batch_op.add_column(sa.Column('expense_category_id', sa.Integer(), nullable=False))
+        batch_op.create_unique_constraint('uq_ledger_period_balances_key',
+                                          ['company_id', 'period', 'income_category_id', 'expense_category_id'])
+
+    # Backfill: categories from the distinct type text, then the ledger in id-range
+    # batches through a scratch alias table (one UPDATE per kind per batch).
+    connection = op.get_bind()
+    records = sa.table('financial_records',
+        sa.column('id', sa.Integer()),
+        sa.column('type_of_income', sa.String()),
+        sa.column('type_of_expense', sa.String()),
+        sa.column('income_category_id', sa.Integer()),
+        sa.column('expense_category_id', sa.Integer()),
+    )
+    aliases = op.create_table('ledger_category_aliases',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('raw', sa.String(length=50), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'raw')
+    )
+    alias_rows = _create_categories(connection, categories, records)
+    if alias_rows:
+        op.bulk_insert(aliases, alias_rows)
+
+        first, last = connection.execute(sa.select(sa.func.min(records.c.id), sa.func.max(records.c.id))).one()
+        for low in range(first, last + 1, BATCH_SIZE):
+            in_batch = records.c.id.between(low, low + BATCH_SIZE - 1)
+            for kind, (text_column, id_column) in KINDS.items():
+                match = (aliases.c.kind == kind) & (aliases.c.raw == records.c[text_column])
+                connection.execute(records.update().where(in_batch, records.c[text_column].isnot(None)).values({
+                    id_column: sa.select(aliases.c.category_id).where(match).scalar_subquery(),
+                    text_column: sa.select(aliases.c.name).where(match).scalar_subquery(),
+                }))
+    op.drop_table('ledger_category_aliases')
+    _rebuild_period_balances(connection)
+
+
+def downgrade():
+    # Snapshot rows go back to the category names as type text ('' for no category)
+    with op.batch_alter_table('ledger_period_balances', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('type_of_income', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('type_of_expense', sa.String(length=50), nullable=True))
+    balances = sa.table('ledger_period_balances',
+        sa.column('income_category_id', sa.Integer()),
+        sa.column('expense_category_id', sa.Integer()),
+        sa.column('type_of_income', sa.String()),
+        sa.column('type_of_expense', sa.String()),
+    )
+    categories = sa.table('ledger_categories', sa.column('id', sa.Integer()), sa.column('name', sa.String()))
+
+    def category_name(id_column):
+        return sa.func.coalesce(sa.select(categories.c.name).where(categories.c.id == id_column).scalar_subquery(), '')
+
+    op.get_bind().execute(balances.update().values(
+        type_of_income=category_name(balances.c.income_category_id),
+        type_of_expense=category_name(balances.c.expense_category_id),
+    ))
+    with op.batch_alter_table('ledger_period_balances', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_ledger_period_balances_key', type_='unique')
+        batch_op.drop_column('income_category_id')
+        batch_op.drop_column('expense_category_id')
+        batch_op.alter_column('type_of_income', existing_type=sa.String(length=50), nullable=False)
+        batch_op.alter_column('type_of_expense', existing_type=sa.String(length=50), nullable=False)
+        batch_op.create_unique_constraint('uq_ledger_period_balances_key',
+                                          ['company_id', 'period', 'type_of_income', 'type_of_expense'])
+
+    # Ledger type text stays in its normalised spelling
+    with op.batch_alter_table('financial_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_financial_records_company_income_date')
+        batch_op.drop_index('ix_financial_records_company_expense_date')
+        batch_op.create_index('ix_financial_records_company_expense_date',
+                              ['company_id', 'type_of_expense', 'date'], unique=False)
+        batch_op.create_index('ix_financial_records_company_income_date',
+                              ['company_id', 'type_of_income', 'date'], unique=False)
+        batch_op.drop_constraint('fk_financial_records_income_category_id', type_='foreignkey')
+        batch_op.drop_constraint('fk_financial_records_expense_category_id', type_='foreignkey')
+        batch_op.drop_column('income_category_id')
+        batch_op.drop_column('expense_category_id')
+    op.drop_table('ledger_categories')
@@ -0,0 +1,122 @@
+"""
+Query-plan regression check for the ledger reporting paths.
+
+Drives the P&L, cash flow and general ledger routes against a seeded in-memory
+SQLite database, captures every SELECT they issue against financial_records or
+the ledger_period_balances snapshot and runs EXPLAIN QUERY PLAN on it. Exits
+non-zero if any of those statements falls back to a full table scan: ledger
+steps must use one of the ix_financial_records_* indexes and snapshot steps
+must use the snapshot key index.
+
+    python scripts/check_query_plans.py
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from sqlalchemy import event, text
+from app import create_app, db
+from app.models import Company, FinancialRecord
+
+# Table name -> index name fragment every plan step on that table must use
+REQUIRED_INDEXES = {
+    "financial_records": "ix_financial_records_",
+    "ledger_period_balances": "ledger_period_balances",
+}
+
+# Ranges start and end mid-month so both the closed-month snapshot read and the
+# live ledger scan of the partial edge months are planned
+ROUTES = {
+    "profit_loss": "/profit_loss?company_id={cid}&date_from=2025-08-15&date_to=2026-03-20",
+    "cash_flow": "/cash_flow?company_id={cid}&date_from=2025-08-15&date_to=2026-03-20&json=true",
+    "general_ledger": "/general_ledger_form?company_id={cid}",
+}
+
+
+def seed(company_count=3, lines_per_company=400):
+    start = date(2025, 7, 1)
+    for n in range(company_count):
+        company = Company(name=f"Plan Check {n}", abn_number=str(n))
+        db.session.add(company)
+        db.session.flush()
+        for i in range(lines_per_company):
+            is_income = i % 3 == 0
+            db.session.add(FinancialRecord(
+                company_id=company.id,
+                date=start + timedelta(days=i % 365),
+                description=f"Line {i}",
+                debit=0.0 if is_income else 10.0,
+                credit=25.0 if is_income else 0.0,
+                type_of_income="Sales" if is_income else None,
+                type_of_expense=None if is_income else ("COGS" if i % 3 == 1 else "Rent"),
+            ))
+    db.session.commit()
+    # Give the planner real statistics, as a production database would have
+    db.session.execute(text("ANALYZE"))
+    return db.session.query(Company.id).first()[0]
+
+
+def capture_statements(client, url):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and any(t in statement for t in REQUIRED_INDEXES):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    if response.status_code != 200:
+        raise SystemExit(f"{url} returned HTTP {response.status_code}")
+    return statements
+
+
+def explain(statement, parameters):
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def main():
+    app = create_app()
+    failures = 0
+
+    with app.app_context():
+        company_id = seed()
+        client = app.test_client()
+
+        for name, url in ROUTES.items():
+            statements = capture_statements(client, url.format(cid=company_id))
+            if not statements:
+                print(f"[FAIL] {name}: no ledger query captured")
+                failures += 1
+                continue
+
+            for statement, parameters in statements:
+                plan = explain(statement, parameters)
+                table_steps = [
+                    (step, index) for step in plan
+                    for table, index in REQUIRED_INDEXES.items() if f" {table} " in f"{step} "
+                ]
+                uses_index = table_steps and all(f"INDEX {index}" in step or f"INDEX sqlite_autoindex_{index}" in step
+                                                 for step, index in table_steps)
+                print(f"[{'OK' if uses_index else 'FAIL'}] {name}")
+                for step in plan:
+                    print(f"       {step}")
+                if not uses_index:
+                    failures += 1
+
+    if failures:
+        print(f"\n{failures} report quer{'y' if failures == 1 else 'ies'} not using the ledger indexes.")
+        sys.exit(1)
+    print("\nAll report queries use the ledger indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Golden-case check for the PAYG withholding tables.
+
+Loads every tax table in app/data/tax_tables and recomputes each case in
+app/data/tax_tables/golden/*.json ([version, scale, frequency, gross,
+withholding]). Exits non-zero if any amount differs, so a data file edit or a
+change to the lookup can't silently move anyone's withholding.
+
+    python scripts/check_tax_tables.py
+"""
+import glob
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.money import Money
+from app.tax_tables import GOLDEN_CASES_DIR, tax_table_version
+
+
+def main():
+    failures = checked = 0
+    for path in sorted(glob.glob(os.path.join(GOLDEN_CASES_DIR, "*.json"))):
+        with open(path, encoding="utf-8") as fh:
+            cases = json.load(fh)["cases"]
+        for version, scale, frequency, gross, expected in cases:
+            checked += 1
+            actual = Money.from_cents(tax_table_version(version).withholding_cents(scale, frequency, Money(gross).cents))
+            if actual != Money(expected):
+                failures += 1
+                print(f"FAIL {os.path.basename(path)}: {version} {scale} {frequency} gross {gross}: "
+                      f"expected {expected}, got {actual}")
+
+    print(f"{checked} withholding cases checked, {failures} failed")
+    return 1 if failures or not checked else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,51 +1,40 @@
-import openpyxl
+"""
+Batch invoicing: writes one Invoice_<id>.xlsx per invoice of a company.
+
+Invoices and their parsed line items are read from the database in chunks
+(app.exports.generate_invoice_files) and each workbook is written in openpyxl
+write-only mode; --workers spreads the chunks over a process pool. Totals are
+stored as values computed from the line items rather than as cell formulas.
+
+    python scripts/generate_invoice_files.py --company-id 1 --output-dir invoices/ [--invoice-id 7 ...] [--workers 4]
+"""
+import argparse
 import os
-from datetime import datetime
-
-script_dir = os.path.dirname(__file__)  
-
-def create_invoice(invoice_number, client_name):
-    """Creates a separate invoice file for each transaction."""
-    file_name = f"Invoice_{invoice_number}.xlsx"
-    excel_path = os.path.join(script_dir, file_name)
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Invoice"
-
-    # ✅ Invoice Metadata (Top)
-    ws["A1"] = "Invoice Number:"
-    ws["B1"] = invoice_number
-    ws["A2"] = "Date:"
-    ws["B2"] = datetime.today().strftime('%Y-%m-%d')
-
-    # ✅ Client Details
-    ws["A4"] = "Client Name:"
-    ws["B4"] = client_name
-    ws["A5"] = "Address:"
-    ws["B5"] = "Client Address"
-    ws["A6"] = "Contact:"
-    ws["B6"] = "Client Contact"
-
-    # ✅ Column Headers (Invoice Table)
-    headers = ["Date", "Description", "Rate", "Quantity", "GST (10%)", "Total"]
-    ws.append([""])  # Blank row for spacing
-    ws.append(headers)
-
-    # ✅ Auto-filled formulas for GST & Total
-    for row in range(9, 20):  # Pre-format rows for future invoices
-        ws.cell(row=row, column=5).value = f"=0.10*D{row}"  # GST formula
-        ws.cell(row=row, column=6).value = f"=C{row}*D{row}"  # Total formula
-
-    # ✅ Grand Total Calculation
-    ws["D21"] = "Total GST Sum:"
-    ws["E21"] = "=SUM(E9:E19)"
-    ws["D22"] = "Grand Total:"
-    ws["E22"] = "=SUM(F9:F19) + SUM(E9:E19)"
-
-    # Save as separate invoice file
-    wb.save(excel_path)
-    print(f"✅ Invoice {invoice_number} created: {excel_path}")
-
-# Example: Create a new invoice
-create_invoice("001", "Client ABC Pty Ltd")
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from app.exports import generate_invoice_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--company-id", type=int, required=True)
+    parser.add_argument("--output-dir", default=os.path.join(os.path.dirname(__file__), "invoices"))
+    parser.add_argument("--invoice-id", type=int, action="append", dest="invoice_ids",
+                        help="Only this invoice (repeatable); all of the company's invoices by default.")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    app = create_app()
+    started = time.perf_counter()
+    with app.app_context():
+        paths = generate_invoice_files(args.company_id, args.output_dir, args.invoice_ids, args.workers)
+    print(f"{len(paths)} invoice files written to {args.output_dir} in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Import-time profile of application startup.
+
+Runs `python -X importtime` in a fresh interpreter that imports the app and calls
+create_app(), then prints the slowest modules by cumulative import time and the
+total per top-level package.
+
+    python scripts/importtime_report.py --top 25
+    DB_SCHEMA_MODE=alembic python scripts/importtime_report.py
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STARTUP_CODE = "from app import create_app; create_app()"
+
+
+def collect(code=STARTUP_CODE, env=None):
+    """Returns [(module, self_us, cumulative_us, depth)] parsed from -X importtime output."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"startup failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_field, cumulative_field, name = line.split("|", 2)
+        self_us = int(self_field.split(":")[1])
+        cumulative_us = int(cumulative_field)
+        # -X importtime indents nested imports by two spaces per level after one leading space
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), self_us, cumulative_us, depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20, help="modules to list by cumulative time")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    entries = collect(env=env)
+
+    # Top-level imports (depth 0) add up to the whole import phase
+    total_us = sum(cumulative for _, _, cumulative, depth in entries if depth == 0)
+    print(f"Total import time: {total_us / 1000:.1f} ms ({len(entries)} modules)\n")
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us, _ in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+    packages = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        packages[name.split(".")[0]] += self_us
+    print(f"\n{'self ms':>9}  package")
+    for package, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:9.1f}  {package}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 import os
 from app import create_app
+from app.jobs import recover_jobs
 
 app = create_app()
+# Pick up background jobs a previous server process left queued or running. The
+# flask CLI (`flask db upgrade` ...) imports this module too and must not start them.
+if not os.environ.get("FLASK_RUN_FROM_CLI"):
+    recover_jobs(app)
 
 if __name__ == "__main__":
     # 🔒 PRODUCTION PORT BINDING: Pull Render's port (10000) or fallback to local 5000